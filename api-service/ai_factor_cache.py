@@ -0,0 +1,146 @@
+"""DeepSeek 因子投票缓存(F1 近期状态 / F2 实力定位)
+
+predict_match / predict_wc_match 每次点击都并发调 3 次 call_deepseek_factors, 每次数秒。
+build_ai_prompt 对同一份基本面快照(近期战绩/交锋/盘口/热度描述)输出相同 prompt,
+所以按 prompt 哈希缓存解析后的各次投票(factor 列表), 数据没变就直接复用:
+
+  - 键: sha1(模型 + system prompt + user prompt), 任一输入数据变化即自然失效
+  - 进程内 LRU(DEEPSEEK_FACTOR_CACHE_SIZE 条) + 可选 MySQL 层(ai_factor_cache 表,
+    DEEPSEEK_FACTOR_CACHE_DB=1), 两层共用 DEEPSEEK_FACTOR_CACHE_TTL
+  - DEEPSEEK_FACTOR_CACHE=0 关闭(每次重新调用)
+  - 只缓存至少一票有效的结果(全部失败/默认值不缓存)
+
+缓存层的数据库错误只记日志。返回值是深拷贝。
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+Votes = List[List[Dict[str, Any]]]
+
+_lock = threading.Lock()
+# key -> (expires_at, votes); 尾部最近使用
+_entries: "OrderedDict[str, Tuple[float, Votes]]" = OrderedDict()
+_stats = {"hits": 0, "db_hits": 0, "misses": 0, "stores": 0}
+
+
+def cache_key(model: str, system_prompt: str, prompt: str) -> str:
+    h = hashlib.sha1()
+    for part in (model, system_prompt, prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _enabled() -> bool:
+    return settings.DEEPSEEK_FACTOR_CACHE and settings.DEEPSEEK_FACTOR_CACHE_TTL > 0
+
+
+def _db_get(key: str) -> Optional[Tuple[Votes, float]]:
+    from db_pool import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT votes_json, UNIX_TIMESTAMP(expires_at) exp FROM ai_factor_cache "
+                "WHERE prompt_hash = %s AND expires_at > NOW()",
+                (key,),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    return (json.loads(row["votes_json"]), float(row["exp"])) if row else None
+
+
+def _db_put(key: str, model: str, votes: Votes) -> None:
+    from db_pool import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """INSERT INTO ai_factor_cache (prompt_hash, model, votes_json, expires_at)
+                   VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+                   ON DUPLICATE KEY UPDATE model = VALUES(model), votes_json = VALUES(votes_json),
+                                           expires_at = VALUES(expires_at)""",
+                (key, model, json.dumps(votes, ensure_ascii=False), int(settings.DEEPSEEK_FACTOR_CACHE_TTL)),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _remember(key: str, expires_at: float, votes: Votes) -> None:
+    """写入 LRU 并按容量淘汰最久未用; 调用方持锁。"""
+    _entries[key] = (expires_at, votes)
+    _entries.move_to_end(key)
+    while len(_entries) > max(1, settings.DEEPSEEK_FACTOR_CACHE_SIZE):
+        _entries.popitem(last=False)
+
+
+def get(key: str) -> Optional[Votes]:
+    """命中返回各次投票(深拷贝), 否则 None。"""
+    if not _enabled():
+        return None
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                return copy.deepcopy(entry[1])
+            del _entries[key]
+
+    if settings.DEEPSEEK_FACTOR_CACHE_DB:
+        try:
+            found = _db_get(key)
+        except Exception as e:
+            logger.warning(f"[ai_cache] 读库失败: {e}")
+            found = None
+        if found is not None:
+            votes, expires_at = found
+            with _lock:
+                _remember(key, expires_at, votes)
+                _stats["db_hits"] += 1
+            return copy.deepcopy(votes)
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(key: str, model: str, votes: Votes) -> None:
+    if not _enabled() or not votes:
+        return
+    votes = copy.deepcopy(votes)
+    with _lock:
+        _remember(key, time.time() + settings.DEEPSEEK_FACTOR_CACHE_TTL, votes)
+        _stats["stores"] += 1
+
+    if settings.DEEPSEEK_FACTOR_CACHE_DB:
+        try:
+            _db_put(key, model, votes)
+        except Exception as e:
+            logger.warning(f"[ai_cache] 写库失败: {e}")
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "size": len(_entries)}
@@ -71,9 +71,8 @@ def find_match_by_question(question: str) -> Optional[Dict]:
 
     用于竞彩队名(不在 KNOWN_TEAMS 里)的匹配。
     """
-    import pymysql
-    import settings
-    conn = pymysql.connect(**settings.MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    from db_pool import get_conn
+    conn = get_conn()
     try:
         with conn.cursor() as cur:
             cur.execute(
@@ -18,6 +18,7 @@ import pymysql
 from playwright.sync_api import sync_playwright
 
 import settings
+import build_odds_open_close
 
 JCZQ_DB = os.getenv("JCZQ_DB", "/Users/jetwong/Projects/personal/world-cup/data/jczq.db")
 BASE_URL = "https://zx.500.com/jczq/kaijiang.php"
@@ -199,6 +200,8 @@ def main():
                 time.sleep(backoff)
 
         flush()
+        # executemany 绕过了逐行 upsert, 重建初/终盘汇总
+        build_odds_open_close.rebuild(conn)
         conn.close()
         browser.close()
 
@@ -0,0 +1,141 @@
+"""批量历史同赔(/api/predict/batch-similar)结果缓存
+
+键 = (售卖日, status), 值带数据版本; 版本不符视为未命中, 按数据精确失效:
+  - 当日场次集合: 排序后 match_id 列表的摘要(场次移出/加入当日列表)
+  - 当日场次: matches.updated_at 最大值(状态/比分/亚盘懒回填写回)
+  - 当日 spf 变动: jczq_odds_history 行数 + 最大 change_time(只增表, 行数覆盖终盘回填)
+  - 当日即时快照: odds_win_draw_lose(had/hhad).updated_at 最大值(current 优先读 had,
+    hhad 提供结果里的竞彩让球 handicap)
+  - 当日亚盘: jczq_ah_history.updated_at 最大值(仅 Bet365 系)
+  - 同赔池内容版本(池增量合并新完赛场次后变)
+
+两级: 进程内 LRU(BATCH_SIMILAR_CACHE_SIZE 条, 0 关闭) + 可选磁盘
+(DATA_DIR/batch_similar/{date}_{status}.json, BATCH_SIMILAR_CACHE_DISK=1),
+磁盘层让重启/多 worker 共享已结束日期的结果。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+import settings
+from jczq_similar_odds import get_pool_version
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = settings.DATA_DIR / "batch_similar"
+
+_lock = threading.Lock()
+# (date, status) -> (version, result); 尾部最近使用
+_entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]" = OrderedDict()
+_stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+
+def data_version(cur, match_ids: List[str]) -> str:
+    """当日输入数据版本(见模块说明); cur 为调用方 DictCursor。"""
+    ids_digest = hashlib.sha1("\0".join(sorted(match_ids)).encode("utf-8")).hexdigest()
+    parts: List[Any] = [get_pool_version("spf"), ids_digest]
+    if match_ids:
+        ph = ",".join(["%s"] * len(match_ids))
+        cur.execute(f"SELECT MAX(updated_at) v FROM matches WHERE match_id IN ({ph})", match_ids)
+        parts.append(cur.fetchone()["v"])
+        cur.execute(
+            f"SELECT COUNT(*) n, MAX(change_time) v FROM jczq_odds_history "
+            f"WHERE odds_type = 'spf' AND match_id IN ({ph})",
+            match_ids,
+        )
+        r = cur.fetchone()
+        parts.extend([r["n"], r["v"]])
+        cur.execute(
+            f"SELECT MAX(updated_at) v FROM odds_win_draw_lose "
+            f"WHERE odds_type IN ('had', 'hhad') AND match_id IN ({ph})",
+            match_ids,
+        )
+        parts.append(cur.fetchone()["v"])
+        cur.execute(
+            f"SELECT MAX(updated_at) v FROM jczq_ah_history "
+            f"WHERE company LIKE %s AND match_id IN ({ph})",
+            ("Bet365%", *match_ids),
+        )
+        parts.append(cur.fetchone()["v"])
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _disk_path(date: str, status: str):
+    return CACHE_DIR / f"{date}_{status}.json"
+
+
+def get(date: str, status: str, version: str) -> Optional[Dict]:
+    """命中返回缓存结果(只读, 勿修改), 否则 None。"""
+    if settings.BATCH_SIMILAR_CACHE_SIZE <= 0:
+        return None
+    key = (date, status)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == version:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+
+    if settings.BATCH_SIMILAR_CACHE_DISK:
+        path = _disk_path(date, status)
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            payload = None
+        if payload and payload.get("version") == version:
+            result = payload["result"]
+            with _lock:
+                _remember(key, version, result)
+                _stats["disk_hits"] += 1
+            return result
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(date: str, status: str, version: str, result: Dict) -> None:
+    if settings.BATCH_SIMILAR_CACHE_SIZE <= 0:
+        return
+    # 转成 JSON 原生类型: 内存/磁盘两级返回同一形态
+    result = jsonable_encoder(result)
+    with _lock:
+        _remember((date, status), version, result)
+        _stats["stores"] += 1
+
+    if settings.BATCH_SIMILAR_CACHE_DISK:
+        path = _disk_path(date, status)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps({"version": version, "result": result}, ensure_ascii=False),
+                           encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"批量同赔缓存写盘失败 {path.name}: {e}")
+
+
+def _remember(key: Tuple[str, str], version: str, result: Dict) -> None:
+    """写入 LRU 并按容量淘汰最久未用; 调用方持锁。"""
+    _entries[key] = (version, result)
+    _entries.move_to_end(key)
+    while len(_entries) > settings.BATCH_SIMILAR_CACHE_SIZE:
+        _entries.popitem(last=False)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "size": len(_entries)}
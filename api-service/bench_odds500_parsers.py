@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""500.com 页面解析基准: 各解析后端(html.parser / lxml)吞吐、内存分配、输出一致性。
+
+离线运行, 读取保存的页面(按 500.com 原样 gbk/utf-8 字节保存):
+  DIR/ouzhi-{fid}.html        百家欧赔     -> _parse_european_page
+  DIR/yazhi-{fid}.html        亚盘         -> _parse_asian_page / _parse_live_score
+  DIR/daxiao-{fid}.html       大小球       -> _parse_over_under_page
+  DIR/list-{date}.html        竞彩列表页   -> _parse_jczq_list
+  DIR/shuju-{fid}/            基本面 4 份: page.html home_recent.html away_recent.html h2h.html
+  DIR/yzhist-{fid}-{cid}.json 亚盘变动 AJAX(JSON 数组, 每项一行 HTML) -> _history_rows
+  DIR/expected/*.json         各用例的基准输出(--update-expected 由解析器生成), 只用于回归比对
+  DIR/checks.json             对照页面源码手工抄录的期望值(不经解析器), 校验解析结果本身是否正确
+
+每个用例报告: 单次耗时、吞吐(页/秒, MB/秒)、单次解析分配峰值与总分配(tracemalloc)、
+与 expected 是否一致、checks 是否通过、各后端输出是否一致。任一不一致退出码为 1。
+
+用法:
+  python3 bench_odds500_parsers.py                       # 默认目录 data/odds500_fixtures
+  python3 bench_odds500_parsers.py --dir /tmp/pages -n 50 --parsers html.parser,lxml
+  python3 bench_odds500_parsers.py --update-expected     # 解析逻辑有意改动后刷新基准输出
+  python3 bench_odds500_parsers.py --record --fid 1250001 --date 2026-10-17   # 联网录制真实页面
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import odds500_service as o
+
+DEFAULT_DIR = Path(__file__).resolve().parent / "data" / "odds500_fixtures"
+_MISSING = object()
+
+# shuju 目录内文件名与编码(同 _shuju_requests 顺序)
+SHUJU_FILES = [("page.html", "gbk"), ("home_recent.html", "utf-8"), ("away_recent.html", "utf-8"), ("h2h.html", "gbk")]
+
+
+class Case(NamedTuple):
+    kind: str
+    name: str
+    size: int  # 输入字节数
+    fn: Callable[[], Any]
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}__{self.name}"
+
+
+def _read(path: Path, encoding: str = "gbk") -> str:
+    return path.read_bytes().decode(encoding, errors="replace")
+
+
+def _history_texts(rows: List[str]) -> List[List[str]]:
+    return [[td.get_text(strip=True) for td in tds] for tds in o._history_rows(rows)]
+
+
+def load_cases(fixture_dir: Path) -> List[Case]:
+    """页面先读入内存, 计时只含解析。"""
+    cases: List[Case] = []
+    for path in sorted(fixture_dir.glob("ouzhi-*.html")):
+        html = _read(path)
+        cases.append(Case("euro", path.name, path.stat().st_size, lambda h=html: o._parse_european_page(h)))
+    for path in sorted(fixture_dir.glob("yazhi-*.html")):
+        html = _read(path)
+        size = path.stat().st_size
+        cases.append(Case("asian", path.name, size, lambda h=html: o._parse_asian_page(h)))
+        cases.append(Case("live_score", path.name, size, lambda h=html: o._parse_live_score(h)))
+    for path in sorted(fixture_dir.glob("daxiao-*.html")):
+        html = _read(path)
+        cases.append(Case("over_under", path.name, path.stat().st_size, lambda h=html: o._parse_over_under_page(h)))
+    for path in sorted(fixture_dir.glob("list-*.html")):
+        html = _read(path)
+        cases.append(Case("jczq_list", path.name, path.stat().st_size, lambda h=html: o._parse_jczq_list(h)))
+    for path in sorted(p for p in fixture_dir.glob("shuju-*") if p.is_dir()):
+        files = [(path / name, enc) for name, enc in SHUJU_FILES]
+        htmls = [_read(f, enc) if f.exists() else "" for f, enc in files]
+        size = sum(f.stat().st_size for f, _ in files if f.exists())
+        cases.append(Case("match_data", path.name, size, lambda hs=htmls: o._parse_match_data(*hs)))
+    for path in sorted(fixture_dir.glob("yzhist-*.json")):
+        rows = json.loads(path.read_bytes().decode("utf-8"))
+        cases.append(Case("history_rows", path.name, path.stat().st_size, lambda r=rows: _history_texts(r)))
+    return cases
+
+
+def _normalize(value: Any) -> Any:
+    """JSON 往返: tuple/list 等价, 便于与 expected 及跨后端比较。"""
+    return json.loads(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str))
+
+
+def _allocations(fn: Callable[[], Any]) -> Dict[str, float]:
+    """单次调用的分配峰值与总分配(KB)。"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(s.size_diff for s in after.compare_to(before, "filename") if s.size_diff > 0)
+    return {"peak_kb": peak / 1024, "alloc_kb": allocated / 1024}
+
+
+def bench(cases: List[Case], parsers: List[str], iterations: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """返回 {parser: {case.key: {"ms", "peak_kb", "alloc_kb", "out"}}}"""
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    saved = o.HTML_PARSER
+    try:
+        for parser in parsers:
+            o.HTML_PARSER = parser
+            per: Dict[str, Dict[str, Any]] = {}
+            for case in cases:
+                out = case.fn()  # 预热 + 取输出
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    case.fn()
+                ms = (time.perf_counter() - start) * 1000 / iterations
+                per[case.key] = {"ms": ms, **_allocations(case.fn), "out": _normalize(out)}
+            results[parser] = per
+    finally:
+        o.HTML_PARSER = saved
+    return results
+
+
+def _expected_path(fixture_dir: Path, case: Case) -> Path:
+    return fixture_dir / "expected" / f"{case.key}.json"
+
+
+def load_expected(fixture_dir: Path, case: Case) -> Any:
+    """无 expected 文件返回 _MISSING(输出本身可能是 null)。"""
+    path = _expected_path(fixture_dir, case)
+    if not path.exists():
+        return _MISSING
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_checks(fixture_dir: Path) -> Dict[str, Dict[str, Any]]:
+    path = fixture_dir / "checks.json"
+    if not path.exists():
+        return {}
+    return {k: v for k, v in json.loads(path.read_text(encoding="utf-8")).items() if not k.startswith("_")}
+
+
+def _resolve(value: Any, path: str) -> Any:
+    """按 "a.0.b" 取值; 后缀 #len 取长度; 路径不存在返回 _MISSING。"""
+    path, _, suffix = path.partition("#")
+    for part in path.split(".") if path else ():
+        if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        elif isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    if suffix == "len":
+        return len(value) if isinstance(value, (list, dict)) else _MISSING
+    return value
+
+
+def run_checks(checks: Dict[str, Any], out: Any) -> List[str]:
+    """返回不通过的检查项描述。"""
+    failed = []
+    for path, want in checks.items():
+        got = _resolve(out, path)
+        if got is _MISSING or got != want:
+            failed.append(f"{path or '<root>'}: 期望 {want!r}, 实际 {'<缺失>' if got is _MISSING else repr(got)}")
+    return failed
+
+
+def write_expected(fixture_dir: Path, cases: List[Case], outputs: Dict[str, Dict[str, Any]]) -> None:
+    (fixture_dir / "expected").mkdir(parents=True, exist_ok=True)
+    for case in cases:
+        _expected_path(fixture_dir, case).write_text(
+            json.dumps(outputs[case.key]["out"], ensure_ascii=False, indent=1, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+
+
+def report(fixture_dir: Path, cases: List[Case], results: Dict[str, Dict[str, Dict[str, Any]]],
+           parsers: List[str]) -> int:
+    """逐用例逐后端打印; 返回不一致数(与 expected 不符 + checks 不通过 + 后端间不符)。"""
+    base = parsers[0]
+    head = (f"{'parser':<13}{'fixture':<24}{'backend':<13}{'ms':>9}{'pages/s':>9}{'MB/s':>7}"
+            f"{'peak KB':>9}{'alloc KB':>10}  expected  checks")
+    print(head)
+    print("-" * len(head))
+    all_checks = load_checks(fixture_dir)
+    failures: List[str] = []
+    mismatches = 0
+    totals = {p: {"ms": 0.0, "bytes": 0} for p in parsers}
+    for case in cases:
+        expected = load_expected(fixture_dir, case)
+        for i, p in enumerate(parsers):
+            r = results[p][case.key]
+            totals[p]["ms"] += r["ms"]
+            totals[p]["bytes"] += case.size
+            if expected is _MISSING:
+                verdict = "-"
+            elif r["out"] == expected:
+                verdict = "ok"
+            else:
+                verdict = "DIFF"
+                mismatches += 1
+            if i > 0 and r["out"] != results[base][case.key]["out"]:
+                verdict += f" (≠{base})"
+                mismatches += 1
+            checks = all_checks.get(case.key)
+            if checks is None:
+                check_verdict = "-"
+            else:
+                failed = run_checks(checks, r["out"])
+                check_verdict = f"{len(checks) - len(failed)}/{len(checks)}"
+                if failed:
+                    mismatches += 1
+                    failures.extend(f"{case.key} [{p}] {f}" for f in failed)
+            pages = 1000 / r["ms"] if r["ms"] else 0
+            mbps = case.size / 1024 / 1024 * pages
+            label = (case.kind, case.name[:23]) if i == 0 else ("", "")
+            print(f"{label[0]:<13}{label[1]:<24}{p:<13}{r['ms']:>9.3f}{pages:>9.1f}{mbps:>7.2f}"
+                  f"{r['peak_kb']:>9.0f}{r['alloc_kb']:>10.0f}  {verdict:<8}  {check_verdict}")
+    print("-" * len(head))
+    for p in parsers:
+        t = totals[p]
+        mbps = t["bytes"] / 1024 / 1024 / (t["ms"] / 1000) if t["ms"] else 0
+        speedup = totals[base]["ms"] / t["ms"] if t["ms"] else 0
+        print(f"total {p:<13}{t['ms']:>10.3f} ms  {mbps:>6.2f} MB/s  {speedup:.2f}x vs {base}")
+    for f in failures:
+        print(f"check 不通过: {f}")
+    return mismatches
+
+
+def record(fixture_dir: Path, fids: List[str], dates: List[str]) -> None:
+    """联网按 500.com 原样字节保存页面(需要网络)。"""
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    for date in dates:
+        resp = o._http.get(f"{o.BASE_URL}/yazhi_jczq_{date}.shtml")
+        (fixture_dir / f"list-{date}.html").write_bytes(resp.content)
+        print(f"list-{date}.html {len(resp.content)} bytes")
+    for fid in fids:
+        for kind in ("ouzhi", "yazhi", "daxiao"):
+            resp = o._http.get(f"{o.BASE_URL}/fenxi/{kind}-{fid}.shtml")
+            (fixture_dir / f"{kind}-{fid}.html").write_bytes(resp.content)
+            print(f"{kind}-{fid}.html {len(resp.content)} bytes")
+        shuju_dir = fixture_dir / f"shuju-{fid}"
+        shuju_dir.mkdir(exist_ok=True)
+        for (method, url, kw, _), (name, _) in zip(o._shuju_requests(fid), SHUJU_FILES):
+            resp = o._http.request(method, url, **kw)
+            (shuju_dir / name).write_bytes(resp.content)
+            print(f"shuju-{fid}/{name} {len(resp.content)} bytes")
+        resp = o._http.get(
+            f"{o.BASE_URL}/fenxi1/inc/yazhiajax.php",
+            params={"fid": fid, "id": 3, "t": int(time.time() * 1000), "r": 1},
+            headers={**o.HEADERS, "X-Requested-With": "XMLHttpRequest",
+                     "Referer": f"{o.BASE_URL}/fenxi/yazhi-{fid}.shtml"},
+        )
+        (fixture_dir / f"yzhist-{fid}-3.json").write_text(
+            json.dumps(resp.json(), ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"yzhist-{fid}-3.json")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="500.com 页面解析基准(离线)")
+    ap.add_argument("--dir", type=Path, default=DEFAULT_DIR, help="fixture 目录")
+    ap.add_argument("-n", "--iterations", type=int, default=20, help="每个 fixture 每个后端重复次数")
+    ap.add_argument("--parsers", default="html.parser,lxml", help="逗号分隔, 第一个为基准")
+    ap.add_argument("--update-expected", action="store_true", help="用第一个后端的输出覆盖 expected/")
+    ap.add_argument("--record", action="store_true", help="联网录制页面到 --dir(配合 --fid/--date)")
+    ap.add_argument("--fid", action="append", default=[], help="录制的 500.com fid, 可多次")
+    ap.add_argument("--date", action="append", default=[], help="录制的竞彩列表页日期 YYYY-MM-DD, 可多次")
+    args = ap.parse_args()
+
+    if args.record:
+        record(args.dir, args.fid, args.date)
+        return 0
+
+    parsers = [p.strip() for p in args.parsers.split(",") if p.strip()]
+    unavailable = [p for p in parsers if o._resolve_html_parser(p) != p]
+    if unavailable:
+        print(f"跳过未安装的后端: {', '.join(unavailable)}")
+        parsers = [p for p in parsers if p not in unavailable]
+    cases = load_cases(args.dir)
+    if not cases:
+        print(f"{args.dir} 下没有 fixture")
+        return 1
+
+    print(f"{len(cases)} 个解析用例, 每个 {args.iterations} 次, 后端: {', '.join(parsers)}\n")
+    results = bench(cases, parsers, args.iterations)
+    if args.update_expected:
+        write_expected(args.dir, cases, results[parsers[0]])
+        print(f"已用 {parsers[0]} 输出刷新 {args.dir / 'expected'}\n")
+    mismatches = report(args.dir, cases, results, parsers)
+    if mismatches:
+        print(f"\n{mismatches} 处输出不一致(与 expected / checks 或后端间), 需核对解析逻辑")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+重建初/终盘汇总 - jczq_odds_open_close 表
+
+jczq_odds_history 每场每口径(spf/nspf)一行汇总: 初盘(最早一条)、终盘(最晚一条)、行数。
+同赔池与单场初终盘直接读这张表, 不再对 history 做 GROUP BY + 两次自连接。
+
+增量维护: scraper 追加 history / 赛果终赔校正 / closing_odds 回填时同事务 upsert。
+本脚本做全量重建, 首次上线、sync_history 批量导入、或手工改 history 后运行:
+    python build_odds_open_close.py
+重建完成写 jczq_odds_open_close_build 标记; 同赔池首次加载发现没有标记(从未全量重建,
+汇总表可能只有 scraper 上线后增量写入的行)时会自动调 rebuild(), 见
+jczq_similar_odds._ensure_open_close。
+"""
+
+import pymysql
+import settings
+
+REBUILD_SQL = """
+    INSERT INTO jczq_odds_open_close
+        (match_id, odds_type, open_win, open_draw, open_loss,
+         close_win, close_draw, close_loss, move_count, first_time, last_time)
+    SELECT
+        t.match_id, t.odds_type,
+        f.odds_win, f.odds_draw, f.odds_loss,
+        l.odds_win, l.odds_draw, l.odds_loss,
+        t.cnt, t.mn, t.mx
+    FROM (
+        SELECT match_id, odds_type, MIN(change_time) mn, MAX(change_time) mx, COUNT(*) cnt
+        FROM jczq_odds_history
+        WHERE odds_type IN ('spf', 'nspf')
+        GROUP BY match_id, odds_type
+    ) t
+    JOIN jczq_odds_history f ON f.match_id = t.match_id AND f.odds_type = t.odds_type AND f.change_time = t.mn
+    JOIN jczq_odds_history l ON l.match_id = t.match_id AND l.odds_type = t.odds_type AND l.change_time = t.mx
+    ON DUPLICATE KEY UPDATE
+        open_win=VALUES(open_win), open_draw=VALUES(open_draw), open_loss=VALUES(open_loss),
+        close_win=VALUES(close_win), close_draw=VALUES(close_draw), close_loss=VALUES(close_loss),
+        move_count=VALUES(move_count), first_time=VALUES(first_time), last_time=VALUES(last_time)
+"""
+
+MARK_SQL = """
+    INSERT INTO jczq_odds_open_close_build (id, rebuilt_at, affected) VALUES (1, NOW(), %s)
+    ON DUPLICATE KEY UPDATE rebuilt_at=VALUES(rebuilt_at), affected=VALUES(affected)
+"""
+
+# history 已无对应行的汇总(history 被清理/删除后)
+PRUNE_SQL = """
+    DELETE oc FROM jczq_odds_open_close oc
+    LEFT JOIN jczq_odds_history h ON h.match_id = oc.match_id AND h.odds_type = oc.odds_type
+    WHERE h.id IS NULL
+"""
+
+
+def ensure_table(conn):
+    with conn.cursor() as c:
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS jczq_odds_open_close (
+                match_id VARCHAR(100) NOT NULL,
+                odds_type VARCHAR(20) NOT NULL COMMENT 'spf/nspf',
+                open_win DECIMAL(8,2) NOT NULL,
+                open_draw DECIMAL(8,2) NOT NULL,
+                open_loss DECIMAL(8,2) NOT NULL,
+                close_win DECIMAL(8,2) NOT NULL,
+                close_draw DECIMAL(8,2) NOT NULL,
+                close_loss DECIMAL(8,2) NOT NULL,
+                move_count INT NOT NULL DEFAULT 1 COMMENT 'history 行数(≥2 才有初终盘变动)',
+                first_time DATETIME NOT NULL COMMENT '初盘 change_time',
+                last_time DATETIME NOT NULL COMMENT '终盘 change_time',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (match_id, odds_type),
+                INDEX idx_type_moves (odds_type, move_count),
+                FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS jczq_odds_open_close_build (
+                id INT PRIMARY KEY CHECK (id = 1),
+                rebuilt_at DATETIME NOT NULL,
+                affected INT NOT NULL DEFAULT 0
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+    conn.commit()
+
+
+def is_built(conn) -> bool:
+    """汇总表是否做过全量重建(有重建标记); 标记表不存在视为未重建。"""
+    try:
+        with conn.cursor() as c:
+            c.execute("SELECT 1 FROM jczq_odds_open_close_build WHERE id = 1")
+            return c.fetchone() is not None
+    except pymysql.err.ProgrammingError:
+        return False
+
+
+def rebuild(conn) -> int:
+    """全量重建汇总并写重建标记, 返回 upsert 影响行数。"""
+    ensure_table(conn)
+    with conn.cursor() as c:
+        affected = c.execute(REBUILD_SQL)
+        c.execute(PRUNE_SQL)
+        c.execute(MARK_SQL, (affected,))
+    conn.commit()
+    return affected
+
+
+def run():
+    conn = pymysql.connect(**settings.MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    try:
+        affected = rebuild(conn)
+        with conn.cursor() as c:
+            c.execute("""
+                SELECT odds_type, COUNT(*) cnt, SUM(move_count >= 2) moved
+                FROM jczq_odds_open_close GROUP BY odds_type ORDER BY odds_type
+            """)
+            rows = c.fetchall()
+        print("=" * 60)
+        print(f"初/终盘汇总已重建 (jczq_odds_open_close), 影响行数 {affected}:")
+        for r in rows:
+            print(f"  {r['odds_type']}: {r['cnt']} 场, 有变动(≥2 条) {int(r['moved'] or 0)} 场")
+        print("=" * 60)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    run()
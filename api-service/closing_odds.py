@@ -101,6 +101,9 @@ def _apply_closing_spf(
            VALUES (%s,'spf',%s,%s,%s,%s,%s,%s,%s)""",
         (match_id, win, draw, lose, dw, dd, dl, ct),
     )
+    if cur.rowcount:
+        from repository import upsert_odds_open_close
+        upsert_odds_open_close(conn, match_id, "spf", win, draw, lose, ct)
     cur.execute(
         """UPDATE odds_win_draw_lose
            SET win_odds=%s, draw_odds=%s, lose_odds=%s, updated_at=CURRENT_TIMESTAMP
@@ -5,6 +5,7 @@ from typing import Any, Dict
 
 import pymysql
 
+import db_pool
 import settings
 
 _SCHEMA_MYSQL = Path(settings.SCHEMA_MYSQL_PATH)
@@ -120,17 +121,13 @@ def _ensure_wechat_columns(cursor) -> None:
 
 
 def _connect():
-    """连接 MySQL 数据库"""
-    return pymysql.connect(
-        **settings.MYSQL_CONFIG,
-        cursorclass=pymysql.cursors.DictCursor,
-        autocommit=False,
-    )
+    """从共享连接池借 MySQL 连接(close 即归还)"""
+    return db_pool.get_conn()
 
 
 @contextmanager
 def get_db():
-    """获取数据库连接的上下文管理器"""
+    """获取数据库连接的上下文管理器(池化连接, 退出时提交/回滚并归还)"""
     conn = _connect()
     try:
         yield conn
@@ -0,0 +1,243 @@
+"""api-service 共享 MySQL 连接池
+
+原先每次 get_db()/_get_conn() 都新建 pymysql 连接(TCP + 鉴权握手), 单次
+/api/predict/{match_id} 要建 6 次以上。这里进程内维护一个有界池:
+
+  - 有界: 最多 DB_POOL_SIZE 条连接同时借出, 满了排队等待, 超过 DB_POOL_WAIT_TIMEOUT 抛 PoolTimeout
+  - 健康检查: 空闲超过 DB_POOL_PING_IDLE 秒的连接借出前 ping, 失败丢弃重建
+  - 寿命回收: 建立超过 DB_POOL_MAX_LIFETIME 秒的连接归还时关闭(避开 MySQL wait_timeout/中间件断链)
+  - 借出即独占: get_conn() 返回代理, 调用方照旧 conn.close(), 实际是回滚未提交事务后归还池;
+    未 close 就丢弃的代理被回收时兜底归还(记 leaked), 避免名额泄漏到池被占满
+  - 指标: stats() 含借出次数/新建/回收/健康检查失败/等待耗时/占用耗时
+
+DB_POOL_SIZE=0 关闭池化, get_conn() 退化为每次直连。
+fork 出的子进程(如 batch-similar 进程池)首次使用时丢弃继承的连接, 不与父进程共用 socket。
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import pymysql
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """等待空闲连接超时。"""
+
+
+def _connect() -> pymysql.connections.Connection:
+    return pymysql.connect(
+        **settings.MYSQL_CONFIG,
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=False,
+    )
+
+
+class PooledConnection:
+    """借出的连接代理: 属性/方法透传给 pymysql 连接, close() 改为归还池。"""
+
+    __slots__ = ("_pool", "_raw", "_created_at", "_checkout_at")
+
+    def __init__(self, pool: "ConnectionPool", raw, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._checkout_at = time.monotonic()
+
+    def __getattr__(self, name: str) -> Any:
+        raw = object.__getattribute__(self, "_raw")
+        if raw is None:
+            raise pymysql.err.InterfaceError(0, "connection already returned to pool")
+        return getattr(raw, name)
+
+    def close(self) -> None:
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self._created_at, self._checkout_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # 调用方漏了 close(): 代理被回收时归还借出名额, 否则每漏一次池就永久少一条
+        try:
+            raw = object.__getattribute__(self, "_raw")
+        except AttributeError:
+            return
+        if raw is not None:
+            self._raw = None
+            self._pool._release(raw, self._created_at, self._checkout_at, leaked=True)
+
+
+class ConnectionPool:
+    def __init__(self, max_size: int, max_lifetime: float, ping_idle: float, wait_timeout: float):
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.ping_idle = ping_idle
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        # 空闲连接: (raw, created_at, idle_since), 右端最近归还(LIFO, 热连接优先复用)
+        self._idle: deque = deque()
+        self._in_use = 0
+        self._pid = os.getpid()
+        self._stats = {
+            "checkouts": 0, "created": 0, "recycled": 0, "ping_failures": 0, "timeouts": 0, "leaked": 0,
+            "wait_total_ms": 0.0, "wait_max_ms": 0.0, "hold_total_ms": 0.0, "hold_max_ms": 0.0,
+        }
+
+    def _check_fork(self) -> None:
+        """子进程丢弃继承的连接状态(socket 属于父进程, 不关闭只遗弃)。调用方持锁。"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle.clear()
+            self._in_use = 0
+
+    def get_conn(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.wait_timeout
+        with self._cond:
+            self._check_fork()
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"MySQL 连接池已满({self.max_size}), 等待 {self.wait_timeout}s 超时")
+                self._cond.wait(remaining)
+            item = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            raw, created_at = self._ready(item)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = (time.monotonic() - start) * 1000
+        with self._cond:
+            s = self._stats
+            s["checkouts"] += 1
+            s["wait_total_ms"] += waited
+            s["wait_max_ms"] = max(s["wait_max_ms"], waited)
+        return PooledConnection(self, raw, created_at)
+
+    def _ready(self, item):
+        """空闲连接做寿命/健康检查后返回 (raw, created_at); 无可用则新建。锁外执行(涉及网络)。"""
+        now = time.monotonic()
+        if item is not None:
+            raw, created_at, idle_since = item
+            if now - created_at >= self.max_lifetime:
+                self._discard(raw, "recycled")
+            elif now - idle_since >= self.ping_idle:
+                try:
+                    raw.ping(reconnect=False)
+                    return raw, created_at
+                except Exception:
+                    self._discard(raw, "ping_failures")
+            else:
+                return raw, created_at
+        raw = _connect()
+        with self._cond:
+            self._stats["created"] += 1
+        return raw, time.monotonic()
+
+    def _discard(self, raw, reason: str) -> None:
+        with self._cond:
+            self._stats[reason] += 1
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _release(self, raw, created_at: float, checkout_at: float, leaked: bool = False) -> None:
+        now = time.monotonic()
+        held = (now - checkout_at) * 1000
+        keep = now - created_at < self.max_lifetime
+        if keep:
+            # 与原先 close() 语义一致: 未提交的事务不带给下一个借用者
+            try:
+                raw.rollback()
+            except Exception:
+                keep = False
+        if not keep:
+            self._discard(raw, "recycled")
+        if leaked:
+            logger.warning(f"MySQL 连接借出后未 close, 代理回收时归还(占用 {held:.0f}ms)")
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            s = self._stats
+            if leaked:
+                s["leaked"] += 1
+            s["hold_total_ms"] += held
+            s["hold_max_ms"] = max(s["hold_max_ms"], held)
+            self._in_use -= 1
+            if keep:
+                self._idle.append((raw, created_at, now))
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            s = dict(self._stats)
+            s.update(max_size=self.max_size, in_use=self._in_use, idle=len(self._idle))
+        n = s["checkouts"] or 1
+        s["wait_avg_ms"] = round(s["wait_total_ms"] / n, 2)
+        s["hold_avg_ms"] = round(s["hold_total_ms"] / n, 2)
+        for k in ("wait_total_ms", "wait_max_ms", "hold_total_ms", "hold_max_ms"):
+            s[k] = round(s[k], 2)
+        return s
+
+    def close_idle(self) -> None:
+        """关闭全部空闲连接(停机用); 借出中的连接归还时照常处理。"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _, _ in idle:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_init_lock = threading.Lock()
+
+
+def get_pool() -> Optional[ConnectionPool]:
+    """进程级单例; DB_POOL_SIZE<=0 返回 None(不池化)。"""
+    global _pool
+    if settings.DB_POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_init_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    max_size=settings.DB_POOL_SIZE,
+                    max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                    ping_idle=settings.DB_POOL_PING_IDLE,
+                    wait_timeout=settings.DB_POOL_WAIT_TIMEOUT,
+                )
+    return _pool
+
+
+def get_conn():
+    """借一条 DictCursor、非自动提交的连接; 用完 conn.close() 归还。"""
+    pool = get_pool()
+    if pool is None:
+        return _connect()
+    return pool.get_conn()
+
+
+def stats() -> Dict[str, Any]:
+    pool = get_pool()
+    return pool.stats() if pool is not None else {"max_size": 0}
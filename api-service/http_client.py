@@ -0,0 +1,244 @@
+"""共享 HTTP 客户端(连接池 + keep-alive + 每主机并发上限 + 重试退避)
+
+odds500_service 原先每个请求新建 httpx.Client, 每次都要 DNS + TCP + TLS 握手。
+ManagedClient 进程内复用一个 httpx.Client:
+
+  - 连接池: max_connections / max_keepalive_connections / keepalive_expiry
+  - HTTP/2: http2=True 且装了 h2 时启用, 未装则降级 HTTP/1.1 并告警
+  - 每主机并发上限: 同一 host 同时在途请求数(信号量), 避免突发打满对方限流
+  - 重试: 连接类错误(建连失败/连接被复用时已断)与 429/5xx 指数退避重试;
+    读超时不重试(已等满 timeout, 交给调用方的截止时间处理)
+  - stats(): 请求/重试/失败计数、排队等待耗时、各主机在途数、连接池现有连接数
+
+AsyncManagedClient 为 httpx.AsyncClient 版孪生(同一套参数/重试/统计), 供 async 端点
+用 asyncio.gather 并发几十个请求而不占线程池; 每主机上限用 asyncio.Semaphore。
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 可重试的响应码: 限流 + 网关/服务端临时错误
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 可重试的传输错误: 请求大概率未被对方处理
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.ReadError)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _ManagedBase:
+    """同步/异步客户端共用: 连接池参数、重试策略、统计。"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 15,
+                 max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 30,
+                 http2: bool = False, per_host: int = 8, retries: int = 2, backoff: float = 0.5):
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 需要 h2 包(pip install 'httpx[http2]'), 降级 HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._client_kwargs = dict(
+            headers=headers,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self._client = None
+        self._lock = threading.Lock()
+        self._host_sems: Dict[str, Any] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0}
+
+    def _begin(self, host: str, waited_ms: float) -> None:
+        with self._lock:
+            s = self._stats
+            s["requests"] += 1
+            s["wait_total_ms"] += waited_ms
+            s["wait_max_ms"] = max(s["wait_max_ms"], waited_ms)
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+
+    def _end(self, host: str) -> None:
+        with self._lock:
+            self._in_flight[host] -= 1
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _next_delay(self, attempt: int, method: str, url: str, cause) -> Optional[float]:
+        """是否重试: 返回退避秒数, 不重试返回 None。attempt 为已重试次数。"""
+        if attempt >= self.retries:
+            return None
+        self._count("retries")
+        delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+        logger.info(f"HTTP 重试 {attempt + 1}/{self.retries} {method} {url}: {cause}, {delay:.2f}s 后")
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["in_flight"] = {h: n for h, n in self._in_flight.items() if n}
+        n = s["requests"] or 1
+        s["wait_avg_ms"] = round(s["wait_total_ms"] / n, 2)
+        s["wait_total_ms"] = round(s["wait_total_ms"], 2)
+        s["wait_max_ms"] = round(s["wait_max_ms"], 2)
+        s["http2"] = self.http2
+        s["connections"] = _pool_connection_count(self._client)
+        return s
+
+
+class ManagedClient(_ManagedBase):
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs)
+        return self._client
+
+    def _host_sem(self, host: str) -> threading.BoundedSemaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            with self._lock:
+                sem = self._host_sems.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        return sem
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """发请求(参数同 httpx.Client.request); 重试用尽后抛最后一次异常或返回最后一次响应。"""
+        host = urlsplit(url).netloc
+        sem = self._host_sem(host)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            with sem:
+                self._begin(host, (time.monotonic() - start) * 1000)
+                try:
+                    resp, error = self.client.request(method, url, **kwargs), None
+                except RETRY_ERRORS as e:
+                    resp, error = None, e
+                except Exception:
+                    self._count("failures")
+                    raise
+                finally:
+                    self._end(host)
+
+            if error is None and resp.status_code not in RETRY_STATUS:
+                return resp
+            delay = self._next_delay(attempt, method, url, error or resp.status_code)
+            if delay is None:
+                if error is not None:
+                    self._count("failures")
+                    raise error
+                return resp
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+
+class AsyncManagedClient(_ManagedBase):
+    """httpx.AsyncClient 版; 首次使用时在当前事件循环上创建(AsyncClient 绑定事件循环)。"""
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self._client_kwargs)
+        return self._client
+
+    def _host_sem(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems.setdefault(host, asyncio.Semaphore(self.per_host))
+        return sem
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """同 ManagedClient.request, 协程版。"""
+        host = urlsplit(url).netloc
+        sem = self._host_sem(host)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            async with sem:
+                self._begin(host, (time.monotonic() - start) * 1000)
+                try:
+                    resp, error = await self.client.request(method, url, **kwargs), None
+                except RETRY_ERRORS as e:
+                    resp, error = None, e
+                except Exception:
+                    self._count("failures")
+                    raise
+                finally:
+                    self._end(host)
+
+            if error is None and resp.status_code not in RETRY_STATUS:
+                return resp
+            delay = self._next_delay(attempt, method, url, error or resp.status_code)
+            if delay is None:
+                if error is not None:
+                    self._count("failures")
+                    raise error
+                return resp
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+async def gather_limited(coros, limit: int):
+    """并发执行协程, 同时最多 limit 个; 结果按输入顺序返回(异常作为结果项返回)。"""
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def _run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*[_run(c) for c in coros], return_exceptions=True)
+
+
+def _pool_connection_count(client) -> Optional[int]:
+    """httpcore 连接池现有连接数(内部属性, 取不到返回 None)。"""
+    if client is None:
+        return 0
+    try:
+        return len(client._transport._pool.connections)
+    except AttributeError:
+        return None
@@ -7,7 +7,7 @@ import re
 from typing import Any, Dict, List, Optional
 
 from jczq_similar_odds import is_japan_league
-from jp_scraper.db import get_conn
+from db_pool import get_conn
 from jp_scraper.zh_display import (
     club_zh,
     lineup_source_zh,
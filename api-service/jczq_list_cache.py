@@ -0,0 +1,145 @@
+"""500.com 竞彩列表页(yazhi_jczq_{date}.shtml)缓存: 场次号 → fid / 比分
+
+替代 odds500_service 原先两个无界全局 dict(_fid_cache/_score_cache)。它们被请求线程、
+比分回填线程、实时比分端点并发读写, 实时比分端点还会整表 clear() 掉别人的数据。
+
+  - 按售卖日分条, 一条 = 该日列表页解析出的全部 fid 与比分; 最多 max_dates 个日期(LRU)
+  - fid 映射稳定, 比分易变: 两者各自 TTL(fid_ttl / score_ttl), 同一次加载同时刷新
+  - invalidate_scores(): 只让比分过期(下次按日重新加载), 不丢 fid, 不影响正在读的请求
+  - load()/aload(): 同一日期单飞加载, 并发调用方等同一次下载, 不重复抓取;
+    单飞锁随该日条目一起淘汰(加载失败未建条目时也丢弃), 不随日期无限增长
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# loader(date) -> (fids, scores) 或 None(加载失败, 不写缓存)
+ListPage = Tuple[Dict[str, str], Dict[str, Optional[tuple]]]
+
+
+class _DateEntry:
+    __slots__ = ("fids", "scores", "fids_at", "scores_at")
+
+    def __init__(self, fids: Dict[str, str], scores: Dict[str, Optional[tuple]], loaded_at: float):
+        self.fids = fids
+        self.scores = scores
+        self.fids_at = loaded_at
+        self.scores_at = loaded_at
+
+
+class JczqListCache:
+    def __init__(self, max_dates: int = 32, fid_ttl: float = 6 * 3600, score_ttl: float = 30):
+        self.max_dates = max_dates
+        self.fid_ttl = fid_ttl
+        self.score_ttl = score_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _DateEntry]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._aload_locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {"loads": 0, "load_failures": 0, "shared_loads": 0, "fid_hits": 0, "score_hits": 0}
+
+    def _entry(self, date: str) -> Optional[_DateEntry]:
+        """调用方持锁。"""
+        entry = self._entries.get(date)
+        if entry is not None:
+            self._entries.move_to_end(date)
+        return entry
+
+    def fid(self, date: str, code: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(date)
+            if entry is None or now - entry.fids_at >= self.fid_ttl:
+                return None
+            fid = entry.fids.get(code)
+            if fid is not None:
+                self._stats["fid_hits"] += 1
+            return fid
+
+    def score(self, date: str, code: str) -> Tuple[bool, Optional[tuple]]:
+        """(列表页上有该场且比分未过期, 比分); 有该场但未开赛/进行中时比分为 None。"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(date)
+            if entry is None or now - entry.scores_at >= self.score_ttl or code not in entry.scores:
+                return False, None
+            self._stats["score_hits"] += 1
+            return True, entry.scores[code]
+
+    def fresh(self, date: str, max_age: Optional[float] = None) -> bool:
+        """该日列表页在 max_age(默认 score_ttl)秒内加载过。"""
+        max_age = self.score_ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(date)
+            return entry is not None and time.monotonic() - entry.scores_at < max_age
+
+    def store(self, date: str, fids: Dict[str, str], scores: Dict[str, Optional[tuple]]) -> None:
+        with self._lock:
+            self._entries[date] = _DateEntry(fids, scores, time.monotonic())
+            self._entries.move_to_end(date)
+            while len(self._entries) > self.max_dates:
+                evicted, _ = self._entries.popitem(last=False)
+                self._drop_locks(evicted)
+
+    def _drop_locks(self, date: str) -> None:
+        """丢弃该日单飞锁; 调用方持锁。仍在等旧锁的调用方照常完成(最多多加载一次)。"""
+        self._load_locks.pop(date, None)
+        self._aload_locks.pop(date, None)
+
+    def invalidate_scores(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                entry.scores_at = float("-inf")
+
+    def _sync_lock(self, date: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(date, threading.Lock())
+
+    def load(self, date: str, loader: Callable[[str], Optional[ListPage]],
+             max_age: Optional[float] = None) -> None:
+        """该日未在 max_age 内加载过则调 loader; 同日并发调用只下载一次(后到者等待并复用)。"""
+        if self.fresh(date, max_age):
+            return
+        with self._sync_lock(date):
+            if self.fresh(date, max_age):
+                with self._lock:
+                    self._stats["shared_loads"] += 1
+                return
+            self._record(date, loader(date))
+
+    async def aload(self, date: str, loader: Callable[[str], Awaitable[Optional[ListPage]]],
+                    max_age: Optional[float] = None) -> None:
+        """load 协程版(单飞范围为事件循环内的协程)。"""
+        if self.fresh(date, max_age):
+            return
+        lock = self._aload_locks.setdefault(date, asyncio.Lock())
+        async with lock:
+            if self.fresh(date, max_age):
+                with self._lock:
+                    self._stats["shared_loads"] += 1
+                return
+            self._record(date, await loader(date))
+
+    def _record(self, date: str, page: Optional[ListPage]) -> None:
+        with self._lock:
+            self._stats["loads"] += 1
+            if page is None:
+                self._stats["load_failures"] += 1
+                if date not in self._entries:
+                    self._drop_locks(date)
+        if page is not None:
+            self.store(date, *page)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._load_locks.clear()
+            self._aload_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "dates": len(self._entries), "max_dates": self.max_dates,
+                "load_locks": len(self._load_locks) + len(self._aload_locks)}
@@ -1,18 +1,23 @@
 """竞彩历史同赔匹配引擎 (spf 口径)
 
-镜像 wc_similar_odds.py 的匹配逻辑，数据源换 MySQL jczq_odds_history。
+镜像 wc_similar_odds.py 的匹配逻辑，数据源换 MySQL jczq_odds_history
+(初/终盘读其汇总表 jczq_odds_open_close, 见 build_odds_open_close.py)。
 匹配条件: 初盘低赔 ±tolerance + 低赔方同一侧(同为胜/平/负) + 低赔变动方向一致(升/降)
 
 数据口径: 胜平负(spf)。每场初盘=history 最早行、终盘优先 odds_win_draw_lose.had(与列表同步);
 结果(result)按 raw 比分算主胜/平/客胜。样本: 46673 场有 spf 变动≥2 + 已完赛(2018-2026)。
 """
 
+import json
 import logging
+import os
+import threading
 from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-import pymysql
+import numpy as np
 
+import db_pool
 import settings
 
 logger = logging.getLogger(__name__)
@@ -118,13 +123,115 @@ def _high_odds_tolerance(odds: Optional[float], base: float = HIGH_TOLERANCE,
         return wide
     return base
 
-# 历史池缓存: 2018-2025 静态数据，进程内只加载一次
-_pool_cache: Optional[List[Dict]] = None
-_spf_pool_cache: Optional[List[Dict]] = None
+
+class PoolMatch(NamedTuple):
+    """历史同赔池单场(不可变)。nspf 池无单关/亚盘初盘, 对应字段为 0/None。"""
+    match_id: str
+    match_date: str
+    league_name: str
+    home_team: str
+    away_team: str
+    home_score: int
+    away_score: int
+    is_single: int
+    open_handicap: Optional[float]
+    handicap: Optional[float]
+    result: str
+    open_win: float
+    open_draw: float
+    open_loss: float
+    close_win: float
+    close_draw: float
+    close_loss: float
+
+
+_STR_FIELDS = frozenset({"match_id", "match_date", "league_name", "home_team", "away_team", "result"})
+_INT_FIELDS = frozenset({"home_score", "away_score", "is_single"})
+_OPT_FLOAT_FIELDS = frozenset({"open_handicap", "handicap"})
+
+
+class _ColumnarPool:
+    """同赔池列存(只读): PoolMatch 每个字段一列 NumPy 数组, 按下标取场次时才组装记录。
+
+    列可来自 DB 查询结果, 也可直接是快照文件的 mmap 视图(多 worker 共享页缓存)。
+    可选亚盘列用 NaN 表示缺失, 取记录时还原为 None。
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        for arr in columns.values():
+            if arr.flags.writeable:
+                arr.flags.writeable = False
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records) -> "_ColumnarPool":
+        columns = {}
+        for f in PoolMatch._fields:
+            values = [getattr(r, f) for r in records]
+            if f in _STR_FIELDS:
+                columns[f] = np.array(values, dtype=str)
+            elif f in _INT_FIELDS:
+                columns[f] = np.array(values, dtype=np.int16)
+            elif f in _OPT_FLOAT_FIELDS:
+                columns[f] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                columns[f] = np.array(values, dtype=np.float64)
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["match_id"])
+
+    def __getitem__(self, i: int) -> PoolMatch:
+        values = []
+        for f in PoolMatch._fields:
+            v = self.columns[f][i]
+            if f in _STR_FIELDS:
+                values.append(str(v))
+            elif f in _INT_FIELDS:
+                values.append(int(v))
+            elif f in _OPT_FLOAT_FIELDS:
+                values.append(None if np.isnan(v) else float(v))
+            else:
+                values.append(float(v))
+        return PoolMatch(*values)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def merge(self, updates: "_ColumnarPool", changed_ids) -> "_ColumnarPool":
+        """剔除 changed_ids 旧行后追加 updates(增量刷新用), 返回新池。"""
+        keep = ~np.isin(self.columns["match_id"], list(changed_ids))
+        return _ColumnarPool({
+            f: np.concatenate([self.columns[f][keep], updates.columns[f]]) for f in PoolMatch._fields
+        })
+
+
+# 历史池缓存: odds_type('spf'/'nspf') -> 列存池(只读, 多线程共享)。
+# 进程内加载一次(优先磁盘快照), 之后由 refresh_pools 按水位增量合并并整体替换。
+_pool_caches: Dict[str, _ColumnarPool] = {}
+# 冷启动 single-flight + 刷新互斥: 并发首个请求只跑一次重 SQL, 其余等待结果
+_pool_locks = {"spf": threading.Lock(), "nspf": threading.Lock()}
+# 增量水位: odds_type -> {odds_id: history 自增 id, match_at: matches.updated_at, side_at: 盘口表 updated_at}
+_pool_watermarks: Dict[str, Dict] = {}
+# 池内容版本: 池加载/重建/增量合并出新内容时记下当时水位, 无变更的刷新不动(供下游结果缓存失效)
+_pool_versions: Dict[str, str] = {}
+# 第三路变更源: spf 池结算用 Bet365 亚盘, nspf 池用 hhad 盘口
+_POOL_SIDE_SOURCES = {
+    "spf": ("jczq_ah_history", "company LIKE 'Bet365%%'"),
+    "nspf": ("odds_win_draw_lose", "odds_type = 'hhad'"),
+}
+_REFRESH_CHUNK = 500
+
+# 磁盘快照: DATA_DIR/similar_pool/{odds_type}_pool_v{N}.npy(结构化数组, mmap 只读加载) + .json(版本/水位)。
+# 列结构、口径或水位字段变化时递增版本号, 旧快照自动失效重建。
+SNAPSHOT_VERSION = 2
+SNAPSHOT_DIR = settings.DATA_DIR / "similar_pool"
 
 
 def _get_conn():
-    return pymysql.connect(**settings.MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    return db_pool.get_conn()
 
 
 def _get_direction(open_val: float, close_val: float) -> Optional[str]:
@@ -165,39 +272,370 @@ def _side_high_odds(win, loss):
     return max(cands)
 
 
-def get_nspf_pool() -> List[Dict]:
+def _read_pool_watermark(cur, odds_type: str) -> Dict:
+    """当前各变更源水位; 先于池查询读取, 其间的变更下次刷新会再合并一次(幂等)。
+
+    含初/终盘汇总表的 MAX(updated_at) 与行数: build_odds_open_close 重建不新增 history 行,
+    只靠 history id 看不到重建带来的变化。汇总表不可用(池回退扫 history)时记 NULL/0。
+    """
+    side_table, side_cond = _POOL_SIDE_SOURCES[odds_type]
+    if _ensure_open_close():
+        oc_cols = f"""
+            (SELECT MAX(updated_at) FROM jczq_odds_open_close WHERE odds_type = '{odds_type}') AS oc_at,
+            (SELECT COUNT(*) FROM jczq_odds_open_close WHERE odds_type = '{odds_type}') AS oc_count"""
+    else:
+        oc_cols = "NULL AS oc_at, 0 AS oc_count"
+    cur.execute(f"""
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM jczq_odds_history) AS odds_id,
+            (SELECT MAX(updated_at) FROM matches) AS match_at,
+            (SELECT MAX(updated_at) FROM {side_table} WHERE {side_cond}) AS side_at,
+            {oc_cols}
+    """, ())
+    return cur.fetchone()
+
+
+def _changed_match_ids(cur, odds_type: str, watermark: Dict) -> List[str]:
+    """水位之后变更过的 match_id: 新增赔率行(含终盘回填) / 比分或比赛信息更新 / 盘口更新。
+
+    history 用自增 id 而非 change_time: 终盘回填按开赛时间写 change_time, 会早于水位。
+    汇总表按 updated_at 补上重建/手工修正带来的变更(不伴随新 history 行)。
+    """
+    side_table, side_cond = _POOL_SIDE_SOURCES[odds_type]
+    epoch = datetime(1970, 1, 1)
+    sql = f"""
+        SELECT match_id FROM jczq_odds_history WHERE id > %s AND odds_type = %s
+        UNION
+        SELECT match_id FROM matches WHERE updated_at > %s AND home_score IS NOT NULL
+        UNION
+        SELECT match_id FROM {side_table} WHERE updated_at > %s AND {side_cond}
+    """
+    params = (watermark["odds_id"], odds_type,
+              watermark["match_at"] or epoch, watermark["side_at"] or epoch)
+    if _ensure_open_close():
+        sql += """
+        UNION
+        SELECT match_id FROM jczq_odds_open_close WHERE updated_at > %s AND odds_type = %s
+        """
+        params += (watermark.get("oc_at") or epoch, odds_type)
+    cur.execute(sql, params)
+    return [r["match_id"] for r in cur.fetchall()]
+
+
+def _snapshot_paths(odds_type: str):
+    stem = f"{odds_type}_pool_v{SNAPSHOT_VERSION}"
+    return SNAPSHOT_DIR / f"{stem}.npy", SNAPSHOT_DIR / f"{stem}.json"
+
+
+def _save_snapshot(odds_type: str, pool: _ColumnarPool, watermark: Dict) -> None:
+    """池+水位写快照; 先写数据再写 meta, 各自临时文件 + os.replace 原子替换。
+
+    其他 worker 已 mmap 的旧文件 inode 不受替换影响。空池不落盘: 多半是数据未就绪
+    (如汇总表未重建), 落盘后每次重启都会直接加载这份空池。
+    """
+    if len(pool) == 0:
+        logger.warning(f"同赔池 {odds_type} 为空, 不写快照")
+        return
+    data_path, meta_path = _snapshot_paths(odds_type)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    cols = pool.columns
+    arr = np.empty(len(pool), dtype=[(f, cols[f].dtype) for f in PoolMatch._fields])
+    for f in PoolMatch._fields:
+        arr[f] = cols[f]
+    tmp = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        np.save(fh, arr)
+    os.replace(tmp, data_path)
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "odds_type": odds_type,
+        "count": len(pool),
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "watermark": {
+            "odds_id": int(watermark["odds_id"]),
+            "match_at": watermark["match_at"].isoformat() if watermark.get("match_at") else None,
+            "side_at": watermark["side_at"].isoformat() if watermark.get("side_at") else None,
+            "oc_at": watermark["oc_at"].isoformat() if watermark.get("oc_at") else None,
+            "oc_count": int(watermark.get("oc_count") or 0),
+        },
+    }
+    tmp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+
+def _load_snapshot(odds_type: str) -> Optional[Tuple[_ColumnarPool, Dict]]:
+    """读快照(mmap 只读); 缺失/版本不符/损坏返回 None 走 DB。
+
+    先读 meta 再 mmap 数据: 并发重写时拿到的水位只会旧于数据, 增量刷新重放幂等。
+    """
+    data_path, meta_path = _snapshot_paths(odds_type)
+    if not data_path.exists() or not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+        arr = np.load(data_path, mmap_mode="r")
+        if arr.dtype.names != PoolMatch._fields or len(arr) == 0:
+            return None
+        wm = meta["watermark"]
+        watermark = {
+            "odds_id": int(wm["odds_id"]),
+            "match_at": datetime.fromisoformat(wm["match_at"]) if wm.get("match_at") else None,
+            "side_at": datetime.fromisoformat(wm["side_at"]) if wm.get("side_at") else None,
+            "oc_at": datetime.fromisoformat(wm["oc_at"]) if wm.get("oc_at") else None,
+            "oc_count": int(wm["oc_count"]),
+        }
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"同赔池快照读取失败 {odds_type}: {e}")
+        return None
+    return _ColumnarPool({f: arr[f] for f in PoolMatch._fields}), watermark
+
+
+def _build_pool_from_db(odds_type: str, query_fn) -> Tuple[_ColumnarPool, Dict]:
+    """全量查询池 + 水位(水位先读, 见 _read_pool_watermark), 并落快照。"""
+    conn = _get_conn()
+    try:
+        with conn.cursor() as cur:
+            watermark = _read_pool_watermark(cur, odds_type)
+    finally:
+        conn.close()
+    pool = _ColumnarPool.from_records(query_fn())
+    if settings.SIMILAR_POOL_SNAPSHOT:
+        try:
+            _save_snapshot(odds_type, pool, watermark)
+        except OSError as e:
+            logger.warning(f"同赔池快照写入失败 {odds_type}: {e}")
+    return pool, watermark
+
+
+def _get_pool(odds_type: str, query_fn) -> _ColumnarPool:
+    pool = _pool_caches.get(odds_type)
+    if pool is not None:
+        return pool
+    with _pool_locks[odds_type]:
+        pool = _pool_caches.get(odds_type)
+        if pool is None:
+            snapshot = _load_snapshot(odds_type) if settings.SIMILAR_POOL_SNAPSHOT else None
+            if snapshot is not None:
+                pool, watermark = snapshot
+                logger.info(f"同赔池 {odds_type} 从快照加载 {len(pool)} 场")
+            else:
+                pool, watermark = _build_pool_from_db(odds_type, query_fn)
+            _pool_watermarks[odds_type] = watermark
+            _pool_versions[odds_type] = _watermark_version(watermark)
+            _pool_caches[odds_type] = pool
+        return pool
+
+
+def _watermark_version(watermark: Dict) -> str:
+    return (f"{watermark.get('odds_id')}:{watermark.get('match_at')}:{watermark.get('side_at')}:"
+            f"{watermark.get('oc_at')}:{watermark.get('oc_count')}")
+
+
+def get_pool_version(odds_type: str = "spf") -> str:
+    """池内容版本串; 池未加载返回空串。内容不变时版本不变。"""
+    return _pool_versions.get(odds_type, "")
+
+
+def rebuild_pool_snapshot(odds_type: str = "spf") -> int:
+    """全量重查 DB 并重写快照, 同时替换本进程池; 返回池场次数。"""
+    query_fn, pool_loader = {
+        "spf": (_load_spf_pool, get_spf_pool),
+        "nspf": (_load_nspf_pool, get_nspf_pool),
+    }[odds_type]
+    with _pool_locks[odds_type]:
+        pool, watermark = _build_pool_from_db(odds_type, query_fn)
+        index = _PoolIndex(pool)
+        with _pool_index_lock:
+            _pool_caches[odds_type] = pool
+            _pool_index_cache[pool_loader] = index
+        _pool_watermarks[odds_type] = watermark
+        _pool_versions[odds_type] = _watermark_version(watermark)
+    return len(pool)
+
+
+def _refresh_pool(odds_type: str, pool_loader, query_fn) -> int:
+    """按水位增量刷新已加载的池: 仅重查变更场次, 合并后连同新索引原子替换。
+
+    变更场次若已不满足池条件(如比分被清空)则移出池。池未加载返回 0(首次加载即全量)。
+    汇总表行数变少(重建时 PRUNE 了行)无法按变更时间定位, 改为全量重建。
+    有变更时同步重写磁盘快照。返回变更场次数。
+    """
+    if _pool_caches.get(odds_type) is None:
+        return 0
+    with _pool_locks[odds_type]:
+        pool = _pool_caches[odds_type]
+        conn = _get_conn()
+        try:
+            with conn.cursor() as cur:
+                watermark = _read_pool_watermark(cur, odds_type)
+                changed = _changed_match_ids(cur, odds_type, _pool_watermarks[odds_type])
+        finally:
+            conn.close()
+        if watermark["oc_count"] < _pool_watermarks[odds_type].get("oc_count", 0):
+            new_pool, watermark = _build_pool_from_db(odds_type, query_fn)
+            index = _PoolIndex(new_pool)
+            with _pool_index_lock:
+                _pool_caches[odds_type] = new_pool
+                _pool_index_cache[pool_loader] = index
+            _pool_watermarks[odds_type] = watermark
+            _pool_versions[odds_type] = _watermark_version(watermark)
+            logger.info(f"同赔池 {odds_type} 汇总表行数减少, 全量重建: 池 {len(pool)}→{len(new_pool)}")
+            return len(new_pool)
+        if not changed:
+            _pool_watermarks[odds_type] = watermark
+            return 0
+
+        updates: List[PoolMatch] = []
+        for i in range(0, len(changed), _REFRESH_CHUNK):
+            updates.extend(query_fn(changed[i:i + _REFRESH_CHUNK]))
+        new_pool = pool.merge(_ColumnarPool.from_records(updates), changed)
+
+        index = _PoolIndex(new_pool)
+        with _pool_index_lock:
+            _pool_caches[odds_type] = new_pool
+            _pool_index_cache[pool_loader] = index
+        _pool_watermarks[odds_type] = watermark
+        _pool_versions[odds_type] = _watermark_version(watermark)
+        if settings.SIMILAR_POOL_SNAPSHOT:
+            try:
+                _save_snapshot(odds_type, new_pool, watermark)
+            except OSError as e:
+                logger.warning(f"同赔池快照写入失败 {odds_type}: {e}")
+    logger.info(f"同赔池增量刷新 {odds_type}: 变更{len(changed)}场, 池 {len(pool)}→{len(new_pool)}")
+    return len(changed)
+
+
+def refresh_pools() -> Dict[str, int]:
+    """增量刷新 spf/nspf 同赔池(后台定时调用), 返回各池变更场次数。"""
+    return {
+        "spf": _refresh_pool("spf", get_spf_pool, _load_spf_pool),
+        "nspf": _refresh_pool("nspf", get_nspf_pool, _load_nspf_pool),
+    }
+
+
+def _match_id_filter(match_ids: Optional[List[str]], column: str = "oc.match_id") -> Tuple[str, tuple]:
+    """池 SQL 的 match_id 限定(增量刷新用); None=全量。"""
+    if match_ids is None:
+        return "", ()
+    return f"AND {column} IN ({','.join(['%s'] * len(match_ids))})", tuple(match_ids)
+
+
+# 汇总表不可用时的池数据源: 直接对 history GROUP BY + 两次自连接(汇总表上线前的原查询)
+_HISTORY_OPEN_CLOSE_SQL = """(
+    SELECT
+        t.match_id, '{odds_type}' AS odds_type, t.cnt AS move_count,
+        f.odds_win AS open_win,  f.odds_draw AS open_draw,  f.odds_loss AS open_loss,
+        l.odds_win AS close_win, l.odds_draw AS close_draw, l.odds_loss AS close_loss
+    FROM (
+        SELECT match_id, MIN(change_time) mn, MAX(change_time) mx, COUNT(*) cnt
+        FROM jczq_odds_history
+        WHERE odds_type = '{odds_type}' {id_filter}
+        GROUP BY match_id
+    ) t
+    JOIN jczq_odds_history f ON f.match_id = t.match_id AND f.odds_type = '{odds_type}' AND f.change_time = t.mn
+    JOIN jczq_odds_history l ON l.match_id = t.match_id AND l.odds_type = '{odds_type}' AND l.change_time = t.mx
+) oc"""
+
+# None=未检查, True=读汇总表, False=重建失败、本进程回退扫 history(重启后重试)
+_open_close_state: Optional[bool] = None
+_open_close_lock = threading.Lock()
+# 多个 api 进程同时发现未重建时, 用 MySQL 命名锁保证只有一个在重建, 其余等它写完标记
+_REBUILD_LOCK_NAME = "jczq_odds_open_close_rebuild"
+_REBUILD_LOCK_TIMEOUT = 600
+
+
+def _ensure_open_close() -> bool:
+    """jczq_odds_open_close 是否可作池数据源。
+
+    升级部署时 scraper 的 init_db 先建出汇总表并立即开始增量写入, 表里只有上线后的行:
+    非空不代表覆盖了全部 history。所以按 build_odds_open_close 的重建标记判断, 没有标记就
+    就地全量重建一次(MySQL 命名锁, 多进程只重建一次); 重建失败或等锁超时则本进程池查询
+    回退扫 history。结论按进程缓存(重建后 history 写入方同事务维护汇总)。
+    """
+    global _open_close_state
+    if _open_close_state is not None:
+        return _open_close_state
+    with _open_close_lock:
+        if _open_close_state is not None:
+            return _open_close_state
+        from build_odds_open_close import is_built, rebuild
+
+        conn = _get_conn()
+        try:
+            if is_built(conn):
+                _open_close_state = True
+                return True
+            with conn.cursor() as cur:
+                cur.execute("SELECT GET_LOCK(%s, %s) AS got", (_REBUILD_LOCK_NAME, _REBUILD_LOCK_TIMEOUT))
+                got = (cur.fetchone() or {}).get("got") == 1
+            if not got:
+                logger.error("等待 jczq_odds_open_close 重建锁超时, 同赔池回退扫 history")
+                _open_close_state = False
+                return False
+            try:
+                conn.commit()  # 结束首次检查的读快照, 才看得到等锁期间其他进程写的标记
+                if is_built(conn):
+                    _open_close_state = True
+                    return True
+                logger.warning("jczq_odds_open_close 未做过全量重建, 从 jczq_odds_history 重建")
+                try:
+                    affected = rebuild(conn)
+                except Exception as e:
+                    logger.error(f"jczq_odds_open_close 重建失败, 同赔池回退扫 history: {e}")
+                    _open_close_state = False
+                    return False
+                logger.info(f"jczq_odds_open_close 重建完成, 影响行数 {affected}")
+                _open_close_state = True
+                return True
+            finally:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT RELEASE_LOCK(%s)", (_REBUILD_LOCK_NAME,))
+        finally:
+            conn.close()
+
+
+def _open_close_source(odds_type: str, match_ids: Optional[List[str]]) -> Tuple[str, tuple]:
+    """池 SQL 的初/终盘数据源(别名 oc) + 参数: 优先汇总表, 不可用时回退 history 子查询。"""
+    if _ensure_open_close():
+        return "jczq_odds_open_close oc", ()
+    id_filter, params = _match_id_filter(match_ids, column="match_id")
+    return _HISTORY_OPEN_CLOSE_SQL.format(odds_type=odds_type, id_filter=id_filter), params
+
+
+def get_nspf_pool() -> _ColumnarPool:
     """加载竞彩 nspf 历史同赔池: 每场初盘(最早)+终盘(最晚)+比分+盘口+推导结果。
 
     过滤: nspf 变动≥2(有初终盘) + 已完赛(有比分) + hhad 盘口存在。
+    加锁 single-flight: 并发冷请求共享同一次加载; 有快照时直接 mmap 快照。
     """
-    global _pool_cache
-    if _pool_cache is not None:
-        return _pool_cache
-    sql = """
+    return _get_pool("nspf", _load_nspf_pool)
+
+
+def _load_nspf_pool(match_ids: Optional[List[str]] = None) -> Tuple[PoolMatch, ...]:
+    source, source_params = _open_close_source("nspf", match_ids)
+    id_filter, params = _match_id_filter(match_ids)
+    sql = f"""
         SELECT
             m.match_id, m.match_date, m.league_name,
             m.home_team_name, m.away_team_name,
             m.home_score, m.away_score,
             COALESCE(o.handicap, 0) AS handicap,
-            f.odds_win  AS open_win,  f.odds_draw  AS open_draw,  f.odds_loss  AS open_loss,
-            l.odds_win  AS close_win, l.odds_draw  AS close_draw, l.odds_loss  AS close_loss
-        FROM (
-            SELECT match_id, MIN(change_time) mn, MAX(change_time) mx
-            FROM jczq_odds_history
-            WHERE odds_type = 'nspf'
-            GROUP BY match_id
-            HAVING COUNT(*) >= 2
-        ) t
-        JOIN jczq_odds_history f ON f.match_id = t.match_id AND f.odds_type = 'nspf' AND f.change_time = t.mn
-        JOIN jczq_odds_history l ON l.match_id = t.match_id AND l.odds_type = 'nspf' AND l.change_time = t.mx
-        JOIN matches m ON m.match_id = t.match_id
-        LEFT JOIN odds_win_draw_lose o ON o.match_id = t.match_id AND o.odds_type = 'hhad'
-        WHERE m.home_score IS NOT NULL AND m.away_score IS NOT NULL
+            oc.open_win, oc.open_draw, oc.open_loss,
+            oc.close_win, oc.close_draw, oc.close_loss
+        FROM {source}
+        JOIN matches m ON m.match_id = oc.match_id
+        LEFT JOIN odds_win_draw_lose o ON o.match_id = oc.match_id AND o.odds_type = 'hhad'
+        WHERE oc.odds_type = 'nspf' AND oc.move_count >= 2 {id_filter}
+          AND m.home_score IS NOT NULL AND m.away_score IS NOT NULL
     """
     conn = _get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute(sql)
+            cur.execute(sql, source_params + params)
             rows = cur.fetchall()
     finally:
         conn.close()
@@ -215,21 +653,22 @@ def get_nspf_pool() -> List[Dict]:
             result = "D"
         else:
             result = "A"
-        pool.append({
-            "match_id": r["match_id"],
-            "match_date": str(r["match_date"]) if r["match_date"] else "",
-            "league_name": r["league_name"] or "",
-            "home_team": r["home_team_name"] or "",
-            "away_team": r["away_team_name"] or "",
-            "home_score": int(r["home_score"]),
-            "away_score": int(r["away_score"]),
-            "handicap": float(r["handicap"]),
-            "result": result,
-            "open_win": float(r["open_win"]), "open_draw": float(r["open_draw"]), "open_loss": float(r["open_loss"]),
-            "close_win": float(r["close_win"]), "close_draw": float(r["close_draw"]), "close_loss": float(r["close_loss"]),
-        })
-    _pool_cache = pool
-    return pool
+        pool.append(PoolMatch(
+            match_id=r["match_id"],
+            match_date=str(r["match_date"]) if r["match_date"] else "",
+            league_name=r["league_name"] or "",
+            home_team=r["home_team_name"] or "",
+            away_team=r["away_team_name"] or "",
+            home_score=int(r["home_score"]),
+            away_score=int(r["away_score"]),
+            is_single=0,
+            open_handicap=None,
+            handicap=float(r["handicap"]),
+            result=result,
+            open_win=float(r["open_win"]), open_draw=float(r["open_draw"]), open_loss=float(r["open_loss"]),
+            close_win=float(r["close_win"]), close_draw=float(r["close_draw"]), close_loss=float(r["close_loss"]),
+        ))
+    return tuple(pool)
 
 
 def _ah_outcome(home_score: int, away_score: int, hc: Optional[float],
@@ -365,13 +804,18 @@ def get_match_jczq_odds(match_id: str, odds_type: str = "nspf") -> Optional[Dict
     """取某场竞彩比赛指定口径的初盘/终盘, 组装成 jczq_company dict。
 
     odds_type: 'nspf'(让球胜平负) 或 'spf'(胜平负, 同世界杯口径)。
-    initial = jczq_odds_history 最早变动行。
+    initial = jczq_odds_history 最早变动行(读 jczq_odds_open_close 汇总, 汇总缺行时回退扫 history)。
     current 优先 odds_win_draw_lose 即时快照(与赛事列表同口径: spf←had / nspf←hhad),
     避免 scraper 已更新列表但 history 因变动门槛未 append 导致同赔仍用旧终盘;
     无即时快照则回退 history 最晚行。
     无 history 但有即时快照时 initial==current(等同 live 补种, 配合 F6 无变动降级)。
     """
     live_type = {"spf": "had", "nspf": "hhad"}.get(odds_type)
+    summary_sql = """
+        SELECT open_win, open_draw, open_loss, close_win, close_draw, close_loss
+        FROM jczq_odds_open_close
+        WHERE match_id = %s AND odds_type = %s
+    """
     hist_sql = """
         SELECT odds_win, odds_draw, odds_loss, change_time
         FROM jczq_odds_history
@@ -387,8 +831,12 @@ def get_match_jczq_odds(match_id: str, odds_type: str = "nspf") -> Optional[Dict
     conn = _get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute(hist_sql, (match_id, odds_type))
-            rows = cur.fetchall()
+            cur.execute(summary_sql, (match_id, odds_type))
+            summary = cur.fetchone()
+            rows = ()
+            if summary is None:
+                cur.execute(hist_sql, (match_id, odds_type))
+                rows = cur.fetchall()
             live = None
             if live_type:
                 cur.execute(live_sql, (match_id, live_type))
@@ -396,6 +844,21 @@ def get_match_jczq_odds(match_id: str, odds_type: str = "nspf") -> Optional[Dict
     finally:
         conn.close()
 
+    if summary is None and rows:
+        summary = _summary_from_history(rows[0], rows[-1])
+    return _assemble_jczq_odds(summary, live)
+
+
+def _summary_from_history(first: Dict, last: Dict) -> Dict:
+    """history 最早/最晚行 → 与 jczq_odds_open_close 同列名的汇总行。"""
+    return {
+        "open_win": first["odds_win"], "open_draw": first["odds_draw"], "open_loss": first["odds_loss"],
+        "close_win": last["odds_win"], "close_draw": last["odds_draw"], "close_loss": last["odds_loss"],
+    }
+
+
+def _assemble_jczq_odds(summary: Optional[Dict], live: Optional[Dict]) -> Optional[Dict]:
+    """汇总行(初/终盘) + 即时快照 → {"initial", "current"}; 口径见 get_match_jczq_odds。"""
     live_current = None
     if live:
         try:
@@ -407,17 +870,16 @@ def get_match_jczq_odds(match_id: str, odds_type: str = "nspf") -> Optional[Dict
         if lw > 0 or ld > 0 or ll > 0:
             live_current = {"win": lw, "draw": ld, "lose": ll}
 
-    if rows:
-        first, last = rows[0], rows[-1]
+    if summary:
         initial = {
-            "win": float(first["odds_win"]),
-            "draw": float(first["odds_draw"]),
-            "lose": float(first["odds_loss"]),
+            "win": float(summary["open_win"]),
+            "draw": float(summary["open_draw"]),
+            "lose": float(summary["open_loss"]),
         }
         current = live_current or {
-            "win": float(last["odds_win"]),
-            "draw": float(last["odds_draw"]),
-            "lose": float(last["odds_loss"]),
+            "win": float(summary["close_win"]),
+            "draw": float(summary["close_draw"]),
+            "lose": float(summary["close_loss"]),
         }
         return {"initial": initial, "current": current}
 
@@ -426,6 +888,60 @@ def get_match_jczq_odds(match_id: str, odds_type: str = "nspf") -> Optional[Dict
     return None
 
 
+def get_matches_jczq_odds(match_ids: List[str], odds_type: str = "nspf") -> Dict[str, Optional[Dict]]:
+    """批量版 get_match_jczq_odds: 一个连接, 汇总表 + 即时快照各一次 IN 查询。
+
+    汇总缺行的场次再用一次 IN 查询回退扫 history。返回 {match_id: 同单场口径 或 None}。
+    """
+    ids = list(dict.fromkeys(m for m in match_ids if m))
+    if not ids:
+        return {}
+    live_type = {"spf": "had", "nspf": "hhad"}.get(odds_type)
+    ph = ",".join(["%s"] * len(ids))
+    summaries: Dict[str, Dict] = {}
+    lives: Dict[str, Dict] = {}
+    conn = _get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT match_id, open_win, open_draw, open_loss, close_win, close_draw, close_loss
+                FROM jczq_odds_open_close
+                WHERE odds_type = %s AND match_id IN ({ph})
+            """, (odds_type, *ids))
+            for r in cur.fetchall():
+                summaries[r["match_id"]] = r
+            if live_type:
+                cur.execute(f"""
+                    SELECT match_id, win_odds, draw_odds, lose_odds
+                    FROM odds_win_draw_lose
+                    WHERE odds_type = %s AND match_id IN ({ph})
+                """, (live_type, *ids))
+                for r in cur.fetchall():
+                    lives.setdefault(r["match_id"], r)
+            missing = [m for m in ids if m not in summaries]
+            if missing:
+                mph = ",".join(["%s"] * len(missing))
+                cur.execute(f"""
+                    SELECT match_id, odds_win, odds_draw, odds_loss
+                    FROM jczq_odds_history
+                    WHERE odds_type = %s AND match_id IN ({mph})
+                    ORDER BY match_id, change_time
+                """, (odds_type, *missing))
+                first_last: Dict[str, List[Dict]] = {}
+                for r in cur.fetchall():
+                    fl = first_last.get(r["match_id"])
+                    if fl is None:
+                        first_last[r["match_id"]] = [r, r]
+                    else:
+                        fl[1] = r
+                for mid, (first, last) in first_last.items():
+                    summaries[mid] = _summary_from_history(first, last)
+    finally:
+        conn.close()
+
+    return {mid: _assemble_jczq_odds(summaries.get(mid), lives.get(mid)) for mid in ids}
+
+
 def get_match_nspf_odds(match_id: str) -> Optional[Dict]:
     """让球胜平负(nspf)初终盘 — 供 F6 历史同赔匹配 nspf 历史池。"""
     return get_match_jczq_odds(match_id, "nspf")
@@ -436,6 +952,11 @@ def get_match_spf_odds(match_id: str) -> Optional[Dict]:
     return get_match_jczq_odds(match_id, "spf")
 
 
+def get_matches_spf_odds(match_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """批量胜平负(spf)初终盘 — 供 batch-similar 一次取齐当日所有场次。"""
+    return get_matches_jczq_odds(match_ids, "spf")
+
+
 def find_similar_nspf(open_win: float, open_draw: float, open_loss: float,
                       close_win: float, close_draw: float, close_loss: float,
                       tolerance: float = TOLERANCE, league: Optional[str] = None,
@@ -445,6 +966,7 @@ def find_similar_nspf(open_win: float, open_draw: float, open_loss: float,
     """核心匹配(让球胜平负 nspf 口径): 初/终盘低赔±tolerance+高赔±high_tolerance + 低赔方同侧 + 变动方向一致。
 
     league 非空时同联赛优先排序; exclude_match_id 剔除预测比赛自身。
+    nspf 池与 spf 池共用 _PoolIndex 有序区间索引(按 pool_loader 各建一份)。
     Returns: {query, matches, stats} 与 wc_similar_odds.find_similar 同构。
     """
     return _find_similar(open_win, open_draw, open_loss, close_win, close_draw, close_loss,
@@ -454,17 +976,22 @@ def find_similar_nspf(open_win: float, open_draw: float, open_loss: float,
                          high_tolerance=high_tolerance)
 
 
-def get_spf_pool() -> List[Dict]:
+def get_spf_pool() -> _ColumnarPool:
     """spf(胜平负)历史同赔池: 每场初盘+终盘+比分+亚盘让球, 结果按raw比分算(主胜/平/客胜)。
 
     让球用 Bet365 系亚盘收盘线(jczq_ah_history.close_handicap, company LIKE 'Bet365%',
     标准亚盘: 正=主受让 负=主让)结算盘路; 另带 open_handicap 供弹窗展示初→终。
     无 Bet365 亚盘则 handicap/open_handicap=None。过滤: spf变动≥2 + 已完赛。
+    冷启动优先 mmap 磁盘快照(毫秒级, 多 worker 共享); 无快照时加锁 single-flight,
+    并发冷请求只跑一次 4 表自连接并落快照。之后由 refresh_pools 增量合并。
     """
-    global _spf_pool_cache
-    if _spf_pool_cache is not None:
-        return _spf_pool_cache
-    sql = """
+    return _get_pool("spf", _load_spf_pool)
+
+
+def _load_spf_pool(match_ids: Optional[List[str]] = None) -> Tuple[PoolMatch, ...]:
+    source, source_params = _open_close_source("spf", match_ids)
+    id_filter, params = _match_id_filter(match_ids)
+    sql = f"""
         SELECT
             m.match_id, m.match_date, m.league_name,
             m.home_team_name, m.away_team_name,
@@ -472,25 +999,18 @@ def get_spf_pool() -> List[Dict]:
             m.is_single,
             ah.open_handicap AS open_handicap,
             ah.close_handicap AS handicap,
-            f.odds_win  AS open_win,  f.odds_draw  AS open_draw,  f.odds_loss  AS open_loss,
-            l.odds_win  AS close_win, l.odds_draw  AS close_draw, l.odds_loss  AS close_loss
-        FROM (
-            SELECT match_id, MIN(change_time) mn, MAX(change_time) mx
-            FROM jczq_odds_history
-            WHERE odds_type = 'spf'
-            GROUP BY match_id
-            HAVING COUNT(*) >= 2
-        ) t
-        JOIN jczq_odds_history f ON f.match_id = t.match_id AND f.odds_type = 'spf' AND f.change_time = t.mn
-        JOIN jczq_odds_history l ON l.match_id = t.match_id AND l.odds_type = 'spf' AND l.change_time = t.mx
-        JOIN matches m ON m.match_id = t.match_id
-        LEFT JOIN jczq_ah_history ah ON ah.match_id = t.match_id AND ah.company LIKE 'Bet365%'
-        WHERE m.home_score IS NOT NULL AND m.away_score IS NOT NULL
+            oc.open_win, oc.open_draw, oc.open_loss,
+            oc.close_win, oc.close_draw, oc.close_loss
+        FROM {source}
+        JOIN matches m ON m.match_id = oc.match_id
+        LEFT JOIN jczq_ah_history ah ON ah.match_id = oc.match_id AND ah.company LIKE 'Bet365%%'
+        WHERE oc.odds_type = 'spf' AND oc.move_count >= 2 {id_filter}
+          AND m.home_score IS NOT NULL AND m.away_score IS NOT NULL
     """
     conn = _get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute(sql)
+            cur.execute(sql, source_params + params)
             rows = cur.fetchall()
     finally:
         conn.close()
@@ -510,23 +1030,22 @@ def get_spf_pool() -> List[Dict]:
             result = "A"
         hc = r["handicap"]
         oh = r.get("open_handicap")
-        pool.append({
-            "match_id": r["match_id"],
-            "match_date": str(r["match_date"]) if r["match_date"] else "",
-            "league_name": r["league_name"] or "",
-            "home_team": r["home_team_name"] or "",
-            "away_team": r["away_team_name"] or "",
-            "home_score": int(r["home_score"]),
-            "away_score": int(r["away_score"]),
-            "is_single": 1 if int(r.get("is_single") or 0) == 1 else 0,
-            "open_handicap": float(oh) if oh is not None else None,
-            "handicap": float(hc) if hc is not None else None,
-            "result": result,
-            "open_win": float(r["open_win"]), "open_draw": float(r["open_draw"]), "open_loss": float(r["open_loss"]),
-            "close_win": float(r["close_win"]), "close_draw": float(r["close_draw"]), "close_loss": float(r["close_loss"]),
-        })
-    _spf_pool_cache = pool
-    return pool
+        pool.append(PoolMatch(
+            match_id=r["match_id"],
+            match_date=str(r["match_date"]) if r["match_date"] else "",
+            league_name=r["league_name"] or "",
+            home_team=r["home_team_name"] or "",
+            away_team=r["away_team_name"] or "",
+            home_score=int(r["home_score"]),
+            away_score=int(r["away_score"]),
+            is_single=1 if int(r.get("is_single") or 0) == 1 else 0,
+            open_handicap=float(oh) if oh is not None else None,
+            handicap=float(hc) if hc is not None else None,
+            result=result,
+            open_win=float(r["open_win"]), open_draw=float(r["open_draw"]), open_loss=float(r["open_loss"]),
+            close_win=float(r["close_win"]), close_draw=float(r["close_draw"]), close_loss=float(r["close_loss"]),
+        ))
+    return tuple(pool)
 
 
 AH_LINE_TOL = 0.5  # 亚盘相似: |Δ|≥0.5 球 → 该项贡献归零
@@ -607,6 +1126,115 @@ def _blend_structural_sim(
     return odds_sim * 0.95
 
 
+# 列式池编码: low_key / direction 存 int8, 与 _get_low_odds_info 的 key / _get_direction 的方向一一对应
+_LOW_KEYS = ("win", "draw", "loss")
+_DIRECTION_CODES = ("升", "降", "平")
+_RANGE_EPS = 1e-9
+
+
+def _date_ordinal(match_date) -> int:
+    """match_date → 公历序数(供时效衰减向量化); 缺失/无法解析返回 -1(对应中性 0.85)。"""
+    if isinstance(match_date, datetime):
+        return match_date.date().toordinal()
+    if isinstance(match_date, date):
+        return match_date.toordinal()
+    if match_date:
+        try:
+            return datetime.strptime(str(match_date)[:10], "%Y-%m-%d").date().toordinal()
+        except ValueError:
+            return -1
+    return -1
+
+
+class _PoolIndex:
+    """历史同赔池列式索引: 池加载后一次性物化为 NumPy 列, _find_similar 向量化过滤+打分。
+
+    低赔方/低赔初终/高赔初终/变动方向 预先算好, 查询时不再逐场调用
+    _get_low_odds_info / _side_high_odds。亚盘缺失用 NaN, 日期缺失用 -1。
+    pool 保留列存池引用, 命中场次按下标回取。构建后所有列只读, 可跨线程共享。
+    """
+
+    def __init__(self, pool: _ColumnarPool):
+        self.pool = pool
+        n = len(pool)
+        cols = pool.columns
+
+        self.open_win, self.open_draw, self.open_loss = cols["open_win"], cols["open_draw"], cols["open_loss"]
+        self.close_win, self.close_draw, self.close_loss = cols["close_win"], cols["close_draw"], cols["close_loss"]
+
+        opens = np.column_stack([self.open_win, self.open_draw, self.open_loss]).reshape(n, 3)
+        closes = np.column_stack([self.close_win, self.close_draw, self.close_loss]).reshape(n, 3)
+        # 低赔=初盘三项最小; argmin 并列取先出现项, 与 min() 一致
+        low = np.argmin(opens, axis=1) if n else np.zeros(0, dtype=np.intp)
+        rows = np.arange(n)
+        self.low_key = low.astype(np.int8)
+        self.low_open = opens[rows, low]
+        self.low_close = closes[rows, low]
+        # 高赔=主胜/客胜较高者(不含平)
+        self.high_open = np.maximum(self.open_win, self.open_loss)
+        self.high_close = np.maximum(self.close_win, self.close_loss)
+        diff = self.low_close - self.low_open
+        self.direction = np.where(diff > 0.01, 0, np.where(diff < -0.01, 1, 2)).astype(np.int8)
+
+        self.handicap = cols["handicap"]
+        self.open_handicap = cols["open_handicap"]
+        self.match_ids = cols["match_id"]
+        # 日期/联赛按去重值计算再回填(日期 ~数千个, 联赛 ~数百个)
+        dates, date_inv = np.unique(cols["match_date"], return_inverse=True)
+        self.date_ord = np.array([_date_ordinal(str(d)) for d in dates], dtype=np.int32)[date_inv.reshape(-1)]
+        # 联赛名(去空白) → 整数 id, 联赛过滤/同联赛判定走 np.isin
+        leagues, league_inv = np.unique(np.char.strip(cols["league_name"]), return_inverse=True)
+        self.league_names: List[str] = [str(x) for x in leagues]
+        self.league_id = league_inv.reshape(-1).astype(np.int32)
+        self._league_ids = {name: i for i, name in enumerate(self.league_names)}
+
+        # 低赔方分侧的初盘低赔有序索引: (side_order[k], side_low_open[k]) 供 searchsorted 区间扫描
+        self.side_order: List[np.ndarray] = []
+        self.side_low_open: List[np.ndarray] = []
+        for k in range(len(_LOW_KEYS)):
+            members = np.flatnonzero(self.low_key == k)
+            order = members[np.argsort(self.low_open[members], kind="stable")]
+            self.side_order.append(order)
+            self.side_low_open.append(self.low_open[order])
+
+        for arr in (*vars(self).values(), *self.side_order, *self.side_low_open):
+            if isinstance(arr, np.ndarray):
+                arr.flags.writeable = False
+
+    def candidates(self, low_key: str, low_open: float, tolerance: float) -> np.ndarray:
+        """同侧 + 初盘低赔 ±tolerance 的候选下标(升序, 即池内顺序)。
+
+        区间两端多放 _RANGE_EPS 防浮点边界漏召, 精确 |Δ|≤tolerance 仍由调用方复核。
+        """
+        k = _LOW_KEYS.index(low_key)
+        values = self.side_low_open[k]
+        lo = np.searchsorted(values, low_open - tolerance - _RANGE_EPS, side="left")
+        hi = np.searchsorted(values, low_open + tolerance + _RANGE_EPS, side="right")
+        return np.sort(self.side_order[k][lo:hi])
+
+    def league_id_set(self, names) -> np.ndarray:
+        """联赛名集合 → 池内存在的 league id 数组(不在池内的名字忽略)。"""
+        return np.array([self._league_ids[n] for n in names if n in self._league_ids], dtype=np.int32)
+
+
+_pool_index_cache: Dict = {}  # pool_loader -> _PoolIndex
+_pool_index_lock = threading.Lock()
+
+
+def _get_pool_index(pool_loader) -> _PoolIndex:
+    """取 pool_loader 对应的列式索引; 池对象变化(重新加载)时重建。构建加锁, 并发只建一次。"""
+    pool = pool_loader()
+    index = _pool_index_cache.get(pool_loader)
+    if index is not None and index.pool is pool:
+        return index
+    with _pool_index_lock:
+        index = _pool_index_cache.get(pool_loader)
+        if index is None or index.pool is not pool:
+            index = _PoolIndex(pool)
+            _pool_index_cache[pool_loader] = index
+        return index
+
+
 def _find_similar(open_win, open_draw, open_loss, close_win, close_draw, close_loss,
                   tolerance: float, pool_loader, league: Optional[str] = None,
                   exclude_match_id: Optional[str] = None,
@@ -637,6 +1265,10 @@ def _find_similar(open_win, open_draw, open_loss, close_win, close_draw, close_l
       2) 亚盘分档并入: 初+终→0.3; 仅终→0.2; 仅初→0.15; 历史全缺→×0.95
       3) 软因子: 同联赛×1.12 × 时效衰减 × 终盘盘口接近; 封顶100
     排序: 按上述综合相似度降序(同联赛不再硬插队)。
+
+    候选先经 _PoolIndex.candidates 按低赔方+初盘低赔区间扫描(日本/同赛事/默认容差同走此路径),
+    其余过滤与打分在候选列上向量化完成(与逐场版 _blend_structural_sim /
+    _time_decay_rank / _hc_proximity_rank 口径一致), 仅命中场次由池内记录新建结果 dict。
     """
     input_low_key, input_low_open, input_low_close, input_direction = _get_low_odds_info(
         open_win, open_draw, open_loss, close_win, close_draw, close_loss
@@ -645,7 +1277,7 @@ def _find_similar(open_win, open_draw, open_loss, close_win, close_draw, close_l
         return {"query": {}, "matches": [], "stats": {}}
 
     low_label = LOW_LABEL[input_low_key]
-    pool = pool_loader()
+    index = _get_pool_index(pool_loader)
     league_norm = (league or "").strip()
     close_tol = tolerance if close_tolerance is None else close_tolerance
 
@@ -658,95 +1290,115 @@ def _find_similar(open_win, open_draw, open_loss, close_win, close_draw, close_l
     open_high_tol = _high_odds_tolerance(input_high_open, high_tolerance, high_tolerance_wide)
     close_high_tol = _high_odds_tolerance(input_high_close, high_tolerance, high_tolerance_wide)
 
-    matched = []
-    for m in pool:
-        # 剔除预测比赛自身
-        if exclude_match_id and m.get("match_id") == exclude_match_id:
-            continue
-        # 联赛硬过滤(日本模式等)
-        if league_filter is not None:
-            hist_lg = (m.get("league_name") or "").strip()
-            if hist_lg not in league_filter:
-                continue
-        hist_low_key, hist_low_open, hist_low_close, hist_direction = _get_low_odds_info(
-            m["open_win"], m["open_draw"], m["open_loss"],
-            m["close_win"], m["close_draw"], m["close_loss"],
-        )
-        if hist_low_key is None or hist_direction is None:
-            continue
-        # 同侧: 历史低赔方须与预测低赔方同一项(同为胜/平/负)
-        if hist_low_key != input_low_key:
-            continue
-        # 初盘低赔 ±tolerance
-        if abs(hist_low_open - input_low_open) > tolerance:
-            continue
-        # 终盘低赔 ±close_tol
-        if input_low_close is not None and hist_low_close is not None:
-            if abs(hist_low_close - input_low_close) > close_tol:
-                continue
-        # 高赔方: 初/终各自按赔率档位自适应; soft_high 时跳过硬过滤
-        hist_high_open = _side_high_odds(m["open_win"], m["open_loss"])
-        if hist_high_open is None:
-            continue
-        if not soft_high and abs(hist_high_open - input_high_open) > open_high_tol:
-            continue
-        hist_high_close = None
+    # 区间扫描: 同侧 + 初盘低赔 ±tolerance 走有序索引, 仅候选场次参与后续过滤与打分
+    cand = index.candidates(input_low_key, input_low_open, tolerance)
+    low_open = index.low_open[cand]
+    low_close = index.low_close[cand]
+    high_open = index.high_open[cand]
+    high_close = index.high_close[cand]
+
+    # 硬过滤: 初/终盘低赔 + 高赔 + 方向 + 联赛 + 剔除自身; 缺亚盘终盘不进弹窗/统计
+    mask = np.abs(low_open - input_low_open) <= tolerance
+    if input_low_close is not None:
+        mask &= np.abs(low_close - input_low_close) <= close_tol
+    if not soft_high:
+        mask &= np.abs(high_open - input_high_open) <= open_high_tol
         if input_high_close is not None:
-            hist_high_close = _side_high_odds(m["close_win"], m["close_loss"])
-            if hist_high_close is None:
-                continue
-            if not soft_high and abs(hist_high_close - input_high_close) > close_high_tol:
-                continue
-        # 初→终盘变动方向一致(预测场无真实变动时跳过此过滤)
-        if require_direction and hist_direction != input_direction:
-            continue
-
-        # 1) 欧赔结构: 低赔 + 高赔(过线后按容差归一打分)
-        sim_low_open = max(0.0, 1 - abs(hist_low_open - input_low_open) / tolerance) if tolerance > 0 else 0.0
-        if input_low_close is not None and hist_low_close is not None and close_tol > 0:
-            sim_low_close = max(0.0, 1 - abs(hist_low_close - input_low_close) / close_tol)
+            mask &= np.abs(high_close - input_high_close) <= close_high_tol
+    if require_direction:
+        if input_direction is None:
+            mask[:] = False
         else:
-            sim_low_close = 0.0
-        low_sim = (sim_low_open + sim_low_close) / 2
+            mask &= index.direction[cand] == _DIRECTION_CODES.index(input_direction)
+    if league_filter is not None:
+        mask &= np.isin(index.league_id[cand], index.league_id_set(league_filter))
+    if exclude_match_id:
+        mask &= index.match_ids[cand] != exclude_match_id
+    mask &= ~np.isnan(index.handicap[cand])
+
+    idx = cand[mask]
+    low_open = low_open[mask]
+    low_close = low_close[mask]
+    high_open = high_open[mask]
+    high_close = high_close[mask]
+    hist_hc = index.handicap[idx]
+
+    # 1) 欧赔结构: 低赔 + 高赔(过线后按容差归一打分)
+    if tolerance > 0:
+        sim_low_open = np.maximum(0.0, 1 - np.abs(low_open - input_low_open) / tolerance)
+    else:
+        sim_low_open = np.zeros(idx.size)
+    if input_low_close is not None and close_tol > 0:
+        sim_low_close = np.maximum(0.0, 1 - np.abs(low_close - input_low_close) / close_tol)
+    else:
+        sim_low_close = np.zeros(idx.size)
+    low_sim = (sim_low_open + sim_low_close) / 2
 
-        sim_high_open = max(0.0, 1 - abs(hist_high_open - input_high_open) / open_high_tol) if open_high_tol > 0 else 0.0
-        if input_high_close is not None and hist_high_close is not None and close_high_tol > 0:
-            sim_high_close = max(0.0, 1 - abs(hist_high_close - input_high_close) / close_high_tol)
-            high_sim = (sim_high_open + sim_high_close) / 2
-        else:
-            high_sim = sim_high_open
-        odds_sim = LOW_ODDS_SIM_WEIGHT * low_sim + HIGH_ODDS_SIM_WEIGHT * high_sim
-
-        # 2) 亚盘分档并入
-        structural = _blend_structural_sim(
-            odds_sim, m.get("open_handicap"), m.get("handicap"), ah_open, ah_close
-        )
-
-        # 3) 软因子: 同联赛 / 时效 / 终盘盘口接近 → 综合相似度(展示即排序键)
-        # 改名别名(瑞超/瑞典超等)亦计同联赛
-        hist_lg_name = (m.get("league_name") or "").strip()
-        same_league = bool(league_norm) and hist_lg_name in same_league_name_set(league_norm)
-        w_lg = LEAGUE_SOFT_BOOST if same_league else 1.0
-        w_time = _time_decay_rank(m.get("match_date"))
-        w_hc = _hc_proximity_rank(m.get("handicap"), ah_close)
-        similarity = round(min(100.0, structural * w_lg * w_time * w_hc * 100), 1)
-
-        m["similarity"] = similarity
-        m["hist_low_key"] = hist_low_key
-        m["hist_low_open"] = hist_low_open
-        m["hist_low_close"] = hist_low_close
-        m["hist_direction"] = hist_direction
-        m["same_league"] = same_league
+    if open_high_tol > 0:
+        sim_high_open = np.maximum(0.0, 1 - np.abs(high_open - input_high_open) / open_high_tol)
+    else:
+        sim_high_open = np.zeros(idx.size)
+    if input_high_close is not None and close_high_tol > 0:
+        sim_high_close = np.maximum(0.0, 1 - np.abs(high_close - input_high_close) / close_high_tol)
+        high_sim = (sim_high_open + sim_high_close) / 2
+    else:
+        high_sim = sim_high_open
+    odds_sim = LOW_ODDS_SIM_WEIGHT * low_sim + HIGH_ODDS_SIM_WEIGHT * high_sim
+
+    # 2) 亚盘分档并入(同 _blend_structural_sim)
+    if ah_open is None and ah_close is None:
+        structural = odds_sim
+    else:
+        nan = np.full(idx.size, np.nan)
+        s_ah_o = (np.maximum(0.0, 1.0 - np.abs(index.open_handicap[idx] - float(ah_open)) / AH_LINE_TOL)
+                  if ah_open is not None else nan)
+        s_ah_c = (np.maximum(0.0, 1.0 - np.abs(hist_hc - float(ah_close)) / AH_LINE_TOL)
+                  if ah_close is not None else nan)
+        has_o = ~np.isnan(s_ah_o)
+        has_c = ~np.isnan(s_ah_c)
+        structural = np.where(
+            has_o & has_c, 0.7 * odds_sim + 0.3 * ((s_ah_o + s_ah_c) / 2),
+            np.where(has_c, 0.8 * odds_sim + 0.2 * s_ah_c,
+                     np.where(has_o, 0.85 * odds_sim + 0.15 * s_ah_o, odds_sim * 0.95)))
+
+    # 3) 软因子: 同联赛 / 时效 / 终盘盘口接近 → 综合相似度(展示即排序键)
+    # 改名别名(瑞超/瑞典超等)亦计同联赛
+    if league_norm:
+        same_league = np.isin(index.league_id[idx], index.league_id_set(same_league_name_set(league_norm)))
+    else:
+        same_league = np.zeros(idx.size, dtype=bool)
+    w_lg = np.where(same_league, LEAGUE_SOFT_BOOST, 1.0)
+    date_ord = index.date_ord[idx]
+    age_years = (date.today().toordinal() - date_ord) / 365.25
+    w_time = np.where(date_ord < 0, 0.85,
+                      np.where(age_years <= 3, 1.0, np.where(age_years <= 6, 0.85, 0.7)))
+    if ah_close is None:
+        w_hc = np.full(idx.size, 0.6)
+    else:
+        delta = np.abs(hist_hc - float(ah_close))
+        w_hc = np.where(delta <= 0.25, 1.0,
+                        np.where(delta <= 0.5, 0.7, np.where(delta <= 1.0, 0.4, 0.2)))
+    raw_sim = structural * w_lg * w_time * w_hc * 100
+    # Python round(半偶, 十进制精确) 与 np.round 口径不同, 命中场次逐个取整
+    similarity = [round(min(100.0, float(v)), 1) for v in raw_sim]
+
+    # 综合相似度降序(稳定排序, 同分保持池内顺序)
+    # 每场结果为本次查询新建 dict, 不回写共享池(并发请求互不串结果)
+    order = sorted(range(idx.size), key=lambda k: -similarity[k])
+    matched = []
+    for k in order:
+        i = int(idx[k])
+        m = index.pool[i]._asdict()
+        m["similarity"] = similarity[k]
+        m["hist_low_key"] = _LOW_KEYS[index.low_key[i]]
+        m["hist_low_open"] = float(index.low_open[i])
+        m["hist_low_close"] = float(index.low_close[i])
+        m["hist_direction"] = _DIRECTION_CODES[index.direction[i]]
+        m["same_league"] = bool(same_league[k])
         m["home_team_cn"] = m["home_team"]
         m["away_team_cn"] = m["away_team"]
         matched.append(m)
 
-    # 综合相似度降序(同联赛/时效/盘口已并入 similarity)
-    matched.sort(key=lambda x: -x["similarity"])
-
-    # 缺亚盘终盘: 不进弹窗、不进盘路/胜平负统计(避免无盘样本稀释或用本场盘口硬填)
-    matched = [m for m in matched if m.get("handicap") is not None]
-
     stats = _calc_stats(matched)
 
     return {
@@ -823,6 +1475,14 @@ def find_similar_spf(open_win: float, open_draw: float, open_loss: float,
 
 
 if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ["rebuild-snapshot"]:
+        # 全量重建磁盘快照: python jczq_similar_odds.py rebuild-snapshot [spf|nspf]
+        _type = sys.argv[2] if len(sys.argv) > 2 else "spf"
+        print(f"{_type} 快照重建: {rebuild_pool_snapshot(_type)} 场 → {_snapshot_paths(_type)[0]}")
+        sys.exit(0)
+
     # 自检: jczq_1 的初/终盘
     print("=== 竞彩 nspf 同赔引擎自检 ===")
     res = find_similar_nspf(1.95, 3.15, 3.26, 2.15, 3.02, 3.00)
@@ -14,7 +14,7 @@ from typing import Any, Dict, List, Optional
 
 import pymysql
 
-import settings
+import db_pool
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,7 @@ H2H_LIMIT = 30
 
 
 def get_conn():
-    return pymysql.connect(**settings.MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    return db_pool.get_conn()
 
 
 # ---------- 亚盘结算 ----------
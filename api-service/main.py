@@ -4,7 +4,9 @@ import imghdr
 import json
 import logging
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from hashlib import sha1
 from pathlib import Path
@@ -27,7 +29,7 @@ from match_note_repository import MatchNoteRepository, NOTE_MAX_LEN
 from odds500_service import get_fid_for_match, fetch_all_indices, fetch_euro_history, fetch_asian_history, fetch_ou_history, fetch_match_data, get_match_squad_worth
 from predict_service import predict_match
 from auth import hash_password, verify_password, create_access_token, require_auth, get_current_user_id
-from settings import WECHAT_APPID, WECHAT_SECRET, WECHAT_API_URL
+from settings import WECHAT_APPID, WECHAT_SECRET, WECHAT_API_URL, PREDICT_FETCH_DEADLINE, PREDICT_FETCH_WORKERS
 import httpx
 
 # 先初始化 logger
@@ -310,6 +312,8 @@ async def startup_event():
     # 后台定时比分回填（每10分钟）：已开赛但缺比分的比赛从500.com拉取
     import threading as _th
     _th.Thread(target=_score_backfill_loop, daemon=True).start()
+    # 后台定时增量刷新历史同赔池（当日完赛/终盘回填并入池）
+    _th.Thread(target=_similar_pool_refresh_loop, daemon=True).start()
 
 
 def _score_backfill_loop():
@@ -347,16 +351,53 @@ def _score_backfill_loop():
         _t.sleep(interval)
 
 
+def _similar_pool_refresh_loop():
+    """后台线程：按水位增量刷新历史同赔池（仅重查变更场次，新池+索引原子替换）"""
+    import time as _t
+    from settings import SIMILAR_POOL_REFRESH_SECONDS
+    from jczq_similar_odds import get_spf_pool, refresh_pools
+
+    logger.info("[同赔池刷新] 后台线程启动")
+    try:
+        get_spf_pool()  # 启动预热: 有磁盘快照则直接 mmap, 随后首轮增量刷新追平快照后的变更
+    except Exception as e:
+        logger.warning(f"[同赔池刷新] 预热失败: {e}")
+    while True:
+        try:
+            changed = refresh_pools()
+            if any(changed.values()):
+                logger.info(f"[同赔池刷新] 变更场次 {changed}")
+        except Exception as e:
+            logger.warning(f"[同赔池刷新] 循环异常: {e}")
+        _t.sleep(SIMILAR_POOL_REFRESH_SECONDS)
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """关闭事件（无需关闭调度器）"""
     # shutdown_scheduler()
-    pass
+    import db_pool
+    from odds500_service import close_http_clients
+    pool = db_pool.get_pool()
+    if pool is not None:
+        pool.close_idle()
+    await close_http_clients()
 
 
 @app.get("/api/health")
 def health_check():
-    return {"status": "ok", "sync": fetch_sync_status()}
+    import ai_factor_cache
+    import db_pool
+    import odds500_cache
+    from odds500_service import http_stats
+    return {
+        "status": "ok",
+        "sync": fetch_sync_status(),
+        "dbPool": db_pool.stats(),
+        "odds500Http": http_stats(),
+        "odds500PageCache": odds500_cache.stats(),
+        "aiFactorCache": ai_factor_cache.stats(),
+    }
 
 
 def verify_wechat_signature(raw_data: str, session_key: str, signature: str) -> bool:
@@ -1296,12 +1337,15 @@ def batch_similar(
 
     status=not_started(在售) 或 finished(已结束, 回测视角)。
     仅 F6(纯历史同赔,无 AI 调用);池(45038场)进程内缓存,~20场 <1s。
+    整体结果按 (date, status)+数据版本缓存(batch_similar_cache), 数据不变的重复访问直接命中。
     在售/已结束均返回 ahHandicap(亚盘仅 Bet365,缺则无亚盘); 已结束额外返回
     actualScore/actualResult/actualAh/hit, 供对比 F6 方向与实际盘路(回测)。
     """
     import time as _time
-    from predict_service import calc_factor_jczq_similar_odds
-    from jczq_similar_odds import get_match_spf_odds, _ah_outcome, _get_low_odds_info
+    import settings as _settings
+    import batch_similar_cache
+    from predict_service import calc_factor_jczq_similar_odds_many
+    from jczq_similar_odds import get_matches_spf_odds, _ah_outcome, _get_low_odds_info
 
     if not date:
         date = _time.strftime("%Y-%m-%d", _time.localtime())
@@ -1333,6 +1377,10 @@ def batch_similar(
         cur = conn.cursor()
         cur.execute(f"SELECT * FROM matches {where_clause} {order}", params)
         rows = cur.fetchall()
+        cached = batch_similar_cache.get(
+            date, status, batch_similar_cache.data_version(cur, [r["match_id"] for r in rows]))
+        if cached is not None:
+            return cached
         # 批量取本场亚盘初/终(标准约定: 负=主让)
         # 强制 Bet365 系(company LIKE 'Bet365%'); 不用澳门/matches.asian_handicap 兜底
         ah_map = {}  # mid -> {"open": float|None, "close": float|None}
@@ -1469,6 +1517,24 @@ def batch_similar(
 
     match_ids = [r["match_id"] for r in rows]
     odds_map = repo.fetch_wdl_for_matches(match_ids) if match_ids else {}
+    spf_map = get_matches_spf_odds(match_ids) if match_ids else {}
+
+    # F6 历史同赔: 有 spf 的场次一次算完(BATCH_SIMILAR_WORKERS>1 时进程池并行, 按序返回)
+    f6_tasks = []
+    for row in rows:
+        spf = spf_map.get(row["match_id"])
+        if not spf:
+            continue
+        ah = ah_map.get(row["match_id"]) or {}
+        f6_tasks.append({
+            "jczq_company": spf,
+            "league": row.get("league_name"),
+            "exclude_match_id": row["match_id"],
+            "ah_handicap": ah.get("close"),
+            "ah_open": ah.get("open"),
+        })
+    f6_results = calc_factor_jczq_similar_odds_many(f6_tasks, workers=_settings.BATCH_SIMILAR_WORKERS)
+    f6_map = {t["exclude_match_id"]: r for t, r in zip(f6_tasks, f6_results)}
 
     items = []
     for row in rows:
@@ -1490,12 +1556,10 @@ def batch_similar(
         item["ahHandicapClose"] = ahc
 
         # F6 历史同赔
-        spf = get_match_spf_odds(mid)
+        spf = spf_map.get(mid)
         has_move = bool(spf and spf["initial"] != spf["current"])
         if spf:
-            f6 = calc_factor_jczq_similar_odds(
-                spf, league=item.get("league"), exclude_match_id=mid,
-                ah_handicap=ahc, ah_open=ah_open)
+            f6 = f6_map[mid]
         else:
             f6 = {"name": "历史同赔", "direction": "neutral", "score": 5,
                   "reason": "无竞彩spf赔率，无法匹配历史同赔", "details": [], "matches": [],
@@ -1553,7 +1617,21 @@ def batch_similar(
         summary["single"] = _hit_bucket(lambda it: bool(it.get("isSingle")))
         summary["nonSingle"] = _hit_bucket(lambda it: not bool(it.get("isSingle")))
         summary["singleCount"] = sum(1 for it in items if it.get("isSingle"))
-    return {"date": date, "status": status, "summary": summary, "items": items}
+    result = {"date": date, "status": status, "summary": summary, "items": items}
+    # 有 spf 的场仍缺 Bet365 亚盘(500.com 不可达/未开盘)时不入缓存: 版本不变就会一直
+    # 命中缺亚盘的结果, 懒回填不再重试
+    missing_ah = sum(1 for it in items if it.get("spf") and it.get("ahHandicapClose") is None)
+    if missing_ah:
+        logger.info(f"批量同赔 {missing_ah} 场缺亚盘, 本次结果不缓存 date={date}")
+        return result
+    # 算完后重取版本入缓存: 亚盘懒回填等本次写回已计入, 下次同数据请求直接命中
+    try:
+        with get_db() as conn:
+            version = batch_similar_cache.data_version(conn.cursor(), match_ids)
+        batch_similar_cache.put(date, status, version, result)
+    except Exception as e:
+        logger.warning(f"批量同赔缓存写入失败 date={date}: {e}")
+    return result
 
 
 
@@ -1598,6 +1676,40 @@ def list_predict_dates(
     return {"dates": dates}
 
 
+# 预测抓取共用线程池(进程级、有界): 超时被放弃的任务仍占线程直到其 HTTP 超时, 按请求建池会随并发累积线程
+_predict_fetch_executor = ThreadPoolExecutor(max_workers=PREDICT_FETCH_WORKERS, thread_name_prefix="predict-fetch")
+
+
+class _FetchStage:
+    """预测抓取阶段: 任务陆续提交到共用线程池并发执行, collect() 按同一截止时间收集。
+
+    超时未完成的任务直接放弃(未开始的取消, 已在跑的在各自 HTTP 超时后自行结束),
+    结果里缺该项, 下游按缺数据处理。
+    """
+
+    def __init__(self, deadline_seconds: float):
+        self._deadline = time.monotonic() + deadline_seconds
+        self._futures: Dict[str, Any] = {}
+
+    def submit(self, name: str, fn, *args) -> None:
+        self._futures[name] = _predict_fetch_executor.submit(fn, *args)
+
+    def collect(self) -> Dict[str, Any]:
+        remaining = max(0.0, self._deadline - time.monotonic())
+        done, _ = wait(list(self._futures.values()), timeout=remaining)
+        results: Dict[str, Any] = {}
+        for name, fut in self._futures.items():
+            if fut not in done:
+                fut.cancel()
+                logger.warning(f"[predict] 抓取 {name} 超过截止时间, 跳过")
+                continue
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                logger.warning(f"[predict] 抓取 {name} 失败: {e}")
+        return results
+
+
 @app.post("/api/predict/{match_id}")
 def predict_match_direction(match_id: str, req: PredictRequest = None):
     """对指定比赛进行亚盘方向预测"""
@@ -1633,10 +1745,14 @@ def predict_match_direction(match_id: str, req: PredictRequest = None):
     if req and req.market_heat:
         match_info["market_heat_desc"] = req.market_heat
 
+    # 抓取阶段: DB 读(本场 spf 初终盘)先发, fid 解析后再并发发 500 三个页面,
+    # 统一截止时间, 总耗时≈最慢一项而非各项之和
+    from jczq_similar_odds import get_match_spf_odds
+    from odds500_service import fetch_asian_handicap, fetch_european_odds
+    stage = _FetchStage(PREDICT_FETCH_DEADLINE)
+    stage.submit("spf", get_match_spf_odds, match_id)
+
     # 获取500.com的fid，用于拉取基本面和亚盘/欧赔数据
-    match_data = None
-    asian_data = None
-    euro_data = None
     fid = None
 
     # 优先使用数据库已存储的 fid_500
@@ -1662,8 +1778,16 @@ def predict_match_direction(match_id: str, req: PredictRequest = None):
                         pass
 
     if fid:
+        stage.submit("shuju", fetch_match_data, fid)
+        stage.submit("yazhi", fetch_asian_handicap, fid)
+        stage.submit("ouzhi", fetch_european_odds, fid)
+    fetched = stage.collect()
+    match_data = fetched.get("shuju")
+    asian_data = fetched.get("yazhi")
+    euro_data = fetched.get("ouzhi")
+
+    if match_data:
         try:
-            match_data = fetch_match_data(fid)
             # 用500.com页面抓取的实时排名补充/覆盖DB排名
             if match_data.get("homeRank"):
                 match_info["home_rank"] = match_data["homeRank"]
@@ -1684,16 +1808,7 @@ def predict_match_direction(match_id: str, req: PredictRequest = None):
             except Exception as e:
                 logger.warning(f"沉淀500球队身份失败: {e}")
         except Exception as e:
-            logger.warning(f"获取基本面数据失败: {e}")
-        try:
-            from odds500_service import fetch_asian_handicap, fetch_european_odds
-            asian_data = fetch_asian_handicap(fid)
-        except Exception as e:
-            logger.warning(f"获取亚盘数据失败: {e}")
-        try:
-            euro_data = fetch_european_odds(fid)
-        except Exception as e:
-            logger.warning(f"获取欧赔数据失败: {e}")
+            logger.warning(f"处理基本面数据失败: {e}")
 
     # 优先使用500.com亚盘的真实盘口值（比竞彩hhad的整数盘口更精确）
     # 500.com: 正值=主队让球, 负值=客队让球(受让)
@@ -1744,7 +1859,8 @@ def predict_match_direction(match_id: str, req: PredictRequest = None):
             logger.warning(f"比分回填失败: {e}")
 
     try:
-        result = predict_match(match_info, match_data=match_data, asian_data=asian_data, euro_data=euro_data)
+        result = predict_match(match_info, match_data=match_data, asian_data=asian_data, euro_data=euro_data,
+                               jczq_company_spf=fetched.get("spf"))
         match_formatted = format_match(match)
         # 返回实际使用的亚盘盘口值
         if match_info.get("handicap") is not None:
@@ -2254,33 +2370,40 @@ def list_match_results(
 
 
 @app.get("/api/match-results/live")
-def get_live_scores():
+async def get_live_scores():
     """获取正在进行中的比赛实时比分（轮询用，30秒缓存）
 
     先从500.com列表页取比分（已完赛的直接返回）；
     列表页显示"VS"（进行中）的，通过详情页抓取实时比分。
+    各日列表页、各场详情页用 AsyncClient 并发抓取(同时最多 LIVE_SCORE_CONCURRENCY 个)。
     """
+    import asyncio
     import time as _time
     from collections import defaultdict
     from database import get_db as _get_db
-    from odds500_service import _load_jczq_list, _score_cache as _live_cache, _fid_cache, fetch_live_score_from_fid
+    from http_client import gather_limited
+    from odds500_service import load_jczq_list_async, _list_cache, fetch_live_score_from_fid_async
     from repository import derive_sale_date
+    from settings import LIVE_SCORE_CONCURRENCY
 
     now = int(_time.time())
 
-    with _get_db() as conn:
-        cur = conn.cursor()
-        # 开赛3h内且无比分 → 进行中
-        cur.execute(
-            """SELECT * FROM matches
-               WHERE match_timestamp IS NOT NULL
-                 AND match_timestamp <= %s
-                 AND match_timestamp >= %s - 10800
-                 AND home_score IS NULL
-               ORDER BY match_timestamp ASC""",
-            (now, now),
-        )
-        rows = cur.fetchall()
+    def _query_live_rows():
+        with _get_db() as conn:
+            cur = conn.cursor()
+            # 开赛3h内且无比分 → 进行中
+            cur.execute(
+                """SELECT * FROM matches
+                   WHERE match_timestamp IS NOT NULL
+                     AND match_timestamp <= %s
+                     AND match_timestamp >= %s - 10800
+                     AND home_score IS NULL
+                   ORDER BY match_timestamp ASC""",
+                (now, now),
+            )
+            return cur.fetchall()
+
+    rows = await asyncio.to_thread(_query_live_rows)
 
     if not rows:
         return {"items": []}
@@ -2292,60 +2415,61 @@ def get_live_scores():
         if sd:
             by_date[sd].append(r)
 
-    items = []
-    for sale_date, matches in by_date.items():
-        # 清缓存，强制拉取最新列表页
-        _live_cache.clear()
-        try:
-            _load_jczq_list(sale_date)
-        except Exception as e:
-            logger.warning(f"[live] 获取{sale_date}列表页失败: {e}")
+    # 各售卖日列表页并发拉取(比分超过 ODDS500_SCORE_TTL 才重新下载, 同日并发请求共享一次下载)
+    sale_dates = list(by_date)
+    loaded = await gather_limited([load_jczq_list_async(sd) for sd in sale_dates], LIVE_SCORE_CONCURRENCY)
+
+    # (match, score) 按原顺序; score 为 None 的待详情页补
+    resolved: List[tuple] = []
+    pending: List[tuple] = []  # (resolved 下标, fid)
+    for sale_date, result in zip(sale_dates, loaded):
+        if isinstance(result, Exception):
+            logger.warning(f"[live] 获取{sale_date}列表页失败: {result}")
             continue
 
-        for m in matches:
+        for m in by_date[sale_date]:
             code = m.get("match_code", "").strip()
             if not code:
                 continue
-            key = f"{sale_date}:{code}"
-            score = _live_cache.get(key)
+            _, score = _list_cache.score(sale_date, code)
             if score:
                 # 列表页已有比分（已完赛）
-                ts = m.get("match_timestamp")
-                minute = (now - ts) // 60 if ts else 0
-                items.append({
-                    "matchId": m["match_id"],
-                    "league": m.get("league_name"),
-                    "homeTeam": m.get("home_team_name"),
-                    "awayTeam": m.get("away_team_name"),
-                    "homeScore": score[0],
-                    "awayScore": score[1],
-                    "minute": min(max(minute, 0), 120),
-                })
-            else:
-                # 列表页无比分（进行中），从详情页拉取实时比分
-                fid = _fid_cache.get(key)
-                if not fid:
-                    # 尝试从DB获取
-                    fid = m.get("fid_500")
-                if not fid:
-                    continue
-                try:
-                    live_score = fetch_live_score_from_fid(fid)
-                except Exception as e:
-                    logger.warning(f"[live] 获取详情页比分失败 fid={fid}: {e}")
-                    continue
-                if live_score:
-                    ts = m.get("match_timestamp")
-                    minute = (now - ts) // 60 if ts else 0
-                    items.append({
-                        "matchId": m["match_id"],
-                        "league": m.get("league_name"),
-                        "homeTeam": m.get("home_team_name"),
-                        "awayTeam": m.get("away_team_name"),
-                        "homeScore": live_score[0],
-                        "awayScore": live_score[1],
-                        "minute": min(max(minute, 0), 120),
-                    })
+                resolved.append((m, score))
+                continue
+            # 列表页无比分（进行中），从详情页拉取实时比分
+            fid = _list_cache.fid(sale_date, code)
+            if not fid:
+                # 尝试从DB获取
+                fid = m.get("fid_500")
+            if not fid:
+                continue
+            pending.append((len(resolved), fid))
+            resolved.append((m, None))
+
+    live_scores = await gather_limited(
+        [fetch_live_score_from_fid_async(fid) for _, fid in pending], LIVE_SCORE_CONCURRENCY
+    )
+    for (idx, fid), live_score in zip(pending, live_scores):
+        if isinstance(live_score, Exception):
+            logger.warning(f"[live] 获取详情页比分失败 fid={fid}: {live_score}")
+            continue
+        resolved[idx] = (resolved[idx][0], live_score)
+
+    items = []
+    for m, score in resolved:
+        if not score:
+            continue
+        ts = m.get("match_timestamp")
+        minute = (now - ts) // 60 if ts else 0
+        items.append({
+            "matchId": m["match_id"],
+            "league": m.get("league_name"),
+            "homeTeam": m.get("home_team_name"),
+            "awayTeam": m.get("away_team_name"),
+            "homeScore": score[0],
+            "awayScore": score[1],
+            "minute": min(max(minute, 0), 120),
+        })
 
     return {"items": items}
 
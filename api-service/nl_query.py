@@ -18,7 +18,6 @@ import os
 from pathlib import Path
 from typing import Optional, Tuple
 
-import pymysql
 import requests
 from dotenv import load_dotenv
 
@@ -278,7 +277,8 @@ def parse_response(raw: str) -> Tuple[str, str]:
 
 
 def execute_mysql(sql: str):
-    conn = pymysql.connect(**MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+    from db_pool import get_conn
+    conn = get_conn()
     try:
         with conn.cursor() as cursor:
             cursor.execute(sql)
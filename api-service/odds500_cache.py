@@ -0,0 +1,174 @@
+"""500.com 按 fid 的解析结果缓存(亚盘/欧赔/大小球/基本面)
+
+同一场比赛被 predict、指数页、同赔反复打开时, 原先每次都重新下载并用 BeautifulSoup
+解析整页; 完场比赛的页面不再变化。这里在 fetch_* 之前加一层:
+
+  - 进程内 LRU(ODDS500_PAGE_CACHE_SIZE 条, 0 关闭), 每条带过期时间
+  - TTL 按比赛状态: 完场(有比分或开赛超过 3h) ODDS500_PAGE_CACHE_TTL_FINISHED,
+    售卖中/进行中/查不到对应场次 ODDS500_PAGE_CACHE_TTL_LIVE
+  - 可选 MySQL 层(odds500_page_cache 表, ODDS500_PAGE_CACHE_DB=1): 只存完场结果,
+    重启/多 worker 共享
+  - stats(): 命中/库命中/未命中/写入/过期计数
+
+状态在写入时按 matches.fid_500 查一次; 缓存层的任何数据库错误只记日志, 不影响抓取。
+返回值是深拷贝, 调用方可随意修改。
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+# 开赛超过该秒数视为完场(与 /api/match-results/live 的 3h 窗口一致)
+FINISHED_AFTER_SECONDS = 3 * 3600
+
+_lock = threading.Lock()
+# (kind, fid) -> (expires_at, value); 尾部最近使用
+_entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+_stats = {"hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+
+def _fid_finished(fid: str) -> Optional[bool]:
+    """fid 对应场次是否完场; matches 里查不到返回 None。"""
+    from db_pool import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT home_score, match_timestamp FROM matches WHERE fid_500 = %s LIMIT 1",
+                (str(fid),),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    ts = row.get("match_timestamp")
+    return row.get("home_score") is not None or bool(ts and ts < time.time() - FINISHED_AFTER_SECONDS)
+
+
+def _db_get(kind: str, fid: str) -> Optional[Any]:
+    from db_pool import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT payload FROM odds500_page_cache WHERE kind = %s AND fid = %s AND expires_at > NOW()",
+                (kind, str(fid)),
+            )
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    return json.loads(row["payload"]) if row else None
+
+
+def _db_put(kind: str, fid: str, value: Any, ttl: float) -> None:
+    from db_pool import get_conn
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """INSERT INTO odds500_page_cache (kind, fid, payload, expires_at)
+                   VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+                   ON DUPLICATE KEY UPDATE payload = VALUES(payload), expires_at = VALUES(expires_at)""",
+                (kind, str(fid), json.dumps(value, ensure_ascii=False), int(ttl)),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _remember(key: Tuple[str, str], expires_at: float, value: Any) -> None:
+    """写入 LRU 并按容量淘汰最久未用; 调用方持锁。"""
+    _entries[key] = (expires_at, value)
+    _entries.move_to_end(key)
+    while len(_entries) > settings.ODDS500_PAGE_CACHE_SIZE:
+        _entries.popitem(last=False)
+
+
+def get(kind: str, fid: str) -> Optional[Any]:
+    """命中返回缓存结果(深拷贝), 否则 None。"""
+    if settings.ODDS500_PAGE_CACHE_SIZE <= 0 or not fid:
+        return None
+    key = (kind, str(fid))
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                return copy.deepcopy(entry[1])
+            del _entries[key]
+            _stats["expired"] += 1
+
+    if settings.ODDS500_PAGE_CACHE_DB:
+        try:
+            value = _db_get(kind, fid)
+        except Exception as e:
+            logger.warning(f"500 页面缓存读库失败 {kind} fid={fid}: {e}")
+            value = None
+        if value is not None:
+            with _lock:
+                # 库里只有完场结果, 按完场 TTL 回填内存
+                _remember(key, now + settings.ODDS500_PAGE_CACHE_TTL_FINISHED, value)
+                _stats["db_hits"] += 1
+            return copy.deepcopy(value)
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(kind: str, fid: str, value: Any) -> None:
+    if settings.ODDS500_PAGE_CACHE_SIZE <= 0 or not fid:
+        return
+    try:
+        finished = _fid_finished(fid)
+    except Exception as e:
+        logger.warning(f"500 页面缓存查比赛状态失败 fid={fid}: {e}")
+        finished = None
+    ttl = settings.ODDS500_PAGE_CACHE_TTL_FINISHED if finished else settings.ODDS500_PAGE_CACHE_TTL_LIVE
+    if ttl <= 0:
+        return
+    value = copy.deepcopy(value)
+    with _lock:
+        _remember((kind, str(fid)), time.time() + ttl, value)
+        _stats["stores"] += 1
+
+    if finished and settings.ODDS500_PAGE_CACHE_DB:
+        try:
+            _db_put(kind, fid, value, ttl)
+        except Exception as e:
+            logger.warning(f"500 页面缓存写库失败 {kind} fid={fid}: {e}")
+
+
+def cached(kind: str, fid: str, loader: Callable[[], Any], valid: Callable[[Any], bool]) -> Any:
+    """先查缓存, 未命中调 loader(); valid(结果) 为真才写入(抓取失败的空结果不缓存)。"""
+    value = get(kind, fid)
+    if value is not None:
+        return value
+    value = loader()
+    if valid(value):
+        put(kind, fid, value)
+    return value
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "size": len(_entries)}
@@ -7,16 +7,25 @@
   - 亚盘 HTML 页面: odds.500.com/fenxi/yazhi-{fid}.shtml
   - 大小球 HTML 页面: odds.500.com/fenxi/daxiao-{fid}.shtml
   - 竞彩列表页: odds.500.com/yazhi_jczq_{YYYY-MM-DD}.shtml (用于 match_number → fid 映射)
+
+欧赔/亚盘/大小球/基本面解析结果按 fid 缓存(odds500_cache, TTL 随完场与否)。
+列表页/欧赔/亚盘/大小球/基本面/实时比分另有 *_async 协程版(文件末尾), 供 async 端点
+用 gather_limited 并发几十个 fid 而不占线程池; 请求走 AsyncClient, 解析放 to_thread。
 """
 
+import asyncio
 import logging
 import re
 import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+import odds500_cache
+import settings
+from http_client import AsyncManagedClient, ManagedClient
+from jczq_list_cache import JczqListCache, ListPage
 
 logger = logging.getLogger(__name__)
 
@@ -84,8 +93,47 @@ HANDICAP_MAP = {
     "两球半/三": 2.75, "两球半/三球": 2.75, "三球": 3.0,
 }
 
-# FID 缓存: match_number -> fid
-_fid_cache: Dict[str, str] = {}
+# 共享 HTTP 客户端: 所有 500.com 请求复用连接(keep-alive), 每主机并发上限 + 重试退避
+_HTTP_OPTIONS = dict(
+    headers=HEADERS,
+    timeout=15,
+    max_connections=settings.ODDS500_HTTP_MAX_CONNECTIONS,
+    max_keepalive=settings.ODDS500_HTTP_MAX_KEEPALIVE,
+    http2=settings.ODDS500_HTTP2,
+    per_host=settings.ODDS500_HTTP_PER_HOST,
+    retries=settings.ODDS500_HTTP_RETRIES,
+)
+_http = ManagedClient(**_HTTP_OPTIONS)
+# 异步孪生: 同参数, 在 FastAPI 事件循环上懒创建
+_ahttp = AsyncManagedClient(**_HTTP_OPTIONS)
+
+
+def _resolve_html_parser(name: str) -> str:
+    """BeautifulSoup 解析后端: html.parser(纯 Python) 或 lxml(C 实现, 快数倍); lxml 未安装时降级。"""
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            logger.warning("ODDS500_HTML_PARSER=lxml 需要 lxml 包(pip install lxml), 降级 html.parser")
+            return "html.parser"
+    return name
+
+
+HTML_PARSER = _resolve_html_parser(settings.ODDS500_HTML_PARSER)
+
+
+# 只建需要的子树: 指数页只用 table#datatb, 列表页只用带 data-fid 的行
+_DATATB_ONLY = SoupStrainer("table", id="datatb")
+_FID_ROWS_ONLY = SoupStrainer("tr", attrs={"data-fid": True})
+
+
+def _soup(markup: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    return BeautifulSoup(markup, HTML_PARSER, parse_only=parse_only)
+
+
+def http_stats() -> Dict[str, Any]:
+    """500.com 共享客户端的连接池/请求统计(监控用)。"""
+    return {**_http.stats(), "async": _ahttp.stats(), "listCache": _list_cache.stats()}
 
 
 def _identify_company(raw_name: str) -> str:
@@ -140,40 +188,87 @@ def _clean_handicap(text: str) -> str:
     return text.strip().replace("升", "").replace("降", "")
 
 
-# 竞彩列表页比分缓存: {match_date:match_number} -> (home_score, away_score) 或 None
-_score_cache: Dict[str, Optional[tuple]] = {}
+# 竞彩列表页缓存: 按售卖日存 场次号 -> fid / (home_score, away_score) 或 None
+_list_cache = JczqListCache(
+    max_dates=settings.ODDS500_LIST_CACHE_DATES,
+    fid_ttl=settings.ODDS500_FID_TTL,
+    score_ttl=settings.ODDS500_SCORE_TTL,
+)
 
 
 def clear_score_cache() -> None:
-    """清空比分缓存，确保下次 fetch_match_score 重新从 500.com 拉取最新数据"""
-    _score_cache.clear()
+    """让已缓存比分过期，确保下次 fetch_match_score 重新从 500.com 拉取最新数据(fid 映射保留)"""
+    _list_cache.invalidate_scores()
+
+
+def _load_jczq_list(match_date: str, max_age: Optional[float] = None) -> None:
+    """确保竞彩亚盘列表页在 max_age 秒内加载过(默认比分 TTL)，缓存该日所有比赛的 fid 和比分"""
+    _list_cache.load(match_date, _fetch_jczq_list, max_age)
 
 
-def _load_jczq_list(match_date: str) -> None:
-    """抓取竞彩亚盘列表页，缓存该日所有比赛的 fid 和比分"""
+def _fetch_jczq_list(match_date: str) -> Optional[ListPage]:
     url = f"{BASE_URL}/yazhi_jczq_{match_date}.shtml"
-    with httpx.Client(timeout=15, headers=HEADERS) as client:
-        resp = client.get(url)
-        if resp.status_code != 200:
-            logger.warning(f"获取竞彩列表失败: {resp.status_code}")
-            return
+    resp = _http.get(url)
+    if resp.status_code != 200:
+        logger.warning(f"获取竞彩列表失败: {resp.status_code}")
+        return None
 
-    content = resp.content.decode("gbk", errors="replace")
-    soup = BeautifulSoup(content, "html.parser")
+    page = _parse_jczq_list(resp.content.decode("gbk", errors="replace"))
+    _save_fid_map(match_date, page[0])
+    return page
+
+
+def _save_fid_map(match_date: str, fids: Dict[str, str]) -> None:
+    """列表页整页 fid 落库(fid_map_500), 冷启动进程一次查询即可反查; 失败只记日志。"""
+    if not fids:
+        return
+    from db_pool import get_conn
+    from repository import save_fid_map_500
+
+    try:
+        conn = get_conn()
+        try:
+            save_fid_map_500(conn, match_date, fids)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"fid 映射落库失败 date={match_date}: {e}")
+
+
+def _lookup_fid_map(match_number: str, dates: List[str]) -> Optional[str]:
+    from db_pool import get_conn
+    from repository import find_fid_map_500
+
+    try:
+        conn = get_conn()
+        try:
+            return find_fid_map_500(conn, match_number, dates)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"fid 映射查询失败 {match_number}: {e}")
+        return None
+
+
+def _parse_jczq_list(content: str) -> ListPage:
+    """解析竞彩列表页 -> ({场次号: fid}, {场次号: 比分或 None})"""
+    soup = _soup(content, _FID_ROWS_ONLY)
+    fids: Dict[str, str] = {}
+    scores: Dict[str, Optional[tuple]] = {}
 
     for tr in soup.find_all("tr", attrs={"data-fid": True}):
         tds = tr.find_all("td")
         if len(tds) < 7:
             continue
         num = tds[0].get_text(strip=True)
-        fid = tr["data-fid"]
-        key = f"{match_date}:{num}"
-        _fid_cache[key] = fid
+        fids[num] = tr["data-fid"]
 
         # 比分在 td[5]，格式 "1:2"；未开赛为空或"-"
         score_text = tds[5].get_text(strip=True)
-        score = _parse_score(score_text)
-        _score_cache[key] = score
+        scores[num] = _parse_score(score_text)
+
+    return fids, scores
 
 
 def _parse_score(text: str) -> Optional[tuple]:
@@ -205,60 +300,71 @@ def fetch_live_score_from_fid(fid: str) -> Optional[tuple]:
     """
     url = f"{BASE_URL}/fenxi/yazhi-{fid}.shtml"
     try:
-        with httpx.Client(timeout=15, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = _http.get(url)
         if resp.status_code != 200:
             logger.warning(f"获取比赛详情页失败 fid={fid}: HTTP {resp.status_code}")
             return None
-        content = resp.content.decode("gbk", errors="replace")
-        soup = BeautifulSoup(content, "html.parser")
-        p = soup.find("p", class_="odds_hd_bf")
-        if p:
-            score_text = p.get_text(strip=True)
-            score = _parse_score(score_text)
-            if score:
-                return score
-        # 兜底：从 odds_hd_cont 中提取比分
-        div = soup.find("div", class_="odds_hd_cont")
-        if div:
-            text = div.get_text(strip=True)
-            # 格式: "主队名...比赛时间...比分...客队名"
-            import re
-            for m in re.finditer(r'(\d+):(\d+)', text):
-                score = _parse_score(m.group(0))
-                if score:
-                    return score
-        return None
+        return _parse_live_score(resp.content.decode("gbk", errors="replace"))
     except Exception as e:
         logger.warning(f"获取实时比分失败 fid={fid}: {e}")
         return None
 
 
+def _parse_live_score(content: str) -> Optional[tuple]:
+    """从比赛详情页 HTML 提取比分, 无则 None"""
+    soup = _soup(content)
+    p = soup.find("p", class_="odds_hd_bf")
+    if p:
+        score_text = p.get_text(strip=True)
+        score = _parse_score(score_text)
+        if score:
+            return score
+    # 兜底：从 odds_hd_cont 中提取比分
+    div = soup.find("div", class_="odds_hd_cont")
+    if div:
+        text = div.get_text(strip=True)
+        # 格式: "主队名...比赛时间...比分...客队名"
+        for m in re.finditer(r'(\d+):(\d+)', text):
+            score = _parse_score(m.group(0))
+            if score:
+                return score
+    return None
+
+
 def get_fid_for_match(match_date: str, match_number: str) -> Optional[str]:
     """通过竞彩列表页获取 500.com fixture ID
 
     500.com 按售卖窗口起始日期组织列表页，一个窗口可能包含未来数天的比赛，
     因此售卖日期和比赛实际日期可能差数天。找不到时向前搜索最多5天。
+    查找顺序: 进程内列表页缓存 → fid_map_500 表(一次查询覆盖全部候选日期) → 下载列表页。
     """
-    cache_key = f"{match_date}:{match_number}"
-    if cache_key in _fid_cache:
-        return _fid_cache[cache_key]
+    fid = _list_cache.fid(match_date, match_number)
+    if fid:
+        return fid
 
     try:
-        _load_jczq_list(match_date)
-        if cache_key in _fid_cache:
-            return _fid_cache[cache_key]
-
         from datetime import datetime, timedelta
         base = datetime.strptime(match_date, "%Y-%m-%d")
-        for delta in [-1, -2, -3, -4, -5, 1, 2]:
-            alt_date = (base + timedelta(days=delta)).strftime("%Y-%m-%d")
-            alt_key = f"{alt_date}:{match_number}"
-            if alt_key in _fid_cache:
-                return _fid_cache[alt_key]
+        alt_dates = [(base + timedelta(days=delta)).strftime("%Y-%m-%d") for delta in [-1, -2, -3, -4, -5, 1, 2]]
+
+        # 先查 fid_map_500(以前解析过的列表页), 命中则不下载
+        fid = _lookup_fid_map(match_number, [match_date, *alt_dates])
+        if fid:
+            return fid
+
+        _load_jczq_list(match_date)
+        fid = _list_cache.fid(match_date, match_number)
+        if fid:
+            return fid
+
+        for alt_date in alt_dates:
+            fid = _list_cache.fid(alt_date, match_number)
+            if fid:
+                return fid
             _load_jczq_list(alt_date)
-            if alt_key in _fid_cache:
-                return _fid_cache[alt_key]
+            fid = _list_cache.fid(alt_date, match_number)
+            if fid:
+                return fid
 
         return None
     except Exception as e:
@@ -271,25 +377,27 @@ def fetch_match_score(match_date: str, match_number: str) -> Optional[tuple]:
 
     竞彩期号日期和比赛开赛日期可能差1天，找不到时自动尝试前后一天。
     """
-    cache_key = f"{match_date}:{match_number}"
-    if cache_key in _score_cache:
-        return _score_cache[cache_key]
+    found, score = _list_cache.score(match_date, match_number)
+    if found:
+        return score
 
     try:
         _load_jczq_list(match_date)
-        if cache_key in _score_cache:
-            return _score_cache[cache_key]
+        found, score = _list_cache.score(match_date, match_number)
+        if found:
+            return score
 
         from datetime import datetime, timedelta
         base = datetime.strptime(match_date, "%Y-%m-%d")
         for delta in [1, -1]:
             alt_date = (base + timedelta(days=delta)).strftime("%Y-%m-%d")
-            alt_key = f"{alt_date}:{match_number}"
-            if alt_key in _score_cache:
-                return _score_cache[alt_key]
+            found, score = _list_cache.score(alt_date, match_number)
+            if found:
+                return score
             _load_jczq_list(alt_date)
-            if alt_key in _score_cache:
-                return _score_cache[alt_key]
+            found, score = _list_cache.score(alt_date, match_number)
+            if found:
+                return score
 
         return None
     except Exception as e:
@@ -297,12 +405,24 @@ def fetch_match_score(match_date: str, match_number: str) -> Optional[tuple]:
         return None
 
 
+# 抓取失败时 fetch_* 返回空结果, 这些不写缓存
+_CACHE_VALID = {
+    "euro": lambda v: bool(v.get("companies")),
+    "asian": bool,
+    "ou": bool,
+    "shuju": lambda v: any(v.get(k) for k in ("h2h", "homeRecent", "awayRecent")),
+}
+
+
 def fetch_european_odds(fid: str) -> Dict[str, Any]:
     """获取欧赔数据 - 从百家欧赔页面抓取所有公司初盘/即时盘"""
+    return odds500_cache.cached("euro", fid, lambda: _fetch_european_odds(fid), _CACHE_VALID["euro"])
+
+
+def _fetch_european_odds(fid: str) -> Dict[str, Any]:
     url = f"{BASE_URL}/fenxi/ouzhi-{fid}.shtml"
     try:
-        with httpx.Client(timeout=15, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = _http.get(url)
 
         html = resp.content.decode("gbk", errors="replace")
         return _parse_european_page(html)
@@ -313,7 +433,7 @@ def fetch_european_odds(fid: str) -> Dict[str, Any]:
 
 def _parse_european_page(html: str) -> Dict[str, Any]:
     """解析百家欧赔页面 - tr.tr1 每行27个td"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _soup(html, _DATATB_ONLY)
     table = soup.find("table", id="datatb")
     if not table:
         return {"companies": [], "summary": {}}
@@ -410,10 +530,13 @@ def _calc_euro_summary(companies: List[Dict]) -> Dict[str, Any]:
 
 def fetch_asian_handicap(fid: str) -> List[Dict[str, Any]]:
     """获取亚盘数据"""
+    return odds500_cache.cached("asian", fid, lambda: _fetch_asian_handicap(fid), _CACHE_VALID["asian"])
+
+
+def _fetch_asian_handicap(fid: str) -> List[Dict[str, Any]]:
     url = f"{BASE_URL}/fenxi/yazhi-{fid}.shtml"
     try:
-        with httpx.Client(timeout=15, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = _http.get(url)
 
         content = resp.content.decode("gbk", errors="replace")
         return _parse_asian_page(content)
@@ -424,7 +547,7 @@ def fetch_asian_handicap(fid: str) -> List[Dict[str, Any]]:
 
 def _parse_asian_page(html: str) -> List[Dict[str, Any]]:
     """解析亚盘页面"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _soup(html, _DATATB_ONLY)
     table = soup.find("table", id="datatb")
     if not table:
         return []
@@ -472,10 +595,13 @@ def _parse_asian_page(html: str) -> List[Dict[str, Any]]:
 
 def fetch_over_under(fid: str) -> List[Dict[str, Any]]:
     """获取大小球数据"""
+    return odds500_cache.cached("ou", fid, lambda: _fetch_over_under(fid), _CACHE_VALID["ou"])
+
+
+def _fetch_over_under(fid: str) -> List[Dict[str, Any]]:
     url = f"{BASE_URL}/fenxi/daxiao-{fid}.shtml"
     try:
-        with httpx.Client(timeout=15, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = _http.get(url)
 
         content = resp.content.decode("gbk", errors="replace")
         return _parse_over_under_page(content)
@@ -486,7 +612,7 @@ def fetch_over_under(fid: str) -> List[Dict[str, Any]]:
 
 def _parse_over_under_page(html: str) -> List[Dict[str, Any]]:
     """解析大小球页面"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _soup(html, _DATATB_ONLY)
     table = soup.find("table", id="datatb")
     if not table:
         return []
@@ -546,6 +672,11 @@ def fetch_all_indices(fid: str) -> Dict[str, Any]:
         asian_data = asian_future.result()
         ou_data = ou_future.result()
 
+    return _assemble_indices(euro_data, asian_data, ou_data)
+
+
+def _assemble_indices(euro_data: Dict[str, Any], asian_data: List[Dict[str, Any]],
+                      ou_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     # 欧赔: 组合统计值+公司列表
     euro_list = []
     summary = euro_data.get("summary", {})
@@ -592,8 +723,7 @@ def fetch_euro_history(fid: str, cid: int) -> List[Dict[str, Any]]:
         "Referer": f"{BASE_URL}/fenxi/ouzhi-{fid}.shtml",
     }
     try:
-        with httpx.Client(timeout=15) as client:
-            resp = client.get(url, params=params, headers=headers)
+        resp = _http.get(url, params=params, headers=headers)
         data = resp.json()
         if not isinstance(data, list):
             return []
@@ -612,6 +742,19 @@ def fetch_euro_history(fid: str, cid: int) -> List[Dict[str, Any]]:
         return []
 
 
+def _history_rows(rows: List[str]) -> List[List[Any]]:
+    """变动历史 AJAX 返回的每行 HTML 片段 -> 每行的 td 列表。
+
+    各行各包一层 <table> 拼成一个文档只解析一次(原先每行建一个 soup)。
+    """
+    parts = []
+    for html_str in rows:
+        frag = str(html_str)
+        parts.append(f"<table>{frag}</table>" if "<tr" in frag.lower() else f"<table><tr>{frag}</tr></table>")
+    soup = _soup("".join(parts))
+    return [table.find_all("td") for table in soup.find_all("table")]
+
+
 def fetch_asian_history(fid: str, cid: int) -> List[Dict[str, Any]]:
     """获取某公司亚盘变动历史 (AJAX API)"""
     url = f"{BASE_URL}/fenxi1/inc/yazhiajax.php"
@@ -622,16 +765,13 @@ def fetch_asian_history(fid: str, cid: int) -> List[Dict[str, Any]]:
         "Referer": f"{BASE_URL}/fenxi/yazhi-{fid}.shtml",
     }
     try:
-        with httpx.Client(timeout=15) as client:
-            resp = client.get(url, params=params, headers=headers)
+        resp = _http.get(url, params=params, headers=headers)
         data = resp.json()
         if not isinstance(data, list):
             return []
 
         records = []
-        for html_str in data:
-            soup = BeautifulSoup(html_str, "html.parser")
-            tds = soup.find_all("td")
+        for tds in _history_rows(data):
             if len(tds) < 4:
                 continue
             records.append({
@@ -657,16 +797,13 @@ def fetch_ou_history(fid: str, cid: int) -> List[Dict[str, Any]]:
         "Referer": f"{BASE_URL}/fenxi/daxiao-{fid}.shtml",
     }
     try:
-        with httpx.Client(timeout=15) as client:
-            resp = client.get(url, params=params, headers=headers)
+        resp = _http.get(url, params=params, headers=headers)
         data = resp.json()
         if not isinstance(data, list):
             return []
 
         records = []
-        for html_str in data:
-            soup = BeautifulSoup(html_str, "html.parser")
-            tds = soup.find_all("td")
+        for tds in _history_rows(data):
             if len(tds) < 4:
                 continue
             records.append({
@@ -681,37 +818,63 @@ def fetch_ou_history(fid: str, cid: int) -> List[Dict[str, Any]]:
         return []
 
 
+def _shuju_requests(fid: str) -> List[Tuple[str, str, Dict[str, Any], str]]:
+    """基本面 4 个请求 (method, url, kwargs, 编码): 数据页 + 主队近期 + 客队近期 + 完整交锋。"""
+    post_headers = {
+        **HEADERS,
+        "Content-Type": "application/x-www-form-urlencoded",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": f"{BASE_URL}/fenxi/shuju-{fid}.shtml",
+    }
+
+    def _recent(hoa: int) -> Tuple[str, str, Dict[str, Any], str]:
+        # hoa=1 主队, hoa=0 客队
+        data = {"id": fid, "limit": "15", "hoa": str(hoa), "bhbc": "0", "callback": "ajax", "r": "1"}
+        return ("POST", f"{BASE_URL}/fenxi1/inc/shuju_zhanji.php",
+                {"data": data, "headers": post_headers}, "utf-8")
+
+    return [
+        ("GET", f"{BASE_URL}/fenxi/shuju-{fid}.shtml", {}, "gbk"),
+        _recent(1),
+        _recent(0),
+        ("POST", f"{BASE_URL}/fenxi1/inc/shuju_jiaozhan.php",
+         {"data": {"id": fid, "limit": "30", "bhbc": "0", "r": "1"}, "headers": post_headers}, "gbk"),
+    ]
+
+
+def _empty_match_data() -> Dict[str, Any]:
+    return {
+        "h2h": [],
+        "homeRecent": [],
+        "awayRecent": [],
+        "homeFuture": [],
+        "awayFuture": [],
+    }
+
+
 def fetch_match_data(fid: str) -> Dict[str, Any]:
     """获取基本面数据：交锋历史、近期战绩、未来赛程"""
+    return odds500_cache.cached("shuju", fid, lambda: _fetch_match_data(fid), _CACHE_VALID["shuju"])
+
+
+def _fetch_match_data(fid: str) -> Dict[str, Any]:
     from concurrent.futures import ThreadPoolExecutor
 
-    def _fetch_shuju_page() -> str:
-        """获取数据页面 HTML"""
-        url = f"{BASE_URL}/fenxi/shuju-{fid}.shtml"
-        with httpx.Client(timeout=15, headers=HEADERS) as client:
-            resp = client.get(url)
-        return resp.content.decode("gbk", errors="replace")
-
-    def _fetch_recent(hoa: int) -> str:
-        """POST 获取近期战绩 HTML (hoa=1 主队, hoa=0 客队)"""
-        url = f"{BASE_URL}/fenxi1/inc/shuju_zhanji.php"
-        data = {
-            "id": fid,
-            "limit": "15",
-            "hoa": str(hoa),
-            "bhbc": "0",
-            "callback": "ajax",
-            "r": "1",
-        }
-        headers = {
-            **HEADERS,
-            "Content-Type": "application/x-www-form-urlencoded",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{BASE_URL}/fenxi/shuju-{fid}.shtml",
-        }
-        with httpx.Client(timeout=15) as client:
-            resp = client.post(url, data=data, headers=headers)
-        return resp.content.decode("utf-8", errors="replace")
+    # 并发请求：页面 HTML + 主队近期 + 客队近期 + 交锋历史
+    specs = _shuju_requests(fid)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(_http.request, method, url, **kw) for method, url, kw, _ in specs]
+            htmls = [f.result().content.decode(enc, errors="replace") for f, (_, _, _, enc) in zip(futures, specs)]
+    except Exception as e:
+        logger.error(f"获取基本面数据失败 fid={fid}: {e}")
+        return _empty_match_data()
+    return _parse_match_data(*htmls)
+
+
+def _parse_match_data(page_html: str, home_recent_html: str, away_recent_html: str,
+                      h2h_html: str) -> Dict[str, Any]:
+    """解析基本面 4 份 HTML(数据页/主队近期/客队近期/完整交锋), 同步/异步抓取共用。"""
 
     def _parse_h2h(soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """解析交锋历史表格
@@ -766,7 +929,7 @@ def fetch_match_data(fid: str) -> Dict[str, Any]:
     def _parse_recent(html: str) -> List[Dict[str, Any]]:
         """解析近期战绩 POST 响应"""
         records = []
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _soup(html)
         rows = soup.find_all("tr")
         for tr in rows:
             tds = tr.find_all("td")
@@ -848,46 +1011,10 @@ def fetch_match_data(fid: str) -> Dict[str, Any]:
 
         return home_future, away_future
 
-    def _fetch_h2h_post() -> str:
-        """POST 获取完整交锋历史"""
-        url = f"{BASE_URL}/fenxi1/inc/shuju_jiaozhan.php"
-        data = {"id": fid, "limit": "30", "bhbc": "0", "r": "1"}
-        h = {
-            **HEADERS,
-            "Content-Type": "application/x-www-form-urlencoded",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{BASE_URL}/fenxi/shuju-{fid}.shtml",
-        }
-        with httpx.Client(timeout=15) as client:
-            resp = client.post(url, data=data, headers=h)
-        return resp.content.decode("gbk", errors="replace")
-
-    # 并发请求：页面 HTML + 主队近期 + 客队近期 + 交锋历史
-    try:
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            page_future = executor.submit(_fetch_shuju_page)
-            home_recent_future = executor.submit(_fetch_recent, 1)
-            away_recent_future = executor.submit(_fetch_recent, 0)
-            h2h_future = executor.submit(_fetch_h2h_post)
-
-            page_html = page_future.result()
-            home_recent_html = home_recent_future.result()
-            away_recent_html = away_recent_future.result()
-            h2h_html = h2h_future.result()
-    except Exception as e:
-        logger.error(f"获取基本面数据失败 fid={fid}: {e}")
-        return {
-            "h2h": [],
-            "homeRecent": [],
-            "awayRecent": [],
-            "homeFuture": [],
-            "awayFuture": [],
-        }
-
     # 解析页面
-    soup = BeautifulSoup(page_html, "html.parser")
+    soup = _soup(page_html)
     # 优先使用POST接口的完整交锋(最多30条)，回退到页面内嵌的6条
-    h2h_soup = BeautifulSoup(h2h_html, "html.parser") if h2h_html else None
+    h2h_soup = _soup(h2h_html) if h2h_html else None
     h2h = _parse_h2h(h2h_soup) if h2h_soup else []
     if not h2h:
         h2h = _parse_h2h(soup)
@@ -1107,10 +1234,9 @@ def fetch_jczq_squad_worth(sale_date: str) -> Dict[str, Dict[str, Any]]:
 
     url = f"https://zx.500.com/jczq/worth/?d={sale_date}"
     try:
-        with httpx.Client(timeout=15, headers=HEADERS, follow_redirects=True) as client:
-            resp = client.get(url)
-            resp.raise_for_status()
-            html = resp.content.decode("gbk", errors="replace")
+        resp = _http.get(url, follow_redirects=True)
+        resp.raise_for_status()
+        html = resp.content.decode("gbk", errors="replace")
     except Exception as e:
         logger.warning(f"抓取竞彩身价失败 date={sale_date}: {e}")
         return cached or {}
@@ -1123,7 +1249,7 @@ def fetch_jczq_squad_worth(sale_date: str) -> Dict[str, Dict[str, Any]]:
         )
         return {}
 
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _soup(html)
     result: Dict[str, Dict[str, Any]] = {}
     for table in soup.find_all("table"):
         headers = [th.get_text(strip=True) for th in table.find_all("th")]
@@ -1172,3 +1298,129 @@ def get_match_squad_worth(
         return None
     return fetch_jczq_squad_worth(sale_date).get(str(match_code).strip()) or None
 
+
+
+# ========== 异步版(httpx.AsyncClient) ==========
+# 与同步版返回值/异常处理一致; BeautifulSoup 解析是 CPU 活, 放 to_thread 不阻塞事件循环。
+
+
+async def _acached(kind: str, fid: str, loader) -> Any:
+    """odds500_cache.cached 协程版; 缓存读写可能访问 MySQL, 放 to_thread。"""
+    value = await asyncio.to_thread(odds500_cache.get, kind, fid)
+    if value is not None:
+        return value
+    value = await loader()
+    if _CACHE_VALID[kind](value):
+        await asyncio.to_thread(odds500_cache.put, kind, fid, value)
+    return value
+
+
+async def _aget_text(url: str, encoding: str = "gbk", **kwargs) -> str:
+    resp = await _ahttp.get(url, **kwargs)
+    return resp.content.decode(encoding, errors="replace")
+
+
+async def load_jczq_list_async(match_date: str, max_age: Optional[float] = None) -> None:
+    """_load_jczq_list 协程版: 确保竞彩列表页在 max_age 秒内加载过"""
+    await _list_cache.aload(match_date, _fetch_jczq_list_async, max_age)
+
+
+async def _fetch_jczq_list_async(match_date: str) -> Optional[ListPage]:
+    url = f"{BASE_URL}/yazhi_jczq_{match_date}.shtml"
+    resp = await _ahttp.get(url)
+    if resp.status_code != 200:
+        logger.warning(f"获取竞彩列表失败: {resp.status_code}")
+        return None
+    content = resp.content.decode("gbk", errors="replace")
+    page = await asyncio.to_thread(_parse_jczq_list, content)
+    await asyncio.to_thread(_save_fid_map, match_date, page[0])
+    return page
+
+
+async def fetch_live_score_from_fid_async(fid: str) -> Optional[tuple]:
+    """fetch_live_score_from_fid 协程版"""
+    url = f"{BASE_URL}/fenxi/yazhi-{fid}.shtml"
+    try:
+        resp = await _ahttp.get(url)
+        if resp.status_code != 200:
+            logger.warning(f"获取比赛详情页失败 fid={fid}: HTTP {resp.status_code}")
+            return None
+        content = resp.content.decode("gbk", errors="replace")
+        return await asyncio.to_thread(_parse_live_score, content)
+    except Exception as e:
+        logger.warning(f"获取实时比分失败 fid={fid}: {e}")
+        return None
+
+
+async def fetch_european_odds_async(fid: str) -> Dict[str, Any]:
+    """fetch_european_odds 协程版"""
+    return await _acached("euro", fid, lambda: _fetch_european_odds_async(fid))
+
+
+async def _fetch_european_odds_async(fid: str) -> Dict[str, Any]:
+    try:
+        html = await _aget_text(f"{BASE_URL}/fenxi/ouzhi-{fid}.shtml")
+        return await asyncio.to_thread(_parse_european_page, html)
+    except Exception as e:
+        logger.error(f"获取欧赔失败 fid={fid}: {e}")
+        return {"companies": [], "summary": {}}
+
+
+async def fetch_asian_handicap_async(fid: str) -> List[Dict[str, Any]]:
+    """fetch_asian_handicap 协程版"""
+    return await _acached("asian", fid, lambda: _fetch_asian_handicap_async(fid))
+
+
+async def _fetch_asian_handicap_async(fid: str) -> List[Dict[str, Any]]:
+    try:
+        html = await _aget_text(f"{BASE_URL}/fenxi/yazhi-{fid}.shtml")
+        return await asyncio.to_thread(_parse_asian_page, html)
+    except Exception as e:
+        logger.error(f"获取亚盘失败 fid={fid}: {e}")
+        return []
+
+
+async def fetch_over_under_async(fid: str) -> List[Dict[str, Any]]:
+    """fetch_over_under 协程版"""
+    return await _acached("ou", fid, lambda: _fetch_over_under_async(fid))
+
+
+async def _fetch_over_under_async(fid: str) -> List[Dict[str, Any]]:
+    try:
+        html = await _aget_text(f"{BASE_URL}/fenxi/daxiao-{fid}.shtml")
+        return await asyncio.to_thread(_parse_over_under_page, html)
+    except Exception as e:
+        logger.error(f"获取大小球失败 fid={fid}: {e}")
+        return []
+
+
+async def fetch_all_indices_async(fid: str) -> Dict[str, Any]:
+    """fetch_all_indices 协程版: 欧赔+亚盘+大小球并发"""
+    euro_data, asian_data, ou_data = await asyncio.gather(
+        fetch_european_odds_async(fid),
+        fetch_asian_handicap_async(fid),
+        fetch_over_under_async(fid),
+    )
+    return _assemble_indices(euro_data, asian_data, ou_data)
+
+
+async def fetch_match_data_async(fid: str) -> Dict[str, Any]:
+    """fetch_match_data 协程版: 4 个请求并发"""
+    return await _acached("shuju", fid, lambda: _fetch_match_data_async(fid))
+
+
+async def _fetch_match_data_async(fid: str) -> Dict[str, Any]:
+    specs = _shuju_requests(fid)
+    try:
+        resps = await asyncio.gather(*[_ahttp.request(method, url, **kw) for method, url, kw, _ in specs])
+    except Exception as e:
+        logger.error(f"获取基本面数据失败 fid={fid}: {e}")
+        return _empty_match_data()
+    htmls = [r.content.decode(enc, errors="replace") for r, (_, _, _, enc) in zip(resps, specs)]
+    return await asyncio.to_thread(_parse_match_data, *htmls)
+
+
+async def close_http_clients() -> None:
+    """停机时关闭共享连接池(同步 + 异步)。"""
+    _http.close()
+    await _ahttp.aclose()
@@ -12,17 +12,24 @@
 注: calc_factor2(交锋历史) 保留供 backtest_factors.py 回测，不进 live 因子集。
      live 交锋只做评估参考(build_h2h_ref)，不参与 calc_prediction 加权。
 """
+import itertools
 import json
 import logging
 import math
+import multiprocessing
 import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 from openai import OpenAI
 
-from jczq_similar_odds import find_similar_spf, get_match_nspf_odds, get_match_spf_odds, _ah_outcome
+from jczq_similar_odds import (
+    find_similar_spf, get_match_nspf_odds, get_match_spf_odds, get_spf_pool,
+    _ah_outcome, _get_pool_index,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -70,9 +77,8 @@ def load_handicap_prior(handicap: Optional[float]) -> Optional[Dict[str, Any]]:
         return cached
 
     try:
-        import pymysql
-        import settings as _settings
-        conn = pymysql.connect(**_settings.MYSQL_CONFIG, cursorclass=pymysql.cursors.DictCursor)
+        from db_pool import get_conn
+        conn = get_conn()
         try:
             with conn.cursor() as c:
                 c.execute(
@@ -2707,8 +2713,8 @@ def build_ai_prompt(match_info: Dict, match_data: Optional[Dict] = None) -> str:
     return "\n".join(parts)
 
 
-def call_deepseek_factors(prompt: str) -> List[Dict[str, Any]]:
-    """调用 DeepSeek 获取 F1近期状态/实力定位 分析（含重试）"""
+def call_deepseek_factors(prompt: str, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """调用 DeepSeek 获取 F1近期状态/实力定位 分析（含重试）; timeout 为单次请求超时(秒)"""
     client = _get_client()
 
     logger.info(f"[predict] DeepSeek prompt (前200字): {prompt[:200]}...")
@@ -2725,6 +2731,7 @@ def call_deepseek_factors(prompt: str) -> List[Dict[str, Any]]:
                 temperature=0.3,
                 max_tokens=2048,
                 response_format={"type": "json_object"},
+                timeout=timeout,
             )
             content = response.choices[0].message.content or ""
             if content.strip():
@@ -2775,6 +2782,125 @@ def call_deepseek_factors(prompt: str) -> List[Dict[str, Any]]:
     return factors
 
 
+AI_VOTE_CALLS = 3
+AI_VOTE_NAMES = ("近期状态", "实力定位")
+
+
+def _is_default_vote(factors: List[Dict[str, Any]]) -> bool:
+    """调用失败/解析失败的默认值(或空列表), 不算有效投票。"""
+    return not factors or all(f.get("reason") == "AI分析无结果" for f in factors)
+
+
+def _f1_ai_outcome(dirs: List[str]) -> str:
+    """calc_factor1 子因素4(AI分析)的结论: 某方向 >= 2 票。"""
+    for d in ("upper", "lower"):
+        if dirs.count(d) >= 2:
+            return d
+    return "neutral"
+
+
+def _f3_ai_outcome(dirs: List[str]) -> Tuple[str, str]:
+    """calc_factor3 历史底蕴的结论档位: 3/3 一致=明显(score7), 2:0=略强, 2:1=稍强(有分歧)。"""
+    up, low = dirs.count("upper"), dirs.count("lower")
+    if up >= 3:
+        return ("upper", "明显")
+    if up == 2:
+        return ("upper", "略强" if low == 0 else "稍强")
+    if low >= 3:
+        return ("lower", "明显")
+    if low == 2:
+        return ("lower", "略强" if up == 0 else "稍强")
+    return ("neutral", "")
+
+
+_AI_VOTE_OUTCOMES = (("近期状态", _f1_ai_outcome), ("实力定位", _f3_ai_outcome))
+
+
+def _votes_decided(votes: List[List[Dict[str, Any]]], remaining: int) -> bool:
+    """剩下 remaining 票无论投什么, 近期状态/实力定位的结论(方向与档位)都不会变。
+
+    只看"过半"不够: 2 票同向时第 3 票同向是实力定位 3/3(明显强于, score7), 否则最多 6。
+    """
+    for name, outcome in _AI_VOTE_OUTCOMES:
+        dirs = [f.get("direction", "neutral") for v in votes for f in v if f.get("name") == name]
+        results = {outcome(dirs + list(rest))
+                   for rest in itertools.product(("upper", "lower", "neutral"), repeat=remaining)}
+        if len(results) > 1:
+            return False
+    return True
+
+
+def _run_ai_votes(prompt: str, tag: str) -> List[List[Dict[str, Any]]]:
+    """并发 AI_VOTE_CALLS 次 DeepSeek, 按完成顺序收票。
+
+    DEEPSEEK_VOTE_MODE=majority 时剩下的票已改变不了两项结论(_votes_decided)即返回,
+    如实力定位 2 票同向仍等第 3 票(可能 3/3 一致);
+    DEEPSEEK_CALL_DEADLINE 秒内没返回的调用直接放弃(后台线程自行结束, 结果丢弃)。
+    """
+    import settings
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    deadline = settings.DEEPSEEK_CALL_DEADLINE if settings.DEEPSEEK_CALL_DEADLINE > 0 else None
+    early_exit = settings.DEEPSEEK_VOTE_MODE == "majority"
+
+    def _safe_call(_prompt):
+        try:
+            return call_deepseek_factors(_prompt, timeout=deadline)
+        except Exception as e:
+            logger.warning(f"[{tag}] AI调用异常: {e}")
+            return []
+
+    start = time.monotonic()
+    votes = []
+    executor = ThreadPoolExecutor(max_workers=AI_VOTE_CALLS)
+    try:
+        pending = {executor.submit(_safe_call, prompt) for _ in range(AI_VOTE_CALLS)}
+        while pending:
+            remaining = None if deadline is None else deadline - (time.monotonic() - start)
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            votes.extend(f.result() for f in done)
+            if early_exit and pending and _votes_decided(votes, len(pending)):
+                logger.info(f"[{tag}] DeepSeek 结论已定({len(votes)}/{AI_VOTE_CALLS}票), 不再等待")
+                break
+        if pending and not (early_exit and _votes_decided(votes, len(pending))):
+            logger.warning(f"[{tag}] DeepSeek {len(pending)} 次调用超过 {deadline}s 未返回, 放弃")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return votes
+
+
+def collect_ai_factor_votes(prompt: str, tag: str = "predict") -> Tuple[List[Dict], List[Dict]]:
+    """F1近期状态/F2实力定位: 并发调 AI_VOTE_CALLS 次 DeepSeek, 返回 (近期状态列表, 实力定位列表)。
+
+    相同 prompt(近期战绩/交锋等输入未变)在 DEEPSEEK_FACTOR_CACHE_TTL 内复用上次的有效投票,
+    见 ai_factor_cache。
+    """
+    import ai_factor_cache
+
+    key = ai_factor_cache.cache_key(DEEPSEEK_MODEL, AI_FACTORS_PROMPT, prompt)
+    votes = ai_factor_cache.get(key)
+    if votes is not None:
+        logger.info(f"[{tag}] DeepSeek 投票命中缓存({len(votes)}票)")
+    else:
+        votes = _run_ai_votes(prompt, tag)
+        valid = [v for v in votes if not _is_default_vote(v)]
+        if valid:
+            ai_factor_cache.put(key, DEEPSEEK_MODEL, valid)
+
+    ai_f1_list = []
+    ai_f3_list = []
+    for ai_factors in votes:
+        ai_f1 = next((f for f in ai_factors if f.get("name") == "近期状态"), None)
+        if ai_f1:
+            ai_f1_list.append(ai_f1)
+        ai_f3 = next((f for f in ai_factors if f.get("name") == "实力定位"), None)
+        if ai_f3:
+            ai_f3_list.append(ai_f3)
+    return ai_f1_list, ai_f3_list
+
+
 # ============================================================
 # 综合预测入口
 # ============================================================
@@ -3483,9 +3609,37 @@ def calc_factor_jczq_similar_odds(jczq_company: Optional[Dict], league: Optional
             "refScore": ref_score, "refBreakdown": breakdown, **_mode}
 
 
+def _calc_f6_task(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """进程池 worker 入口(须模块顶层, 可 pickle)。"""
+    return calc_factor_jczq_similar_odds(**kwargs)
+
+
+def calc_factor_jczq_similar_odds_many(tasks: List[Dict[str, Any]], workers: int = 0) -> List[Dict[str, Any]]:
+    """批量 F6: tasks 为 calc_factor_jczq_similar_odds 的关键字参数列表, 结果按 tasks 顺序返回。
+
+    workers<=1 或场次太少时串行。否则先在父进程预热 spf 池+列式索引, 再 fork 进程池:
+    子进程继承父进程内存(快照 mmap 页同样共享), 不重新加载池, 也不碰 DB。
+    每次请求新开进程池, 池增量刷新后下一批自然用新池。fork 不可用或子进程异常时回退串行。
+    """
+    if workers <= 1 or len(tasks) < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        return [calc_factor_jczq_similar_odds(**t) for t in tasks]
+
+    # 预热后子进程走无锁快路径, 避免 fork 时继承到被其他线程持有的加载锁
+    _get_pool_index(get_spf_pool)
+    n = min(workers, len(tasks))
+    chunksize = max(1, len(tasks) // (n * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("fork")) as ex:
+            return list(ex.map(_calc_f6_task, tasks, chunksize=chunksize))
+    except Exception as e:
+        logger.warning(f"F6 进程池失败, 回退串行: {e}")
+        return [calc_factor_jczq_similar_odds(**t) for t in tasks]
+
+
 def predict_match(match_info: Dict[str, Any], match_data: Optional[Dict] = None,
                   asian_data: Optional[List] = None,
-                  euro_data: Optional[Dict] = None) -> Dict[str, Any]:
+                  euro_data: Optional[Dict] = None,
+                  jczq_company_spf: Optional[Dict] = None) -> Dict[str, Any]:
     """完整预测流程
 
     Args:
@@ -3493,6 +3647,7 @@ def predict_match(match_info: Dict[str, Any], match_data: Optional[Dict] = None,
         match_data: 500.com基本面数据 (h2h, homeRecent, awayRecent)
         asian_data: 500.com亚盘数据列表
         euro_data: 500.com欧赔数据 {"companies": [...], "summary": {...}}
+        jczq_company_spf: 调用方已取好的本场 spf 初/终盘; None 时按 match_id 自行查
 
     Returns:
         {"factors": [...], "prediction": {...}}
@@ -3513,7 +3668,8 @@ def predict_match(match_info: Dict[str, Any], match_data: Optional[Dict] = None,
     # F5 竞彩赔率 & F6 历史同赔: 从 jczq_odds_history 取本场 nspf 初/终盘
     # F5竞彩赔率 & F6历史同赔 均用 spf(胜平负)口径(与世界杯一致, 用户预期)
     _mid = match_info.get("match_id")
-    jczq_company_spf = get_match_spf_odds(_mid) if _mid else None
+    if jczq_company_spf is None and _mid:
+        jczq_company_spf = get_match_spf_odds(_mid)
     f5 = calc_factor_jczq_odds(jczq_company_spf, home_is_upper=is_home_let)
     f6 = calc_factor_jczq_similar_odds(
         jczq_company_spf, league=match_info.get("league"),
@@ -3524,29 +3680,7 @@ def predict_match(match_info: Dict[str, Any], match_data: Optional[Dict] = None,
     # F1 近期状态 & F2 实力定位: DeepSeek推理(3次调用取多数，并行加速)
     # 交锋历史不进因子加权，只做 h2hRef 评估参考
     prompt = build_ai_prompt(match_info, match_data)
-
-    ai_f1_list = []
-    ai_f3_list = []
-
-    from concurrent.futures import ThreadPoolExecutor
-
-    def _safe_call(_prompt):
-        try:
-            return call_deepseek_factors(_prompt)
-        except Exception as e:
-            logger.warning(f"[predict] AI调用异常: {e}")
-            return []
-
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = [executor.submit(_safe_call, prompt) for _ in range(3)]
-        for future in futures:
-            ai_factors = future.result()
-            ai_f1 = next((f for f in ai_factors if f["name"] == "近期状态"), None)
-            if ai_f1:
-                ai_f1_list.append(ai_f1)
-            ai_f3 = next((f for f in ai_factors if f["name"] == "实力定位"), None)
-            if ai_f3:
-                ai_f3_list.append(ai_f3)
+    ai_f1_list, ai_f3_list = collect_ai_factor_votes(prompt, "predict")
 
     f1 = calc_factor1(match_data, match_info, ai_f1_list or None)
     f2 = calc_factor3(match_info, ai_f3_list or None)
@@ -38,6 +38,67 @@ def derive_sale_date(row: Dict[str, Any]) -> Optional[str]:
     return date_str if date_str else None
 
 
+# history 新增一行后同步初/终盘汇总(与 scraper-service/repository.py 同口径):
+# 更早则覆盖初盘, 不早于终盘则覆盖终盘; first_time/last_time 须放最后(前面的 IF 比较用旧值)。
+OPEN_CLOSE_UPSERT_SQL = """
+    INSERT INTO jczq_odds_open_close
+        (match_id, odds_type, open_win, open_draw, open_loss,
+         close_win, close_draw, close_loss, move_count, first_time, last_time)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,1,%s,%s)
+    ON DUPLICATE KEY UPDATE
+        open_win = IF(VALUES(first_time) < first_time, VALUES(open_win), open_win),
+        open_draw = IF(VALUES(first_time) < first_time, VALUES(open_draw), open_draw),
+        open_loss = IF(VALUES(first_time) < first_time, VALUES(open_loss), open_loss),
+        close_win = IF(VALUES(last_time) >= last_time, VALUES(close_win), close_win),
+        close_draw = IF(VALUES(last_time) >= last_time, VALUES(close_draw), close_draw),
+        close_loss = IF(VALUES(last_time) >= last_time, VALUES(close_loss), close_loss),
+        move_count = move_count + 1,
+        first_time = LEAST(first_time, VALUES(first_time)),
+        last_time = GREATEST(last_time, VALUES(last_time))
+"""
+
+
+def upsert_odds_open_close(conn, match_id: str, odds_type: str,
+                           win: float, draw: float, lose: float, change_time) -> None:
+    """jczq_odds_history 新增一行后同步 jczq_odds_open_close(调用方同一连接/事务)。"""
+    with conn.cursor() as cur:
+        cur.execute(
+            OPEN_CLOSE_UPSERT_SQL,
+            (match_id, odds_type, win, draw, lose, win, draw, lose, change_time, change_time),
+        )
+
+
+FID_MAP_UPSERT_SQL = """
+    INSERT INTO fid_map_500 (sale_date, match_code, fid) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE fid = VALUES(fid)
+"""
+
+
+def save_fid_map_500(conn, sale_date: str, fids: Dict[str, str]) -> None:
+    """整页写入 500.com 列表页的 场次号 -> fid(调用方提交)。"""
+    if not fids:
+        return
+    with conn.cursor() as cur:
+        cur.executemany(FID_MAP_UPSERT_SQL, [(sale_date, code, fid) for code, fid in fids.items()])
+
+
+def find_fid_map_500(conn, match_code: str, sale_dates: List[str]) -> Optional[str]:
+    """按 sale_dates 顺序取第一个有记录的售卖日的 fid, 一次查询。"""
+    if not sale_dates:
+        return None
+    ph = ",".join([PLACEHOLDER] * len(sale_dates))
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT sale_date, fid FROM fid_map_500 WHERE match_code = %s AND sale_date IN ({ph})",
+            (match_code, *sale_dates),
+        )
+        found = {str(r["sale_date"]): r["fid"] for r in cur.fetchall()}
+    for d in sale_dates:
+        if d in found:
+            return found[d]
+    return None
+
+
 def _execute(conn, sql: str, params=None):
     """执行 SQL 语句（MySQL）"""
     cursor = conn.cursor()
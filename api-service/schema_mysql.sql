@@ -100,6 +100,32 @@ CREATE TABLE IF NOT EXISTS sync_status (
     total_odds INT DEFAULT 0
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- jczq_odds_history 每场每口径的初盘/终盘汇总(写 history 时同步维护, 同赔池/单场初终盘直接读)
+CREATE TABLE IF NOT EXISTS jczq_odds_open_close (
+    match_id VARCHAR(100) NOT NULL,
+    odds_type VARCHAR(20) NOT NULL COMMENT 'spf/nspf',
+    open_win DECIMAL(8,2) NOT NULL,
+    open_draw DECIMAL(8,2) NOT NULL,
+    open_loss DECIMAL(8,2) NOT NULL,
+    close_win DECIMAL(8,2) NOT NULL,
+    close_draw DECIMAL(8,2) NOT NULL,
+    close_loss DECIMAL(8,2) NOT NULL,
+    move_count INT NOT NULL DEFAULT 1 COMMENT 'history 行数(≥2 才有初终盘变动)',
+    first_time DATETIME NOT NULL COMMENT '初盘 change_time',
+    last_time DATETIME NOT NULL COMMENT '终盘 change_time',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (match_id, odds_type),
+    INDEX idx_type_moves (odds_type, move_count),
+    FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- jczq_odds_open_close 全量重建标记(build_odds_open_close.rebuild 完成后写入, 无记录时同赔池加载前先全量重建)
+CREATE TABLE IF NOT EXISTS jczq_odds_open_close_build (
+    id INT PRIMARY KEY CHECK (id = 1),
+    rebuilt_at DATETIME NOT NULL,
+    affected INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 CREATE TABLE IF NOT EXISTS prediction_history (
     id INT AUTO_INCREMENT PRIMARY KEY,
     match_id VARCHAR(100) NOT NULL,
@@ -139,3 +165,38 @@ CREATE TABLE IF NOT EXISTS team_id_map (
     PRIMARY KEY (sporttery_team_id, team_id_500),
     INDEX idx_map_500 (team_id_500)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 500.com 按 fid 的解析结果缓存(完场比赛, odds500_cache.py)
+CREATE TABLE IF NOT EXISTS odds500_page_cache (
+    kind VARCHAR(20) NOT NULL COMMENT 'euro/asian/ou/shuju',
+    fid VARCHAR(20) NOT NULL,
+    payload MEDIUMTEXT NOT NULL COMMENT '解析结果 JSON',
+    expires_at DATETIME NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, fid),
+    INDEX idx_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 按 fid 反查场次(页面缓存定 TTL), 已存在时报 Duplicate key name, init_db 忽略
+CREATE INDEX idx_matches_fid_500 ON matches (fid_500);
+
+-- 500.com 竞彩列表页 场次号 -> fid(每次解析列表页整页写入, get_fid_for_match 先查这里)
+CREATE TABLE IF NOT EXISTS fid_map_500 (
+    sale_date VARCHAR(10) NOT NULL COMMENT '列表页日期 YYYY-MM-DD',
+    match_code VARCHAR(50) NOT NULL COMMENT '场次号, 如 周一001',
+    fid VARCHAR(20) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (sale_date, match_code),
+    INDEX idx_fid_map_code (match_code, sale_date),
+    INDEX idx_fid_map_fid (fid)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- DeepSeek F1近期状态/F2实力定位 投票缓存(键为 模型+system prompt+user prompt 的 sha1, 输入数据不变才命中)
+CREATE TABLE IF NOT EXISTS ai_factor_cache (
+    prompt_hash CHAR(40) NOT NULL PRIMARY KEY,
+    model VARCHAR(64) NOT NULL,
+    votes_json MEDIUMTEXT NOT NULL COMMENT '各次调用解析后的 factors 列表 JSON',
+    expires_at DATETIME NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_ai_factor_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -11,6 +11,7 @@ odds_win_draw_lose 有 had(=raw 胜平负, 即 spf)当前值。用 had 值补种
 """
 import pymysql
 import settings
+from repository import OPEN_CLOSE_UPSERT_SQL
 
 SEED_SQL = """INSERT IGNORE INTO jczq_odds_history
     (match_id, odds_type, odds_win, odds_draw, odds_loss,
@@ -47,10 +48,16 @@ def main():
         if not batch:
             print("无场次需补种")
             return
+        inserted = 0
         with conn.cursor() as cur:
-            cur.executemany(SEED_SQL, batch)
+            for mid, w, d, l, ct in batch:
+                # 汇总只跟随真正落库的 history 行: IGNORE 掉的重复行不能再给 move_count 加 1
+                if cur.execute(SEED_SQL, (mid, w, d, l, ct)) == 0:
+                    continue
+                cur.execute(OPEN_CLOSE_UPSERT_SQL, (mid, "spf", w, d, l, w, d, l, ct, ct))
+                inserted += 1
         conn.commit()
-        print(f"已补种 spf 行: {len(batch)} 场")
+        print(f"已补种 spf 行: {inserted} 场(跳过已存在 {len(batch) - inserted} 场)")
     finally:
         conn.close()
 
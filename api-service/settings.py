@@ -31,6 +31,52 @@ POOL_CODES = {
 
 SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "600"))  # 10分钟
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "20"))
+# 历史同赔池增量刷新间隔(秒): 当日完赛/终盘回填的场次按水位并入池, 无需重启
+SIMILAR_POOL_REFRESH_SECONDS = int(os.getenv("SIMILAR_POOL_REFRESH_SECONDS", "600"))
+# 历史同赔池磁盘快照(DATA_DIR/similar_pool): 冷启动 mmap 读取, 多 worker 共享; 0 关闭
+SIMILAR_POOL_SNAPSHOT = os.getenv("SIMILAR_POOL_SNAPSHOT", "1") == "1"
+# MySQL 连接池(db_pool): 最大借出数(0 关闭池化, 每次直连)/连接最长寿命/空闲多久借出前 ping/排队超时(秒)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_MAX_LIFETIME = int(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_PING_IDLE = int(os.getenv("DB_POOL_PING_IDLE", "30"))
+DB_POOL_WAIT_TIMEOUT = float(os.getenv("DB_POOL_WAIT_TIMEOUT", "10"))
+# 500.com 共享 HTTP 客户端(odds500_service): 连接池上限/keep-alive 数/HTTP2(需 h2 包)/每主机并发/重试次数
+ODDS500_HTTP_MAX_CONNECTIONS = int(os.getenv("ODDS500_HTTP_MAX_CONNECTIONS", "20"))
+ODDS500_HTTP_MAX_KEEPALIVE = int(os.getenv("ODDS500_HTTP_MAX_KEEPALIVE", "10"))
+ODDS500_HTTP2 = os.getenv("ODDS500_HTTP2", "0") == "1"
+ODDS500_HTTP_PER_HOST = int(os.getenv("ODDS500_HTTP_PER_HOST", "8"))
+ODDS500_HTTP_RETRIES = int(os.getenv("ODDS500_HTTP_RETRIES", "2"))
+# /api/match-results/live 异步并发抓取 500.com 列表页/详情页的同时在途数
+LIVE_SCORE_CONCURRENCY = int(os.getenv("LIVE_SCORE_CONCURRENCY", "16"))
+# 500.com 按 fid 的解析结果缓存(odds500_cache): 内存条数(0 关闭)/完场 TTL/未完场 TTL(秒)/完场结果落 MySQL
+ODDS500_PAGE_CACHE_SIZE = int(os.getenv("ODDS500_PAGE_CACHE_SIZE", "512"))
+ODDS500_PAGE_CACHE_TTL_FINISHED = int(os.getenv("ODDS500_PAGE_CACHE_TTL_FINISHED", str(7 * 86400)))
+ODDS500_PAGE_CACHE_TTL_LIVE = int(os.getenv("ODDS500_PAGE_CACHE_TTL_LIVE", "120"))
+ODDS500_PAGE_CACHE_DB = os.getenv("ODDS500_PAGE_CACHE_DB", "1") == "1"
+# 500.com 竞彩列表页缓存(场次号 -> fid/比分): 最多缓存日期数/fid 映射 TTL/比分 TTL(秒)
+ODDS500_LIST_CACHE_DATES = int(os.getenv("ODDS500_LIST_CACHE_DATES", "32"))
+ODDS500_FID_TTL = float(os.getenv("ODDS500_FID_TTL", str(6 * 3600)))
+ODDS500_SCORE_TTL = float(os.getenv("ODDS500_SCORE_TTL", "30"))
+# 500.com 页面解析后端(BeautifulSoup): html.parser(默认) / lxml(需 lxml 包, 更快; 切换前先跑 bench_odds500_parsers.py 核对输出)
+ODDS500_HTML_PARSER = os.getenv("ODDS500_HTML_PARSER", "html.parser")
+# DeepSeek 因子投票缓存(ai_factor_cache): 开关/TTL(秒)/内存条数/落 MySQL; prompt 不变(近期战绩/交锋等数据未变)时复用上次投票
+DEEPSEEK_FACTOR_CACHE = os.getenv("DEEPSEEK_FACTOR_CACHE", "1") == "1"
+DEEPSEEK_FACTOR_CACHE_TTL = int(os.getenv("DEEPSEEK_FACTOR_CACHE_TTL", str(6 * 3600)))
+DEEPSEEK_FACTOR_CACHE_SIZE = int(os.getenv("DEEPSEEK_FACTOR_CACHE_SIZE", "256"))
+DEEPSEEK_FACTOR_CACHE_DB = os.getenv("DEEPSEEK_FACTOR_CACHE_DB", "1") == "1"
+# DeepSeek 3 次投票: majority=剩余票已改变不了近期状态/实力定位的方向与得分档位时提前返回(与等满 3 票结论相同), all=等满 3 票
+DEEPSEEK_VOTE_MODE = os.getenv("DEEPSEEK_VOTE_MODE", "majority")
+# 单次 DeepSeek 调用截止时间(秒), 超时的票放弃; 0 不限
+DEEPSEEK_CALL_DEADLINE = float(os.getenv("DEEPSEEK_CALL_DEADLINE", "30"))
+# /api/predict/{match_id} 抓取阶段(500 基本面/亚盘/欧赔 + 本场 spf/亚盘 DB 读)并发执行的总截止时间(秒)
+PREDICT_FETCH_DEADLINE = float(os.getenv("PREDICT_FETCH_DEADLINE", "20"))
+# 上述抓取阶段的进程级共用线程池大小(每次预测最多 4 项, 超时放弃的任务仍会占线程到 HTTP 超时)
+PREDICT_FETCH_WORKERS = int(os.getenv("PREDICT_FETCH_WORKERS", "16"))
+# batch-similar 逐场 F6 的进程池大小(fork 共享同赔池); 0/1 串行
+BATCH_SIMILAR_WORKERS = int(os.getenv("BATCH_SIMILAR_WORKERS", "0"))
+# batch-similar 结果缓存: 进程内 LRU 条数(0 关闭) + 磁盘层(DATA_DIR/batch_similar, 重启/多 worker 共享)
+BATCH_SIMILAR_CACHE_SIZE = int(os.getenv("BATCH_SIMILAR_CACHE_SIZE", "64"))
+BATCH_SIMILAR_CACHE_DISK = os.getenv("BATCH_SIMILAR_CACHE_DISK", "1") == "1"
 USER_AGENT = "football-betting-system/1.0"
 
 # 微信小程序配置
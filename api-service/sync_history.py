@@ -13,6 +13,7 @@ import pymysql
 from datetime import datetime, timedelta, timezone
 
 import settings
+import build_odds_open_close
 
 _BJ = timezone(timedelta(hours=8))
 
@@ -414,6 +415,8 @@ def run():
         sync_odds_movement(sqlite_conn, mysql_conn)
         sync_final_odds(sqlite_conn, mysql_conn)
         sync_okooo_asian(sqlite_conn, mysql_conn)
+        # 批量导入绕过了逐行 upsert, 重建初/终盘汇总
+        build_odds_open_close.rebuild(mysql_conn)
 
         # 统计最终结果
         with mysql_conn.cursor() as cur:
@@ -10,7 +10,6 @@
 """
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 from predict_service import (
@@ -22,7 +21,7 @@ from predict_service import (
     calc_prediction,
     generate_analysis,
     build_ai_prompt,
-    call_deepseek_factors,
+    collect_ai_factor_votes,
     calc_factor_jczq_odds,
     _home_is_upper,
 )
@@ -208,26 +207,7 @@ def predict_wc_match(match_info: Dict[str, Any],
 
     # F1 近期状态 & F2 实力定位: 需要AI辅助
     prompt = build_ai_prompt(match_info, match_data)
-    ai_f1_list = []
-    ai_f3_list = []
-
-    def _safe_call(_prompt):
-        try:
-            return call_deepseek_factors(_prompt)
-        except Exception as e:
-            logger.warning(f"[wc_predict] AI调用异常: {e}")
-            return []
-
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        futures = [executor.submit(_safe_call, prompt) for _ in range(3)]
-        for future in futures:
-            ai_factors = future.result()
-            ai_f1 = next((f for f in ai_factors if f["name"] == "近期状态"), None)
-            if ai_f1:
-                ai_f1_list.append(ai_f1)
-            ai_f3 = next((f for f in ai_factors if f["name"] == "实力定位"), None)
-            if ai_f3:
-                ai_f3_list.append(ai_f3)
+    ai_f1_list, ai_f3_list = collect_ai_factor_votes(prompt, "wc_predict")
 
     f1 = calc_factor1(match_data, match_info, ai_f1_list or None)
     f2 = calc_factor3(match_info, ai_f3_list or None)
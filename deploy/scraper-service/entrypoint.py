@@ -13,7 +13,9 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+import settings
 from database import init_db
+from scraper.scheduler import KickoffScheduler
 from scraper.sporttery_service import SportterySyncService
 
 logging.basicConfig(
@@ -25,36 +27,52 @@ logger = logging.getLogger(__name__)
 SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL_SECONDS", "600"))
 
 
-def run_sync():
-    service = SportterySyncService()
+def run_sync(service, scheduler=None):
     try:
         logger.info("开始数据同步...")
-        stats = service.run_once()
+        stats = service.run_once(scheduler=scheduler)
         logger.info(
             f"同步完成 - 比赛数: {stats.get('matches', 0)}, 赔率数: {stats.get('odds', 0)}, "
-            f"回填比分: {stats.get('scores', 0)}, 亚盘: {stats.get('asian', 0)}"
+            f"回填比分: {stats.get('scores', 0)}, 亚盘: {stats.get('asian', 0)}, "
+            f"耗时(ms): {stats.get('timings_ms', {})}, 上一条赔率缓存: {stats.get('last_odds', {})}"
         )
         return stats
     except Exception as e:
         logger.exception(f"同步失败: {e}")
-    finally:
-        service.close()
 
 
 if __name__ == "__main__":
     logger.info("=" * 60)
     logger.info("足球竞彩数据抓取服务启动 (循环模式)")
-    logger.info(f"同步间隔: {SYNC_INTERVAL} 秒")
+    scheduler = KickoffScheduler.from_settings() if settings.ADAPTIVE_SCHEDULE else None
+    if scheduler:
+        logger.info(f"按开赛临近调度: 档位 {scheduler.tiers}, 空闲 {scheduler.idle_interval} 秒, "
+                    f"全量/回填间隔 {SYNC_INTERVAL} 秒")
+    else:
+        logger.info(f"同步间隔: {SYNC_INTERVAL} 秒")
     logger.info("=" * 60)
 
     init_db()
     logger.info("数据库初始化完成")
 
-    while True:
-        try:
-            run_sync()
-        except Exception as e:
-            logger.error(f"本次同步异常: {e}")
+    # history 比对用的"上一条"赔率: 启动时一次批量查询种子化, 不放进首轮写事务
+    # 整个进程复用一个 service(体彩 httpx 连接池 keep-alive 跨轮保留)
+    service = SportterySyncService()
+    try:
+        seeded = service.repository.seed_last_odds()
+        logger.info(f"上一条赔率缓存种子化: {seeded} 条")
+    except Exception as e:
+        logger.warning(f"上一条赔率缓存种子化失败(首轮写入前重试): {e}")
+
+    try:
+        while True:
+            try:
+                run_sync(service, scheduler)
+            except Exception as e:
+                logger.error(f"本次同步异常: {e}")
 
-        logger.info(f"等待 {SYNC_INTERVAL} 秒后进行下一次同步...")
-        time.sleep(SYNC_INTERVAL)
+            delay = scheduler.next_delay() if scheduler else SYNC_INTERVAL
+            logger.info(f"等待 {delay:.0f} 秒后进行下一次同步...")
+            time.sleep(delay)
+    finally:
+        service.close()
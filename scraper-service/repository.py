@@ -1,10 +1,33 @@
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import settings
 from database import get_db, update_sync_status
 
 PLACEHOLDER = "%s"
 
+# history 新增一行后同步初/终盘汇总: 更早则覆盖初盘, 不早于终盘则覆盖终盘。
+# MySQL 按书写顺序赋值, first_time/last_time 须放最后(前面的 IF 比较用旧值)。
+# VALUES 里全是占位符(move_count 也是), executemany 才能改写成一条多行 INSERT。
+OPEN_CLOSE_UPSERT_SQL = """
+    INSERT INTO jczq_odds_open_close
+        (match_id, odds_type, open_win, open_draw, open_loss,
+         close_win, close_draw, close_loss, move_count, first_time, last_time)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE
+        open_win = IF(VALUES(first_time) < first_time, VALUES(open_win), open_win),
+        open_draw = IF(VALUES(first_time) < first_time, VALUES(open_draw), open_draw),
+        open_loss = IF(VALUES(first_time) < first_time, VALUES(open_loss), open_loss),
+        close_win = IF(VALUES(last_time) >= last_time, VALUES(close_win), close_win),
+        close_draw = IF(VALUES(last_time) >= last_time, VALUES(close_draw), close_draw),
+        close_loss = IF(VALUES(last_time) >= last_time, VALUES(close_loss), close_loss),
+        move_count = move_count + 1,
+        first_time = LEAST(first_time, VALUES(first_time)),
+        last_time = GREATEST(last_time, VALUES(last_time))
+"""
+
 
 def _execute(conn, sql: str, params=None):
     """执行 SQL 语句（MySQL）"""
@@ -17,116 +40,345 @@ def _execute(conn, sql: str, params=None):
         raise
 
 
+def _executemany(conn, sql: str, params: List[tuple]):
+    """批量执行 SQL 语句（MySQL）; 出错处理同 _execute"""
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(sql, params)
+        return cursor
+    except Exception:
+        cursor.close()
+        raise
+
+
+def _open_close_values(match_id: str, odds_type: str,
+                       win: float, draw: float, lose: float, change_time: datetime) -> tuple:
+    return (match_id, odds_type, win, draw, lose, win, draw, lose, 1, change_time, change_time)
+
+
+def _touch_open_close(conn, match_id: str, odds_type: str,
+                      win: float, draw: float, lose: float, change_time: datetime) -> None:
+    """jczq_odds_history 新增一行后同步 jczq_odds_open_close(同一事务)。"""
+    _execute(
+        conn,
+        OPEN_CLOSE_UPSERT_SQL,
+        _open_close_values(match_id, odds_type, win, draw, lose, change_time),
+    )
+
+
+MATCH_FIELDS = [
+    "match_id",
+    "match_number",
+    "match_code",
+    "project_type",
+    "league_id",
+    "league_name",
+    "league_full_name",
+    "match_date",
+    "match_time",
+    "match_timestamp",
+    "home_team_id",
+    "home_team_name",
+    "home_team_rank",
+    "away_team_id",
+    "away_team_name",
+    "away_team_rank",
+    "is_single",
+    "match_status",
+    "notice",
+    "odds_update_time",
+]
+
+
+def _match_update_expr(f: str) -> str:
+    # is_single 只升不降：单关是历史事实，在售时同步为1，停售后API返回0时不回退
+    # match_status 不降级：已有比分或已 finished/cancelled 时，不被体彩 Selling 写回 not_started
+    if f == "is_single":
+        return "is_single=IF(VALUES(is_single)=1,1,is_single)"
+    if f == "match_status":
+        return (
+            "match_status=IF("
+            "home_score IS NOT NULL, 'finished', "
+            "IF(match_status IN ('finished','cancelled') "
+            "AND VALUES(match_status)='not_started', match_status, VALUES(match_status))"
+            ")"
+        )
+    return f"{f}=VALUES({f})"
+
+
+MATCH_UPSERT_SQL = f"""
+    INSERT INTO matches ({", ".join(MATCH_FIELDS)}) VALUES ({", ".join([PLACEHOLDER] * len(MATCH_FIELDS))})
+    ON DUPLICATE KEY UPDATE {", ".join(_match_update_expr(f) for f in MATCH_FIELDS if f != "match_id")},
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# 以下 upsert 的 VALUES 只含占位符(updated_at 插入时走列默认值), executemany 可改写为多行 INSERT
+WDL_UPSERT_SQL = """
+    INSERT INTO odds_win_draw_lose (
+        match_id, odds_type, handicap,
+        win_odds, draw_odds, lose_odds,
+        win_support, draw_support, lose_support,
+        is_single
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        handicap=VALUES(handicap),
+        win_odds=VALUES(win_odds),
+        draw_odds=VALUES(draw_odds),
+        lose_odds=VALUES(lose_odds),
+        win_support=VALUES(win_support),
+        draw_support=VALUES(draw_support),
+        lose_support=VALUES(lose_support),
+        is_single=IF(VALUES(is_single)=1,1,is_single),
+        updated_at=CURRENT_TIMESTAMP
+"""
+
+SCORE_UPSERT_SQL = """
+    INSERT INTO odds_correct_score (
+        match_id, result_type, home_score, away_score, score_label, odds, is_other
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        odds=VALUES(odds),
+        score_label=VALUES(score_label),
+        updated_at=CURRENT_TIMESTAMP
+"""
+
+GOALS_UPSERT_SQL = """
+    INSERT INTO odds_total_goals (
+        match_id, goal_range, min_goals, max_goals, odds
+    ) VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        min_goals=VALUES(min_goals),
+        max_goals=VALUES(max_goals),
+        odds=VALUES(odds),
+        updated_at=CURRENT_TIMESTAMP
+"""
+
+HAFU_UPSERT_SQL = """
+    INSERT INTO odds_half_full_time (
+        match_id, half_result, full_result, result_label, odds
+    ) VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        result_label=VALUES(result_label),
+        odds=VALUES(odds),
+        updated_at=CURRENT_TIMESTAMP
+"""
+
+_HISTORY_INTO = """INTO jczq_odds_history
+        (match_id, odds_type, odds_win, odds_draw, odds_loss,
+         direction_win, direction_draw, direction_loss, change_time)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+# 单行写入: IGNORE 同一秒重复, 调用方按 rowcount 决定是否同步汇总
+HISTORY_INSERT_SQL = "INSERT IGNORE " + _HISTORY_INTO
+# 批量写入: 不 IGNORE(多行 IGNORE 只有总 rowcount, 分不出哪行被跳过, 汇总会多算);
+# 调用方先剔除同一秒已有的行, 仍冲突(并发写入)则整批回滚, 下一轮重写
+HISTORY_BULK_INSERT_SQL = "INSERT " + _HISTORY_INTO
+
+# had/hhad(竞彩) -> spf/nspf(jczq_odds_history 约定)
+HISTORY_TYPE_MAP = {"had": "spf", "hhad": "nspf"}
+
+
+def _match_values(match: Dict[str, Any]) -> tuple:
+    return tuple(match.get(f) for f in MATCH_FIELDS)
+
+
+def _wdl_values(item: Dict[str, Any]) -> tuple:
+    return (
+        item.get("match_id"),
+        item.get("odds_type"),
+        item.get("handicap"),
+        item.get("win_odds"),
+        item.get("draw_odds"),
+        item.get("lose_odds"),
+        item.get("win_support"),
+        item.get("draw_support"),
+        item.get("lose_support"),
+        item.get("is_single", 0),
+    )
+
+
+def _normalize_score(row: Dict[str, Any], key: str) -> int:
+    """空比分用 -1 保存，避免 NULL 使唯一索引失效"""
+    value = row.get(key)
+    if value is None:
+        return -1
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _score_values(match_id: str, row: Dict[str, Any]) -> tuple:
+    return (
+        match_id,
+        row.get("result_type"),
+        _normalize_score(row, "home_score"),
+        _normalize_score(row, "away_score"),
+        row.get("score_label"),
+        row.get("odds"),
+        row.get("is_other", 0),
+    )
+
+
+def _goals_values(match_id: str, row: Dict[str, Any]) -> tuple:
+    return (match_id, row.get("goal_range"), row.get("min_goals"), row.get("max_goals"), row.get("odds"))
+
+
+def _hafu_values(match_id: str, row: Dict[str, Any]) -> tuple:
+    return (match_id, row.get("half_result"), row.get("full_result"), row.get("result_label"), row.get("odds"))
+
+
+def _history_triple(item: Dict[str, Any]) -> Optional[Tuple[str, str, float, float, float]]:
+    """had/hhad 赔率项 -> (match_id, spf/nspf, 胜, 平, 负); 不入 history 的返回 None。"""
+    match_id = item.get("match_id")
+    odds_type = HISTORY_TYPE_MAP.get(item.get("odds_type"))
+    if not match_id or not odds_type:
+        return None
+    try:
+        win = float(item.get("win_odds") or 0)
+        draw = float(item.get("draw_odds") or 0)
+        lose = float(item.get("lose_odds") or 0)
+    except (TypeError, ValueError):
+        return None
+    if win <= 0 and draw <= 0 and lose <= 0:
+        return None
+    return match_id, odds_type, win, draw, lose
+
+
+def _history_row(triple: Tuple[str, str, float, float, float],
+                 prev: Optional[Tuple[float, float, float]], change_time: datetime) -> Optional[tuple]:
+    """与上一条(prev)对比: 无变化(三项差值都 <0.005)返回 None, 否则返回 HISTORY_INSERT_SQL 参数。
+
+    direction_*=新-旧的符号(-1/0/+1), 首条为 0。
+    """
+    match_id, odds_type, win, draw, lose = triple
+    if prev:
+        pw, pd, pl = prev
+        if abs(win - pw) < 0.005 and abs(draw - pd) < 0.005 and abs(lose - pl) < 0.005:
+            return None
+        dw = 0 if abs(win - pw) < 0.005 else (1 if win > pw else -1)
+        dd = 0 if abs(draw - pd) < 0.005 else (1 if draw > pd else -1)
+        dl = 0 if abs(lose - pl) < 0.005 else (1 if lose > pl else -1)
+    else:
+        dw = dd = dl = 0
+    return (match_id, odds_type, win, draw, lose, dw, dd, dl, change_time)
+
+
+class LastOddsState:
+    """进程内 (match_id, spf/nspf) -> jczq_odds_history 最后一条 (胜, 平, 负)。
+
+    scraper 每 10 分钟对每场 had/hhad 比对一次"上一条", 绝大多数没变。这里常驻内存:
+    启动时一条批量查询按在售场种子化(OddsRepository.seed_last_odds, 入口调用), 之后比对零读库,
+    只插入真正变动的行; 本进程写 history 时同步更新。map 里没有的 key(新开售场)回落批量查库。
+    每 reseed_seconds 整体重新种子化一次, 纠正其他写入方(导入脚本等)造成的偏差。
+    stats(): 种子化次数、内存命中数、回落查库场次数(累计)与当前条数。
+    """
+
+    def __init__(self, reseed_seconds: float):
+        self.reseed_seconds = reseed_seconds
+        self._lock = threading.Lock()
+        self._odds: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self._seeded_at: Optional[float] = None
+        self._stats = {"seeds": 0, "hits": 0, "db_lookups": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.reseed_seconds > 0
+
+    def needs_seed(self) -> bool:
+        with self._lock:
+            return self.enabled and (
+                self._seeded_at is None or time.monotonic() - self._seeded_at >= self.reseed_seconds
+            )
+
+    def seed(self, odds: Dict[Tuple[str, str], Tuple[float, float, float]]) -> None:
+        with self._lock:
+            self._odds = dict(odds)
+            self._seeded_at = time.monotonic()
+            self._stats["seeds"] += 1
+
+    def lookup(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[float, float, float]]:
+        """map 里有的 key -> 最后一条赔率。"""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            found = {k: self._odds[k] for k in keys if k in self._odds}
+            self._stats["hits"] += len(found)
+            return found
+
+    def count_db_lookups(self, n: int) -> None:
+        with self._lock:
+            self._stats["db_lookups"] += n
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "size": len(self._odds)}
+
+    def update(self, odds: Dict[Tuple[str, str], Tuple[float, float, float]],
+               keep_matches: Optional[Iterable[str]] = None) -> None:
+        """写库提交后调用; keep_matches 给定时顺带剔除已不在售的场次。"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._odds.update(odds)
+            if keep_matches is not None:
+                keep = set(keep_matches)
+                self._odds = {k: v for k, v in self._odds.items() if k[0] in keep}
+
+
+_last_odds = LastOddsState(settings.LAST_ODDS_RESEED_SECONDS)
+
+
+class PoolBatch:
+    """一次体彩池响应解析出的待写行, 交给 OddsRepository.write_pool_batch 一个事务写完。"""
+
+    def __init__(self) -> None:
+        self.matches: List[Dict[str, Any]] = []
+        self.wdl: List[Dict[str, Any]] = []
+        self.scores: List[tuple] = []
+        self.goals: List[tuple] = []
+        self.hafu: List[tuple] = []
+
+    def add_match(self, match: Dict[str, Any]) -> None:
+        self.matches.append(match)
+
+    def add_wdl(self, item: Dict[str, Any]) -> None:
+        self.wdl.append(item)
+
+    def add_scores(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self.scores.extend(_score_values(match_id, r) for r in rows)
+
+    def add_goals(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self.goals.extend(_goals_values(match_id, r) for r in rows)
+
+    def add_hafu(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self.hafu.extend(_hafu_values(match_id, r) for r in rows)
+
+    def __bool__(self) -> bool:
+        return bool(self.matches or self.wdl or self.scores or self.goals or self.hafu)
+
+
 class OddsRepository:
     def upsert_match(self, match: Dict[str, Any]) -> None:
-        fields = [
-            "match_id",
-            "match_number",
-            "match_code",
-            "project_type",
-            "league_id",
-            "league_name",
-            "league_full_name",
-            "match_date",
-            "match_time",
-            "match_timestamp",
-            "home_team_id",
-            "home_team_name",
-            "home_team_rank",
-            "away_team_id",
-            "away_team_name",
-            "away_team_rank",
-            "is_single",
-            "match_status",
-            "notice",
-            "odds_update_time",
-        ]
-        columns = ", ".join(fields)
-        values = [match.get(f) for f in fields]
-        placeholders = ", ".join([PLACEHOLDER] * len(fields))
-        # is_single 只升不降：单关是历史事实，在售时同步为1，停售后API返回0时不回退
-        # match_status 不降级：已有比分或已 finished/cancelled 时，不被体彩 Selling 写回 not_started
-        def _update_expr(f: str) -> str:
-            if f == "is_single":
-                return "is_single=IF(VALUES(is_single)=1,1,is_single)"
-            if f == "match_status":
-                return (
-                    "match_status=IF("
-                    "home_score IS NOT NULL, 'finished', "
-                    "IF(match_status IN ('finished','cancelled') "
-                    "AND VALUES(match_status)='not_started', match_status, VALUES(match_status))"
-                    ")"
-                )
-            return f"{f}=VALUES({f})"
-
-        update_placeholders = ", ".join(
-            _update_expr(f) for f in fields if f != "match_id"
-        )
-        sql = f"""
-            INSERT INTO matches ({columns}) VALUES ({placeholders})
-            ON DUPLICATE KEY UPDATE {update_placeholders}, updated_at = CURRENT_TIMESTAMP
-        """
-        
         with get_db() as conn:
-            _execute(conn, sql, values)
+            _execute(conn, MATCH_UPSERT_SQL, _match_values(match))
 
     def upsert_odds_wdl(self, item: Dict[str, Any]) -> None:
-        ph = PLACEHOLDER
-        sql = f"""
-            INSERT INTO odds_win_draw_lose (
-                match_id, odds_type, handicap,
-                win_odds, draw_odds, lose_odds,
-                win_support, draw_support, lose_support,
-                is_single, updated_at
-            ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-            ON DUPLICATE KEY UPDATE
-                handicap=VALUES(handicap),
-                win_odds=VALUES(win_odds),
-                draw_odds=VALUES(draw_odds),
-                lose_odds=VALUES(lose_odds),
-                win_support=VALUES(win_support),
-                draw_support=VALUES(draw_support),
-                lose_support=VALUES(lose_support),
-                is_single=IF(VALUES(is_single)=1,1,is_single),
-                updated_at=CURRENT_TIMESTAMP
-        """
-        
-        values = [
-            item.get("match_id"),
-            item.get("odds_type"),
-            item.get("handicap"),
-            item.get("win_odds"),
-            item.get("draw_odds"),
-            item.get("lose_odds"),
-            item.get("win_support"),
-            item.get("draw_support"),
-            item.get("lose_support"),
-            item.get("is_single", 0),
-        ]
         with get_db() as conn:
-            _execute(conn, sql, values)
+            _execute(conn, WDL_UPSERT_SQL, _wdl_values(item))
 
     def append_odds_history(self, item: Dict[str, Any]) -> None:
         """记录竞彩赔率变动到 jczq_odds_history。
 
         与同场同类型最后一条对比；有变动(任一差值>0.005)或首条则 append。
         direction_*=新-旧的符号(-1/0/+1)。earliest=初盘, latest=终盘。
+        写入后同事务更新 jczq_odds_open_close 汇总。
         odds_type 映射 had->spf / hhad->nspf 与历史导入口径一致。
         """
-        match_id = item.get("match_id")
-        # had/hhad(竞彩) -> spf/nspf(jczq_odds_history 约定)
-        _TYPE_MAP = {"had": "spf", "hhad": "nspf"}
-        odds_type = _TYPE_MAP.get(item.get("odds_type"))
-        if not match_id or not odds_type:
-            return
-        try:
-            win = float(item.get("win_odds") or 0)
-            draw = float(item.get("draw_odds") or 0)
-            lose = float(item.get("lose_odds") or 0)
-        except (TypeError, ValueError):
-            return
-        if win <= 0 and draw <= 0 and lose <= 0:
+        triple = _history_triple(item)
+        if not triple:
             return
+        match_id, odds_type = triple[0], triple[1]
 
         now = datetime.utcnow().replace(microsecond=0)
         with get_db() as conn:
@@ -138,115 +390,159 @@ class OddsRepository:
                 (match_id, odds_type),
             )
             prev = cur.fetchone()
-            if prev:
-                pw, pd, pl = float(prev["odds_win"]), float(prev["odds_draw"]), float(prev["odds_loss"])
-                # 赔率无变化则跳过(避免每10分钟写一条无意义记录)
-                if abs(win - pw) < 0.005 and abs(draw - pd) < 0.005 and abs(lose - pl) < 0.005:
-                    return
-                dw = 0 if abs(win - pw) < 0.005 else (1 if win > pw else -1)
-                dd = 0 if abs(draw - pd) < 0.005 else (1 if draw > pd else -1)
-                dl = 0 if abs(lose - pl) < 0.005 else (1 if lose > pl else -1)
-            else:
-                dw = dd = dl = 0
-            _execute(
-                conn,
-                """INSERT IGNORE INTO jczq_odds_history
-                   (match_id, odds_type, odds_win, odds_draw, odds_loss,
-                    direction_win, direction_draw, direction_loss, change_time)
-                   VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-                (match_id, odds_type, win, draw, lose, dw, dd, dl, now),
+            # 赔率无变化则跳过(避免每10分钟写一条无意义记录)
+            row = _history_row(
+                triple,
+                (float(prev["odds_win"]), float(prev["odds_draw"]), float(prev["odds_loss"])) if prev else None,
+                now,
             )
+            if row is None:
+                return
+            cur = _execute(conn, HISTORY_INSERT_SQL, row)
+            if cur.rowcount:
+                _touch_open_close(conn, *triple, now)
+        _last_odds.update({(match_id, odds_type): triple[2:]})
 
     def upsert_odds_score_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
-            return
-        
-        def normalize_score(row: Dict[str, Any], key: str) -> Optional[int]:
-            """空比分用 -1 保存，避免 NULL 使唯一索引失效"""
-            value = row.get(key)
-            if value is None:
-                return -1
-            try:
-                return int(value)
-            except (TypeError, ValueError):
-                return -1
-
-        ph = PLACEHOLDER
-        sql = f"""
-            INSERT INTO odds_correct_score (
-                match_id, result_type, home_score, away_score, score_label, odds, is_other, updated_at
-            ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-            ON DUPLICATE KEY UPDATE
-                odds=VALUES(odds),
-                score_label=VALUES(score_label),
-                updated_at=CURRENT_TIMESTAMP
-        """
-        
-        with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("result_type"),
-                    normalize_score(row, "home_score"),
-                    normalize_score(row, "away_score"),
-                    row.get("score_label"),
-                    row.get("odds"),
-                    row.get("is_other", 0),
-                ))
+        params = [_score_values(match_id, r) for r in rows]
+        if params:
+            with get_db() as conn:
+                _executemany(conn, SCORE_UPSERT_SQL, params)
 
     def upsert_odds_goals_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
-            return
-        
-        ph = PLACEHOLDER
-        sql = f"""
-            INSERT INTO odds_total_goals (
-                match_id, goal_range, min_goals, max_goals, odds, updated_at
-            ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-            ON DUPLICATE KEY UPDATE
-                min_goals=VALUES(min_goals),
-                max_goals=VALUES(max_goals),
-                odds=VALUES(odds),
-                updated_at=CURRENT_TIMESTAMP
+        params = [_goals_values(match_id, r) for r in rows]
+        if params:
+            with get_db() as conn:
+                _executemany(conn, GOALS_UPSERT_SQL, params)
+
+    def upsert_odds_hafu_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
+        params = [_hafu_values(match_id, r) for r in rows]
+        if params:
+            with get_db() as conn:
+                _executemany(conn, HAFU_UPSERT_SQL, params)
+
+    def _latest_history(self, conn, match_ids: Optional[List[str]] = None
+                        ) -> Dict[Tuple[str, str], Tuple[float, float, float]]:
+        """一条查询取多场 spf/nspf 在 jczq_odds_history 的最后一条赔率; match_ids=None 取全部在售场。"""
+        if match_ids is not None and not match_ids:
+            return {}
+        if match_ids is None:
+            # 与 list_live_for_asian 同口径: 未出比分且开赛不超过 72h
+            scope = (
+                "match_id IN (SELECT match_id FROM matches WHERE home_score IS NULL "
+                "AND (match_timestamp IS NULL "
+                "OR match_timestamp > UNIX_TIMESTAMP(NOW() - INTERVAL 72 HOUR)))"
+            )
+            params: List[Any] = []
+        else:
+            scope = f"match_id IN ({','.join([PLACEHOLDER] * len(match_ids))})"
+            params = list(match_ids)
+        cur = _execute(
+            conn,
+            f"""SELECT h.match_id, h.odds_type, h.odds_win, h.odds_draw, h.odds_loss
+                FROM jczq_odds_history h
+                JOIN (SELECT match_id, odds_type, MAX(change_time) AS ct
+                      FROM jczq_odds_history
+                      WHERE {scope} AND odds_type IN ('spf', 'nspf')
+                      GROUP BY match_id, odds_type) t
+                  ON h.match_id = t.match_id AND h.odds_type = t.odds_type AND h.change_time = t.ct""",
+            params,
+        )
+        return {
+            (r["match_id"], r["odds_type"]): (float(r["odds_win"]), float(r["odds_draw"]), float(r["odds_loss"]))
+            for r in cur.fetchall()
+        }
+
+    def _history_taken(self, conn, keys: Iterable[Tuple[str, str]], change_time: datetime
+                       ) -> set:
+        """keys 中在 change_time 这一秒已有 history 行的 (match_id, odds_type)(uk_match_type_time 会冲突)。"""
+        match_ids = sorted({k[0] for k in keys})
+        if not match_ids:
+            return set()
+        cur = _execute(
+            conn,
+            f"""SELECT match_id, odds_type FROM jczq_odds_history
+                WHERE match_id IN ({','.join([PLACEHOLDER] * len(match_ids))}) AND change_time = %s""",
+            (*match_ids, change_time),
+        )
+        return {(r["match_id"], r["odds_type"]) for r in cur.fetchall()}
+
+    def seed_last_odds(self) -> int:
+        """按在售场一次批量查询种子化 LastOddsState; 返回条数(关闭时 0)。
+
+        全量 GROUP BY 较重, 放在启动时/写事务之外做, 不占 had_hhad 写入事务的锁。
         """
-        
+        if not _last_odds.enabled:
+            return 0
         with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("goal_range"),
-                    row.get("min_goals"),
-                    row.get("max_goals"),
-                    row.get("odds"),
-                ))
+            odds = self._latest_history(conn)
+        _last_odds.seed(odds)
+        return len(odds)
 
-    def upsert_odds_hafu_bulk(self, match_id: str, rows: Iterable[Dict[str, Any]]) -> None:
-        rows = list(rows)
-        if not rows:
-            return
-        
-        ph = PLACEHOLDER
-        sql = f"""
-            INSERT INTO odds_half_full_time (
-                match_id, half_result, full_result, result_label, odds, updated_at
-            ) VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, CURRENT_TIMESTAMP)
-            ON DUPLICATE KEY UPDATE
-                result_label=VALUES(result_label),
-                odds=VALUES(odds),
-                updated_at=CURRENT_TIMESTAMP
+    def last_odds_stats(self) -> Dict[str, int]:
+        return _last_odds.stats()
+
+    def write_pool_batch(self, batch: PoolBatch) -> int:
+        """一个连接/事务写完一次池响应: matches、odds_*、jczq_odds_history(+open_close)。
+
+        每张表一次 executemany(PyMySQL 改写为多行 INSERT); history 的"上一条"取自进程内
+        LastOddsState(缺的 key 一次批量查库), 逐项比对后只插入有变动的。返回写入 history 的条数。
         """
-        
+        if not batch:
+            return 0
+        now = datetime.utcnow().replace(microsecond=0)
+        # 同一场同类型只取最后一项(单次响应正常不会重复)
+        triples = {}
+        for item in batch.wdl:
+            triple = _history_triple(item)
+            if triple:
+                triples[(triple[0], triple[1])] = triple
+        # 启动种子化失败或到了定期重新种子化: 在写事务之外补做
+        if triples and _last_odds.needs_seed():
+            self.seed_last_odds()
+
         with get_db() as conn:
-            for row in rows:
-                _execute(conn, sql, (
-                    match_id,
-                    row.get("half_result"),
-                    row.get("full_result"),
-                    row.get("result_label"),
-                    row.get("odds"),
-                ))
+            if batch.matches:
+                _executemany(conn, MATCH_UPSERT_SQL, [_match_values(m) for m in batch.matches])
+            if batch.wdl:
+                _executemany(conn, WDL_UPSERT_SQL, [_wdl_values(i) for i in batch.wdl])
+            if batch.scores:
+                _executemany(conn, SCORE_UPSERT_SQL, batch.scores)
+            if batch.goals:
+                _executemany(conn, GOALS_UPSERT_SQL, batch.goals)
+            if batch.hafu:
+                _executemany(conn, HAFU_UPSERT_SQL, batch.hafu)
+
+            changed = []
+            latest = {}
+            if triples:
+                prev = _last_odds.lookup(triples)
+                missing = sorted({k[0] for k in triples if k not in prev})
+                if missing:
+                    _last_odds.count_db_lookups(len(missing))
+                    prev.update(self._latest_history(conn, missing))
+                for key, triple in triples.items():
+                    row = _history_row(triple, prev.get(key), now)
+                    if row is not None:
+                        changed.append((triple, row))
+                        latest[key] = triple[2:]
+                    else:
+                        latest[key] = prev[key]
+            if changed:
+                # 同一秒已有行的(其他写入方刚写过)不插入, 也不动汇总: 只有真正落库的行才计入 open_close
+                taken = self._history_taken(conn, [t[:2] for t, _ in changed], now)
+                if taken:
+                    changed = [(t, row) for t, row in changed if t[:2] not in taken]
+                    for key in taken:
+                        latest.pop(key, None)
+            if changed:
+                _executemany(conn, HISTORY_BULK_INSERT_SQL, [row for _, row in changed])
+                _executemany(conn, OPEN_CLOSE_UPSERT_SQL, [_open_close_values(*t, now) for t, _ in changed])
+
+        # 提交成功后再更新内存状态; had_hhad 池即全部在售场, 不在其中的剔除
+        if latest:
+            _last_odds.update(latest, keep_matches=[m.get("match_id") for m in batch.matches] or None)
+        return len(changed)
 
     def finalize_sync(self, total_matches: int, total_odds: int) -> None:
         with get_db() as conn:
@@ -327,7 +623,7 @@ class OddsRepository:
         """用体彩赛果终赔校正 spf 终盘。
 
         在售池抓取常在封盘前停更, history 最后一条≠真终盘。
-        与最后一条差异>0.005 则 append; 同步更新 odds_win_draw_lose.had。
+        与最后一条差异>0.005 则 append; 同步更新 odds_win_draw_lose.had 与 jczq_odds_open_close。
         返回是否写入 history。
         """
         if not match_id:
@@ -374,7 +670,7 @@ class OddsRepository:
             if prev_ct is not None and ct <= prev_ct:
                 ct = prev_ct + timedelta(seconds=1)
 
-            _execute(
+            cur = _execute(
                 conn,
                 """INSERT IGNORE INTO jczq_odds_history
                    (match_id, odds_type, odds_win, odds_draw, odds_loss,
@@ -382,6 +678,9 @@ class OddsRepository:
                    VALUES (%s,'spf',%s,%s,%s,%s,%s,%s,%s)""",
                 (match_id, win_f, draw_f, lose_f, dw, dd, dl, ct),
             )
+            inserted = cur.rowcount
+            if inserted:
+                _touch_open_close(conn, match_id, "spf", win_f, draw_f, lose_f, ct)
             # 当前赔率表也落到终盘
             _execute(
                 conn,
@@ -390,7 +689,9 @@ class OddsRepository:
                    WHERE match_id=%s AND odds_type='had'""",
                 (win_f, draw_f, lose_f, match_id),
             )
-            return True
+        if inserted:
+            _last_odds.update({(match_id, "spf"): (win_f, draw_f, lose_f)})
+        return True
 
     def get_latest_issue(self) -> Optional[str]:
         with get_db() as conn:
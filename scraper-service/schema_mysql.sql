@@ -112,3 +112,29 @@ CREATE TABLE IF NOT EXISTS jczq_odds_history (
     INDEX idx_match (match_id),
     FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- jczq_odds_history 每场每口径的初盘/终盘汇总(写 history 时同步维护, 同赔池/单场初终盘直接读)
+CREATE TABLE IF NOT EXISTS jczq_odds_open_close (
+    match_id VARCHAR(100) NOT NULL,
+    odds_type VARCHAR(20) NOT NULL COMMENT 'spf/nspf',
+    open_win DECIMAL(8,2) NOT NULL,
+    open_draw DECIMAL(8,2) NOT NULL,
+    open_loss DECIMAL(8,2) NOT NULL,
+    close_win DECIMAL(8,2) NOT NULL,
+    close_draw DECIMAL(8,2) NOT NULL,
+    close_loss DECIMAL(8,2) NOT NULL,
+    move_count INT NOT NULL DEFAULT 1 COMMENT 'history 行数(≥2 才有初终盘变动)',
+    first_time DATETIME NOT NULL COMMENT '初盘 change_time',
+    last_time DATETIME NOT NULL COMMENT '终盘 change_time',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (match_id, odds_type),
+    INDEX idx_type_moves (odds_type, move_count),
+    FOREIGN KEY (match_id) REFERENCES matches(match_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- jczq_odds_open_close 全量重建标记(build_odds_open_close.rebuild 完成后写入, 无记录时同赔池加载前先全量重建)
+CREATE TABLE IF NOT EXISTS jczq_odds_open_close_build (
+    id INT PRIMARY KEY CHECK (id = 1),
+    rebuilt_at DATETIME NOT NULL,
+    affected INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -7,11 +7,13 @@
 from __future__ import annotations
 
 import logging
+import threading
 from typing import Dict, Optional
 
-import httpx
 from bs4 import BeautifulSoup
 
+from scraper.http_client import odds500_client
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://odds.500.com"
@@ -41,10 +43,15 @@ HANDICAP_MAP = {
 
 # sale_date → {match_code: fid}
 _fid_cache: Dict[str, Dict[str, str]] = {}
+# 同一售卖日只让一个线程下载列表页, 其余等它的结果
+_fid_locks: Dict[str, threading.Lock] = {}
+_fid_locks_guard = threading.Lock()
 
 
 def clear_fid_cache() -> None:
     _fid_cache.clear()
+    with _fid_locks_guard:
+        _fid_locks.clear()
 
 
 def _is_bet365(raw_name: str, cid: str) -> bool:
@@ -92,17 +99,25 @@ def _parse_handicap_value(text: str) -> Optional[float]:
 
 
 def load_fid_map(sale_date: str, timeout: int = 15) -> Dict[str, str]:
-    """抓取售卖日列表页, 返回 {match_code: fid}。同日缓存。"""
+    """抓取售卖日列表页, 返回 {match_code: fid}。同日缓存, 并发调用只下载一次。"""
     if sale_date in _fid_cache:
         return _fid_cache[sale_date]
+    with _fid_locks_guard:
+        lock = _fid_locks.setdefault(sale_date, threading.Lock())
+    with lock:
+        if sale_date in _fid_cache:
+            return _fid_cache[sale_date]
+        _fid_cache[sale_date] = _fetch_fid_map(sale_date, timeout)
+        return _fid_cache[sale_date]
+
+
+def _fetch_fid_map(sale_date: str, timeout: int) -> Dict[str, str]:
     url = f"{BASE_URL}/yazhi_jczq_{sale_date}.shtml"
     result: Dict[str, str] = {}
     try:
-        with httpx.Client(timeout=timeout, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = odds500_client().get(url, headers=HEADERS, timeout=timeout)
         if resp.status_code != 200:
             logger.warning(f"亚盘列表失败 {sale_date}: HTTP {resp.status_code}")
-            _fid_cache[sale_date] = result
             return result
         content = resp.content.decode("gbk", errors="replace")
         soup = BeautifulSoup(content, "html.parser")
@@ -116,7 +131,6 @@ def load_fid_map(sale_date: str, timeout: int = 15) -> Dict[str, str]:
                 result[code] = str(fid)
     except Exception as e:
         logger.warning(f"亚盘列表异常 {sale_date}: {e}")
-    _fid_cache[sale_date] = result
     return result
 
 
@@ -150,8 +164,7 @@ def fetch_bet365_line(fid: str, timeout: int = 15) -> Optional[Dict]:
         return None
     url = f"{BASE_URL}/fenxi/yazhi-{fid}.shtml"
     try:
-        with httpx.Client(timeout=timeout, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = odds500_client().get(url, headers=HEADERS, timeout=timeout)
         if resp.status_code != 200:
             logger.warning(f"亚盘详情失败 fid={fid}: HTTP {resp.status_code}")
             return None
@@ -0,0 +1,160 @@
+"""500.com 共享 HTTP 客户端(连接池 + keep-alive + 每主机并发/限速 + 重试退避)
+
+asian_bet365 / score_500 原先每个请求新建 httpx.Client(每场一次 DNS + TCP + TLS 握手),
+在售亚盘刷新的线程池里几百场就是几百次建连。这里进程内复用一个 httpx.Client。
+
+与 api-service/http_client.py 的 ManagedClient 是同一套做法的同步精简版(无 async 客户端)。
+两个服务分别构建镜像(deploy/*/Dockerfile 只 COPY 各自目录), 没有可共同 import 的包,
+所以各留一份; 改重试/限速语义时两边一起改。进程退出前由 SportterySyncService.close
+调 close_odds500_client 释放连接池。
+
+  - 连接池: max_connections / max_keepalive_connections / keepalive_expiry
+  - 每主机并发上限: 同一 host 同时在途请求数(信号量)
+  - 每主机限速: 同一 host 相邻两次请求发出间隔不小于 1/rate 秒(rate<=0 不限)
+  - 重试: 连接类错误与 429/5xx 指数退避重试; 读超时不重试
+  - stats(): 请求/重试/失败计数、限速等待耗时
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 可重试的响应码: 限流 + 网关/服务端临时错误
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+# 可重试的传输错误: 请求大概率未被对方处理
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.ReadError)
+
+
+class ManagedClient:
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 15,
+                 max_connections: int = 16, max_keepalive: int = 8, keepalive_expiry: float = 30,
+                 per_host: int = 6, rate: float = 0, retries: int = 2, backoff: float = 0.5):
+        self.per_host = per_host
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self._client_kwargs = dict(
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self._client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self._host_sems: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_at: Dict[str, float] = {}
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "throttle_total_ms": 0.0}
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs)
+        return self._client
+
+    def _host_sem(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._host_sems.setdefault(host, threading.BoundedSemaphore(self.per_host))
+
+    def _throttle(self, host: str) -> None:
+        """按 rate 给本次请求分配发出时刻, 未到则等待。"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at.get(host, now))
+            self._next_at[host] = slot + 1.0 / self.rate
+            self._stats["throttle_total_ms"] += (slot - now) * 1000
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """发请求(参数同 httpx.Client.request); 重试用尽后抛最后一次异常或返回最后一次响应。"""
+        host = urlsplit(url).netloc
+        sem = self._host_sem(host)
+        attempt = 0
+        while True:
+            with sem:
+                self._throttle(host)
+                self._count("requests")
+                try:
+                    resp, error = self.client.request(method, url, **kwargs), None
+                except RETRY_ERRORS as e:
+                    resp, error = None, e
+                except Exception:
+                    self._count("failures")
+                    raise
+
+            if error is None and resp.status_code not in RETRY_STATUS:
+                return resp
+            if attempt >= self.retries:
+                if error is not None:
+                    self._count("failures")
+                    raise error
+                return resp
+            self._count("retries")
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            logger.info(f"HTTP 重试 {attempt + 1}/{self.retries} {method} {url}: "
+                        f"{error or resp.status_code}, {delay:.2f}s 后")
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["throttle_total_ms"] = round(s["throttle_total_ms"], 2)
+        return s
+
+
+_odds500: Optional[ManagedClient] = None
+_odds500_lock = threading.Lock()
+
+
+def odds500_client() -> ManagedClient:
+    """asian_bet365 / score_500 共用的 500.com 客户端(同一 host 的并发与限速全进程共享)。"""
+    global _odds500
+    if _odds500 is None:
+        with _odds500_lock:
+            if _odds500 is None:
+                import settings
+
+                _odds500 = ManagedClient(
+                    max_connections=settings.ODDS500_MAX_CONNECTIONS,
+                    max_keepalive=settings.ODDS500_MAX_CONNECTIONS,
+                    per_host=settings.ODDS500_PER_HOST,
+                    rate=settings.ODDS500_RATE,
+                    retries=settings.ODDS500_RETRIES,
+                )
+    return _odds500
+
+
+def close_odds500_client() -> None:
+    global _odds500
+    with _odds500_lock:
+        client, _odds500 = _odds500, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,122 @@
+"""按开赛临近程度调度抓取
+
+原先固定每 SYNC_INTERVAL_SECONDS(600s) 全量同步一次: 5 分钟后开赛的场和 5 天后的场同样
+10 分钟才刷一次, 封盘前最后几分钟的变盘抓不到, 远期场却一直白刷。KickoffScheduler:
+
+  - 每场按 matches.match_timestamp 落入刷新档位(SCRAPE_TIERS, 如开赛前 1h 内每分钟,
+    6h 内每 5 分钟, 24h 内每 15 分钟), 更远/已开赛按 SCRAPE_IDLE_INTERVAL
+  - 下次醒来 = 所有场中最早到期的时刻(也不晚于回填到期); 醒来只抓 had_hhad 池
+    (胜平负/让球胜平负, 写变动 history), 逐场的 Bet365 亚盘只刷到期场
+  - 逐场抓取成功后调用方 mark_refreshed 才算刷新; 失败的场下次醒来仍到期,
+    但醒来时刻按上次尝试计, 不会因持续失败以 min_delay 空转
+  - crs/ttg/hafu 池与比分/终盘回填仍按 SYNC_INTERVAL_SECONDS 节奏(full 轮)
+
+体彩池接口一次返回全部在售场, 无法逐场请求, 所以档位决定的是醒来频率与逐场阶段的范围。
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 档位: (距开赛不超过多少秒, 刷新间隔秒), 按距离升序
+Tiers = Sequence[Tuple[int, int]]
+
+
+def parse_tiers(spec: str) -> List[Tuple[int, int]]:
+    """"3600:60,21600:300" -> [(3600, 60), (21600, 300)]; 非法项忽略。"""
+    tiers = []
+    for part in (spec or "").split(","):
+        within, _, interval = part.strip().partition(":")
+        try:
+            tiers.append((int(within), max(1, int(interval))))
+        except ValueError:
+            continue
+    return sorted(tiers)
+
+
+class KickoffScheduler:
+    def __init__(self, tiers: Tiers, idle_interval: float, full_interval: float, min_delay: float = 15):
+        self.tiers = list(tiers)
+        self.idle_interval = idle_interval
+        self.full_interval = full_interval
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._kickoffs: Dict[str, Optional[int]] = {}
+        self._refreshed: Dict[str, float] = {}
+        self._attempted: Dict[str, float] = {}
+        self._last_full: Optional[float] = None
+
+    @classmethod
+    def from_settings(cls) -> "KickoffScheduler":
+        import settings
+
+        return cls(parse_tiers(settings.SCRAPE_TIERS), settings.SCRAPE_IDLE_INTERVAL,
+                   settings.SYNC_INTERVAL_SECONDS)
+
+    def interval_for(self, kickoff_ts: Optional[int], now: float) -> float:
+        """单场刷新间隔: 未开赛按距开赛落档, 无开赛时间按 full_interval, 已开赛/远期按 idle。"""
+        if kickoff_ts is None:
+            return self.full_interval
+        until = kickoff_ts - now
+        if until <= 0:
+            return self.idle_interval
+        for within, interval in self.tiers:
+            if until <= within:
+                return interval
+        return self.idle_interval
+
+    def full_due(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._last_full is None or now - self._last_full >= self.full_interval
+
+    def mark_full(self, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._last_full = time.time() if now is None else now
+
+    def take_due(self, matches: Iterable[Dict], now: Optional[float] = None) -> List[Dict]:
+        """记录本轮在售场的开赛时间(不在其中的剔除), 返回到期的场(记为已尝试, 未记刷新)。"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            kickoffs = {}
+            for m in matches:
+                mid = m.get("match_id")
+                if not mid:
+                    continue
+                ts = m.get("match_timestamp")
+                kickoffs[mid] = int(ts) if ts else None
+                last = self._refreshed.get(mid)
+                if last is None or now - last >= self.interval_for(kickoffs[mid], now):
+                    due.append(m)
+                    self._attempted[mid] = now
+            self._kickoffs = kickoffs
+            self._refreshed = {k: v for k, v in self._refreshed.items() if k in kickoffs}
+            self._attempted = {k: v for k, v in self._attempted.items() if k in kickoffs}
+        return due
+
+    def mark_refreshed(self, match_ids: Iterable[str], now: Optional[float] = None) -> None:
+        """逐场抓取成功后记为已刷新(只记本轮在售场)。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for mid in match_ids:
+                if mid in self._kickoffs:
+                    self._refreshed[mid] = now
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """距最早到期(任一场或 full 轮)的秒数, 限制在 [min_delay, idle_interval]。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            wake = now + self.idle_interval
+            if self._last_full is not None:
+                wake = min(wake, self._last_full + self.full_interval)
+            for mid, ts in self._kickoffs.items():
+                # 按上次尝试计(成功的尝试即刷新时刻), 失败场隔一个间隔再醒来重试
+                last = self._attempted.get(mid, now)
+                wake = min(wake, last + self.interval_for(ts, now))
+                # 跨档(如进入开赛前 1h)时按新档位提前醒来
+                if ts is not None:
+                    for within, _ in self.tiers:
+                        if ts - within > now:
+                            wake = min(wake, ts - within)
+        return max(self.min_delay, min(self.idle_interval, wake - now))
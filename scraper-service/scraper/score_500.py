@@ -8,11 +8,13 @@
 """
 
 import logging
+import threading
 from typing import Dict, Optional, Tuple
 
-import httpx
 from bs4 import BeautifulSoup
 
+from scraper.http_client import odds500_client
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://odds.500.com"
@@ -24,6 +26,9 @@ HEADERS = {
 
 # 缓存: {sale_date: {match_code: (home, away)}}
 _score_cache: Dict[str, Dict[str, Tuple[int, int]]] = {}
+# 同一售卖日只让一个线程下载列表页, 不同日期互不阻塞(网络请求不在全局锁内)
+_score_locks: Dict[str, threading.Lock] = {}
+_score_locks_guard = threading.Lock()
 
 
 def _parse_score(text: str) -> Optional[Tuple[int, int]]:
@@ -51,8 +56,7 @@ def _load_list_page(sale_date: str, timeout: int = 15) -> Dict[str, Tuple[int, i
     url = f"{BASE_URL}/yazhi_jczq_{sale_date}.shtml"
     result: Dict[str, Tuple[int, int]] = {}
     try:
-        with httpx.Client(timeout=timeout, headers=HEADERS) as client:
-            resp = client.get(url)
+        resp = odds500_client().get(url, headers=HEADERS, timeout=timeout)
         if resp.status_code != 200:
             logger.warning(f"获取竞彩列表失败 {sale_date}: HTTP {resp.status_code}")
             return result
@@ -73,10 +77,18 @@ def _load_list_page(sale_date: str, timeout: int = 15) -> Dict[str, Tuple[int, i
 
 def fetch_match_score(sale_date: str, match_code: str) -> Optional[Tuple[int, int]]:
     """获取指定比赛最终比分；未结束或无数据返回 None。同一日期会复用缓存"""
-    if sale_date not in _score_cache:
-        _score_cache[sale_date] = _load_list_page(sale_date)
-    return _score_cache[sale_date].get(match_code)
+    scores = _score_cache.get(sale_date)
+    if scores is None:
+        with _score_locks_guard:
+            lock = _score_locks.setdefault(sale_date, threading.Lock())
+        with lock:
+            scores = _score_cache.get(sale_date)
+            if scores is None:
+                scores = _score_cache[sale_date] = _load_list_page(sale_date)
+    return scores.get(match_code)
 
 
 def clear_cache() -> None:
     _score_cache.clear()
+    with _score_locks_guard:
+        _score_locks.clear()
@@ -1,11 +1,14 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
 import httpx
 
 import settings
-from repository import OddsRepository
+from repository import OddsRepository, PoolBatch
+from scraper.scheduler import KickoffScheduler
 from scraper.score_500 import fetch_match_score, clear_cache as clear_score_cache
 
 logger = logging.getLogger(__name__)
@@ -116,27 +119,84 @@ class SportterySyncService:
         "getUniformMatchResultV1.qry"
     )
 
-    def run_once(self) -> Dict[str, int]:
-        self.stats = {"matches": 0, "odds": 0, "scores": 0, "closing_odds": 0, "asian": 0}
-        for pool_name, pool_code in settings.POOL_CODES.items():
-            data = self.fetch_pool(pool_code)
-            self.parse_pool(pool_name, data)
-        # 回填已完赛但缺比分的比赛(最近3天，从500.com抓取)
-        try:
-            self.stats["scores"] = self.backfill_scores(days=3)
-        except Exception as e:
-            logger.warning(f"比分回填失败: {e}")
-        # 赛果终赔校正(在售池封盘前停更, history 末条常不是真终盘)
-        try:
-            self.stats["closing_odds"] = self.backfill_closing_odds(days=3)
-        except Exception as e:
-            logger.warning(f"终盘回填失败: {e}")
-        # 在售 Bet365 亚盘定时刷新(终盘覆盖, 供同赔页)
+    STAGE_LABELS = {"scores": "比分回填", "closing_odds": "终盘回填", "asian": "在售亚盘刷新"}
+
+    def _timed_stage(self, name: str, func, *args, **kwargs) -> int:
+        """运行一个可失败的回填阶段: 异常只记日志(计 0), 耗时记入 stats["timings_ms"]。"""
+        start = time.monotonic()
         try:
-            self.stats["asian"] = self.refresh_live_asian_bet365()
+            return func(*args, **kwargs)
         except Exception as e:
-            logger.warning(f"在售亚盘刷新失败: {e}")
+            logger.warning(f"{self.STAGE_LABELS.get(name, name)}失败: {e}")
+            return 0
+        finally:
+            self.stats["timings_ms"][name] = int((time.monotonic() - start) * 1000)
+
+    def run_once(self, scheduler: Optional[KickoffScheduler] = None) -> Dict[str, int]:
+        """一轮同步。池并发抓取(共享 self.client), 按 POOL_CODES 顺序落库(had_hhad 先写 matches,
+        其余池的外键依赖它); 各阶段流水线:
+
+          - 比分回填、终盘回填、在售亚盘刷新都在 had_hhad 落库后开始, 与其余池落库并行。
+            比分回填同样写 matches(match_status/比分), 与 had_hhad 的 matches upsert 并发会
+            锁同一批行(死锁)并互相覆盖 match_status, 所以不提前到抓池阶段
+
+        传入 scheduler(见 scraper.scheduler)时, 未到 full 轮只抓 had_hhad + 到期场亚盘,
+        不跑 crs/ttg/hafu 与回填。
+        任一池抓取失败仍按原语义中止本轮(抛出); 回填阶段失败只记日志。
+        stats["timings_ms"] 记录各池抓取/落库与各阶段耗时(毫秒); stats["last_odds"] 为 history
+        比对用的内存"上一条"状态累计计数(见 repository.LastOddsState)。
+        """
+        full = scheduler is None or scheduler.full_due()
+        self.stats = {"matches": 0, "odds": 0, "scores": 0, "closing_odds": 0, "asian": 0,
+                      "full": full, "timings_ms": {}}
+        timings = self.stats["timings_ms"]
+        cycle_start = time.monotonic()
+        pools = settings.POOL_CODES if full else {"had_hhad": settings.POOL_CODES["had_hhad"]}
+
+        def _fetch(pool_name: str, pool_code: str):
+            start = time.monotonic()
+            try:
+                return self.fetch_pool(pool_code)
+            finally:
+                timings[f"fetch_{pool_name}"] = int((time.monotonic() - start) * 1000)
+
+        fetch_workers = max(1, min(settings.POOL_FETCH_CONCURRENCY, len(pools)))
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+                ThreadPoolExecutor(max_workers=len(self.STAGE_LABELS)) as stage_pool:
+            fetches = {name: fetch_pool.submit(_fetch, name, code) for name, code in pools.items()}
+            stages = {}
+            try:
+                for name, future in fetches.items():
+                    data = future.result()
+                    start = time.monotonic()
+                    self.parse_pool(name, data)
+                    timings[f"write_{name}"] = int((time.monotonic() - start) * 1000)
+                    if name == "had_hhad":
+                        if full:
+                            # 回填已完赛但缺比分的比赛(最近3天，从500.com抓取)
+                            stages["scores"] = stage_pool.submit(
+                                self._timed_stage, "scores", self.backfill_scores, days=3)
+                            # 赛果终赔校正(在售池封盘前停更, history 末条常不是真终盘)
+                            stages["closing_odds"] = stage_pool.submit(
+                                self._timed_stage, "closing_odds", self.backfill_closing_odds, days=3)
+                        # 在售 Bet365 亚盘定时刷新(终盘覆盖, 供同赔页)
+                        stages["asian"] = stage_pool.submit(
+                            self._timed_stage, "asian", self.refresh_live_asian_bet365,
+                            scheduler=scheduler, full=full)
+            except Exception:
+                for future in fetches.values():
+                    future.cancel()
+                raise
+            finally:
+                # 已开始的阶段跑完再返回/抛出, 不把半途的线程留给下一轮
+                for name, future in stages.items():
+                    self.stats[name] = future.result()
+
         self.repository.finalize_sync(self.stats["matches"], self.stats["odds"])
+        if full and scheduler is not None:
+            scheduler.mark_full()
+        timings["total"] = int((time.monotonic() - cycle_start) * 1000)
+        self.stats["last_odds"] = self.repository.last_odds_stats()
         return self.stats
 
     def fetch_match_results(self, begin_date: str, end_date: str) -> List[Dict]:
@@ -242,18 +302,26 @@ class SportterySyncService:
                 updated += 1
         return updated
 
-    def refresh_live_asian_bet365(self, max_workers: int = 4) -> int:
+    def refresh_live_asian_bet365(self, max_workers: Optional[int] = None,
+                                  scheduler: Optional[KickoffScheduler] = None, full: bool = True) -> int:
         """在售场强制刷新 Bet365 亚盘终盘(每轮 scraper 调用)。
 
         仅 Bet365; 写入 jczq_ah_history(终盘覆盖, 初盘保留首抓) + matches.asian_*。
+        传入 scheduler 时只刷按开赛临近档位到期的场, 落库成功的场才记为已刷新。
+        售卖日 match_code→fid 列表页缓存只在 full 轮清空, 非 full 轮(每分钟级)复用。
+        线程池(ASIAN_REFRESH_WORKERS)共用 scraper.http_client 的 500.com 连接池,
+        实际并发/频率由其每主机上限与限速控制。
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from concurrent.futures import as_completed
         from scraper.asian_bet365 import clear_fid_cache, fetch_bet365_line, get_fid
 
         live = self.repository.list_live_for_asian()
+        if scheduler is not None:
+            live = scheduler.take_due(live)
         if not live:
             return 0
-        clear_fid_cache()
+        if full:
+            clear_fid_cache()
         logger.info(f"在售亚盘刷新: {len(live)} 场(Bet365)")
 
         def _one(m: Dict) -> Optional[str]:
@@ -288,47 +356,55 @@ class SportterySyncService:
                 return None
             return mid
 
-        updated = 0
-        workers = min(max_workers, max(1, len(live)))
+        refreshed = []
+        workers = min(max_workers or settings.ASIAN_REFRESH_WORKERS, max(1, len(live)))
         with ThreadPoolExecutor(max_workers=workers) as pool:
             futs = [pool.submit(_one, m) for m in live]
             for fut in as_completed(futs):
                 try:
-                    if fut.result():
-                        updated += 1
+                    mid = fut.result()
+                    if mid:
+                        refreshed.append(mid)
                 except Exception as e:
                     logger.warning(f"亚盘单场失败: {e}")
-        logger.info(f"在售亚盘刷新完成: {updated}/{len(live)}")
+        if scheduler is not None:
+            scheduler.mark_refreshed(refreshed)
+        updated = len(refreshed)
+        from scraper.http_client import odds500_client
+        logger.info(f"在售亚盘刷新完成: {updated}/{len(live)}, 500.com 请求: {odds500_client().stats()}")
         return updated
 
     # Parsing helpers -----------------------------------------------------
     def parse_pool(self, pool_name: str, data: Dict) -> None:
+        """解析一次池响应, 整批一个事务写库(见 OddsRepository.write_pool_batch)。"""
         if not data.get("success") or data.get("emptyFlag"):
             return
+        batch = PoolBatch()
         match_info_list = data.get("value", {}).get("matchInfoList", [])
         for date_group in match_info_list:
             for match_data in date_group.get("subMatchList", []):
                 if pool_name == "had_hhad":
                     single_flags = extract_pool_single_flags(match_data)
-                    match = self.build_match(match_data, single_flags)
-                    self.repository.upsert_match(match)
+                    batch.add_match(self.build_match(match_data, single_flags))
                     self.stats["matches"] += 1
                     for odds in self.build_had_hhad(match_data, single_flags):
-                        self.repository.upsert_odds_wdl(odds)
-                        self.repository.append_odds_history(odds)
+                        batch.add_wdl(odds)
                         self.stats["odds"] += 1
                 elif pool_name == "crs":
                     items = self.build_crs(match_data)
-                    self.repository.upsert_odds_score_bulk(str(match_data.get("matchId")), items)
+                    batch.add_scores(str(match_data.get("matchId")), items)
                     self.stats["odds"] += len(items)
                 elif pool_name == "ttg":
                     items = self.build_ttg(match_data)
-                    self.repository.upsert_odds_goals_bulk(str(match_data.get("matchId")), items)
+                    batch.add_goals(str(match_data.get("matchId")), items)
                     self.stats["odds"] += len(items)
                 elif pool_name == "hafu":
                     items = self.build_hafu(match_data)
-                    self.repository.upsert_odds_hafu_bulk(str(match_data.get("matchId")), items)
+                    batch.add_hafu(str(match_data.get("matchId")), items)
                     self.stats["odds"] += len(items)
+        changes = self.repository.write_pool_batch(batch)
+        if changes:
+            logger.info(f"{pool_name}: 赔率变动 {changes} 条")
 
     def build_match(self, match_data: Dict, single_flags: Optional[Dict[str, int]] = None) -> Dict:
         match_id = str(match_data.get("matchId"))
@@ -536,4 +612,7 @@ class SportterySyncService:
         return items
 
     def close(self) -> None:
+        from scraper.http_client import close_odds500_client
+
         self.client.close()
+        close_odds500_client()
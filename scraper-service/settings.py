@@ -30,5 +30,22 @@ POOL_CODES = {
 }
 
 SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "600"))  # 10分钟
+# 按开赛临近程度调度(scraper.scheduler): 1 开启, 0 恢复固定 SYNC_INTERVAL_SECONDS
+ADAPTIVE_SCHEDULE = os.getenv("ADAPTIVE_SCHEDULE", "1") == "1"
+# 刷新档位 "距开赛秒数:间隔秒,..."(默认 开赛前1h内每分钟, 6h内每5分钟, 24h内每15分钟); 更远/已开赛按 SCRAPE_IDLE_INTERVAL
+SCRAPE_TIERS = os.getenv("SCRAPE_TIERS", "3600:60,21600:300,86400:900")
+SCRAPE_IDLE_INTERVAL = int(os.getenv("SCRAPE_IDLE_INTERVAL", "3600"))
+# run_once 并发抓取体彩池的线程数(共享一个 httpx.Client)
+POOL_FETCH_CONCURRENCY = int(os.getenv("POOL_FETCH_CONCURRENCY", "4"))
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "20"))
+# 竞彩赔率变动比对用的进程内"最后一条"状态(repository.LastOddsState)整体重新种子化间隔(秒); 0 关闭, 每次查库
+LAST_ODDS_RESEED_SECONDS = int(os.getenv("LAST_ODDS_RESEED_SECONDS", str(6 * 3600)))
 USER_AGENT = "football-betting-system/1.0"
+
+# 500.com 共享客户端(scraper.http_client): 连接池大小/同时在途请求数/每秒请求数(0 不限)/重试次数
+ODDS500_MAX_CONNECTIONS = int(os.getenv("ODDS500_MAX_CONNECTIONS", "16"))
+ODDS500_PER_HOST = int(os.getenv("ODDS500_PER_HOST", "6"))
+ODDS500_RATE = float(os.getenv("ODDS500_RATE", "8"))
+ODDS500_RETRIES = int(os.getenv("ODDS500_RETRIES", "2"))
+# 在售亚盘刷新线程数(实际并发受 ODDS500_PER_HOST/ODDS500_RATE 约束)
+ASIAN_REFRESH_WORKERS = int(os.getenv("ASIAN_REFRESH_WORKERS", "8"))